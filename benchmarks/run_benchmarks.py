@@ -0,0 +1,296 @@
+"""
+Times the main file operations on synthetic trees and compares them with a baseline.
+
+Each benchmark runs on a freshly generated tree (organizing and deleting
+change the tree, and reading files changes their access times), and the
+fastest of the repeats is reported. Run from the repository root:
+
+    python benchmarks/run_benchmarks.py --files 5000 --save-baseline
+    python benchmarks/run_benchmarks.py --files 5000
+
+The second run compares its timings with the saved baseline and exits with
+status 1 when any benchmark got slower than the tolerance allows.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the repository root to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from benchmarks.tree_generator import TreeSpec, generate_tree
+
+REPORT_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_REPORT = "benchmark_report.json"
+# A benchmark regressed when it takes this fraction longer than the baseline
+DEFAULT_TOLERANCE = 0.25
+# Timings shorter than this are too noisy to flag as regressions
+MIN_COMPARABLE_SECONDS = 0.05
+UNUSED_DAYS = 90
+
+def _all_files(root: str) -> List[str]:
+    return [os.path.join(dirpath, name) for dirpath, _, names in os.walk(root) for name in names]
+
+def bench_organize(tree: str, work_dir: str) -> Dict:
+    from file_organizer_app.utils.file_organizer import organize_files
+    moved = organize_files(tree)
+    return {"moved": sum(moved.values())}
+
+def bench_duplicates(tree: str, work_dir: str) -> Dict:
+    from file_organizer_app.utils.file_organizer import find_duplicate_files
+    return {"duplicates": len(find_duplicate_files(tree))}
+
+def bench_unused(tree: str, work_dir: str) -> Dict:
+    from file_organizer_app.utils.file_metadata import find_unused_files
+    return {"unused": len(find_unused_files(tree, UNUSED_DAYS))}
+
+def bench_archive(tree: str, work_dir: str) -> Dict:
+    from file_organizer_app.utils.file_operations import create_folder_archive
+    archive_path = os.path.join(work_dir, "archive.zip")
+    success, error = create_folder_archive(tree, archive_path, "zip")
+    if not success:
+        raise RuntimeError(error)
+    return {"archive_bytes": os.path.getsize(archive_path)}
+
+def bench_delete(tree: str, work_dir: str) -> Dict:
+    from file_organizer_app.utils.file_operations import delete_files
+    deleted, errors = delete_files(_all_files(tree))
+    if errors:
+        raise RuntimeError(errors[0])
+    return {"deleted": deleted}
+
+# Name -> function run on a generated tree; the functions return counts that
+# show the run did the expected work
+BENCHMARKS: Dict[str, Callable[[str, str], Dict]] = {
+    "organize_files": bench_organize,
+    "find_duplicate_files": bench_duplicates,
+    "find_unused_files": bench_unused,
+    "create_folder_archive": bench_archive,
+    "delete_files": bench_delete,
+}
+
+def run_benchmark(name: str, spec: TreeSpec, repeat: int, work_dir: str) -> Tuple[Dict, Dict]:
+    """
+    Times one benchmark, generating a new tree for each run.
+
+    Args:
+        name: Name of the benchmark in BENCHMARKS
+        spec: Shape of the generated trees
+        repeat: Number of runs
+        work_dir: Folder to generate the trees and write archives in
+
+    Returns:
+        Tuple containing the benchmark's result and the summary of the generated tree
+    """
+    bench = BENCHMARKS[name]
+    runs = []
+    details = {}
+    tree_summary = {}
+    for i in range(repeat):
+        run_dir = os.path.join(work_dir, f"{name}-{i}")
+        tree = os.path.join(run_dir, "tree")
+        try:
+            tree_summary = generate_tree(tree, spec)
+            started = time.perf_counter()
+            details = bench(tree, run_dir)
+            runs.append(time.perf_counter() - started)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    seconds = min(runs)
+    result = {
+        "seconds": seconds,
+        "runs": runs,
+        "files_per_second": tree_summary["files"] / seconds if seconds else 0.0,
+        "details": details,
+    }
+    return result, tree_summary
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> Dict[str, Dict]:
+    """
+    Compares the timings of a report with a baseline report.
+
+    Args:
+        report: Report of this run
+        baseline: Report to compare with
+        tolerance: Fraction a benchmark may be slower than the baseline
+
+    Returns:
+        Dictionary with benchmark names as keys and, as values, the baseline
+        seconds, the ratio of this run to the baseline and whether it regressed
+    """
+    comparison = {}
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else 0.0
+        comparable = max(result["seconds"], before["seconds"]) >= MIN_COMPARABLE_SECONDS
+        comparison[name] = {
+            "baseline_seconds": before["seconds"],
+            "ratio": ratio,
+            "regression": comparable and ratio > 1 + tolerance,
+        }
+    return comparison
+
+def run_benchmarks(spec: TreeSpec, names: List[str], repeat: int = 3,
+                   work_dir: Optional[str] = None) -> Dict:
+    """
+    Runs benchmarks and builds a report.
+
+    Args:
+        spec: Shape of the generated trees
+        names: Names of the benchmarks to run
+        repeat: Number of runs per benchmark; the fastest is reported
+        work_dir: Folder to generate trees in (if None, uses a temporary folder).
+            Its filesystem is the one being measured.
+
+    Returns:
+        The report, ready to be written as JSON
+    """
+    report = {
+        "version": REPORT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "spec": spec.to_dict(),
+        "repeat": repeat,
+        "tree": {},
+        "results": {},
+    }
+
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="file_organizer_bench-", dir=work_dir)
+    try:
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr)
+            report["results"][name], report["tree"] = run_benchmark(name, spec, repeat, temp_dir)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return report
+
+def print_report(report: Dict) -> None:
+    """
+    Prints a report as a table.
+
+    Args:
+        report: Report made by run_benchmarks, with its comparison if there is one
+    """
+    tree = report["tree"]
+    print(f"Tree: {tree.get('files', 0)} files in {tree.get('directories', 0)} folders, "
+          f"{tree.get('bytes', 0) / (1024 * 1024):.1f} MB, {tree.get('duplicates', 0)} duplicates")
+    comparison = report.get("comparison", {})
+    for name, result in report["results"].items():
+        line = f"{name:<24}{result['seconds']:>9.3f}s{result['files_per_second']:>12.0f} files/s"
+        if name in comparison:
+            compared = comparison[name]
+            line += f"   {compared['ratio']:.2f}x baseline"
+            if compared["regression"]:
+                line += "  REGRESSION"
+        print(line)
+
+def load_report(path: str) -> Optional[Dict]:
+    """
+    Loads a report, returning None if there isn't one at the path.
+
+    Args:
+        path: Path to the report
+
+    Returns:
+        The report, or None
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def save_report(report: Dict, path: str) -> None:
+    """
+    Writes a report as JSON.
+
+    Args:
+        report: The report
+        path: Path to write it to
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+def build_parser() -> argparse.ArgumentParser:
+    defaults = TreeSpec()
+    parser = argparse.ArgumentParser(description="Benchmark File Organizer operations on synthetic trees.")
+    parser.add_argument("--files", type=int, default=defaults.files, help="number of files in each tree")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="folder levels below the root")
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="subfolders per folder")
+    parser.add_argument("--median-size", type=int, default=defaults.median_size, help="median file size in bytes")
+    parser.add_argument("--max-size", type=int, default=defaults.max_size, help="largest file size in bytes")
+    parser.add_argument("--size-spread", type=float, default=defaults.size_spread,
+                        help="spread of the log-normal file sizes")
+    parser.add_argument("--duplicates", type=float, default=defaults.duplicate_ratio,
+                        help="fraction of files that are duplicates")
+    parser.add_argument("--mean-age", type=float, default=defaults.mean_age_days,
+                        help="mean file age in days")
+    parser.add_argument("--max-age", type=int, default=defaults.max_age_days, help="oldest file age in days")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="random seed")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is reported")
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS),
+                        help="run only this benchmark (can be repeated)")
+    parser.add_argument("--work-dir", help="folder to generate trees in (default: the temporary folder)")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help=f"report to write (default: {DEFAULT_REPORT})")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline report to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="also save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fraction slower than the baseline that counts as a regression")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the benchmarks from the command line.
+
+    Returns:
+        0 if no benchmark regressed, 1 otherwise
+    """
+    args = build_parser().parse_args(argv)
+    spec = TreeSpec(files=args.files, depth=args.depth, fanout=args.fanout,
+                    median_size=args.median_size, max_size=args.max_size, size_spread=args.size_spread,
+                    duplicate_ratio=args.duplicates, mean_age_days=args.mean_age,
+                    max_age_days=args.max_age, seed=args.seed)
+
+    report = run_benchmarks(spec, args.only or list(BENCHMARKS), args.repeat, args.work_dir)
+
+    baseline = None if args.save_baseline else load_report(args.baseline)
+    if baseline is not None:
+        if baseline.get("spec") != report["spec"]:
+            print(f"Not comparing with {args.baseline}: it was made with different tree settings",
+                  file=sys.stderr)
+        else:
+            report["baseline"] = {"path": args.baseline, "created": baseline.get("created")}
+            report["comparison"] = compare(report, baseline, args.tolerance)
+
+    save_report(report, args.report)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+    print_report(report)
+
+    regressions = [name for name, compared in report.get("comparison", {}).items() if compared["regression"]]
+    if regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
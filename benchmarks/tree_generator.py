@@ -0,0 +1,157 @@
+import math
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+# Extensions given to generated files: the organizer's common categories,
+# plus one it has no rule for
+FILE_EXTENSIONS = [".txt", ".pdf", ".docx", ".jpg", ".png", ".mp3", ".mp4", ".zip", ".py", ".csv", ".dat"]
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Number of earlier files kept in memory for duplicates to copy from
+DUPLICATE_SOURCES = 256
+
+class TreeSpec:
+    """
+    Shape of a synthetic directory tree.
+
+    The same spec and seed always generate the same tree, so timings of
+    different runs and machines compare like with like.
+    """
+
+    def __init__(self, files: int = 2000, depth: int = 3, fanout: int = 4,
+                 median_size: int = 16 * 1024, max_size: int = 4 * 1024 * 1024,
+                 size_spread: float = 1.5, duplicate_ratio: float = 0.1,
+                 mean_age_days: float = 120.0, max_age_days: int = 1000, seed: int = 1):
+        """
+        Args:
+            files: Number of files
+            depth: Number of folder levels below the root
+            fanout: Number of subfolders in each folder above the deepest level
+            median_size: Median file size in bytes; sizes are log-normally distributed
+            max_size: Largest file size in bytes
+            size_spread: Standard deviation of the log of the file sizes (0 makes every file median_size)
+            duplicate_ratio: Fraction of files that are copies of another file (0 to 1)
+            mean_age_days: Mean number of days since a file was last accessed and
+                modified; ages are exponentially distributed, so most files are recent
+            max_age_days: Oldest a file can be, in days
+            seed: Seed of the random number generator
+        """
+        self.files = files
+        self.depth = depth
+        self.fanout = fanout
+        self.median_size = median_size
+        self.max_size = max_size
+        self.size_spread = size_spread
+        self.duplicate_ratio = duplicate_ratio
+        self.mean_age_days = mean_age_days
+        self.max_age_days = max_age_days
+        self.seed = seed
+
+    def to_dict(self) -> Dict:
+        """
+        Gets the spec as a dictionary, for reports.
+
+        Returns:
+            Dictionary of the spec's settings
+        """
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TreeSpec':
+        """
+        Creates a spec from a dictionary made by to_dict.
+
+        Args:
+            data: Dictionary of settings
+
+        Returns:
+            The spec
+        """
+        return cls(**data)
+
+def _directories(root: str, depth: int, fanout: int) -> List[str]:
+    """
+    Lists the folders of a tree with the given depth and fanout, root first.
+    """
+    directories = [root]
+    level = [root]
+    for i in range(depth):
+        level = [os.path.join(parent, f"dir{i}_{j}") for parent in level for j in range(fanout)]
+        directories.extend(level)
+    return directories
+
+def _file_size(rng: random.Random, spec: TreeSpec) -> int:
+    size = rng.lognormvariate(math.log(max(spec.median_size, 1)), spec.size_spread)
+    return min(int(size), spec.max_size)
+
+def _file_age(rng: random.Random, spec: TreeSpec) -> float:
+    if spec.mean_age_days <= 0:
+        return 0.0
+    return min(rng.expovariate(1 / spec.mean_age_days), spec.max_age_days)
+
+def generate_tree(root: str, spec: Optional[TreeSpec] = None, now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Fills a folder with a synthetic tree of files.
+
+    Files are spread at random over all folders of the tree. Each file has
+    random content, except for duplicates, which copy the content of an
+    earlier file (and so always share its size). Access and modification
+    times are set back by each file's age.
+
+    Args:
+        root: Folder to create the tree in; it is created if needed and should be empty
+        spec: Shape of the tree (if None, uses TreeSpec())
+        now: Time the ages count back from (if None, uses the current time)
+
+    Returns:
+        Dictionary with the number of files, folders, bytes, duplicate files,
+        and files older than 30, 90 and 365 days
+    """
+    if spec is None:
+        spec = TreeSpec()
+    if now is None:
+        now = time.time()
+    rng = random.Random(spec.seed)
+
+    directories = _directories(root, spec.depth, spec.fanout)
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+    summary = {"files": 0, "directories": len(directories) - 1, "bytes": 0, "duplicates": 0,
+               "older_than_30_days": 0, "older_than_90_days": 0, "older_than_365_days": 0}
+    originals = []
+
+    for i in range(spec.files):
+        directory = rng.choice(directories)
+        if originals and rng.random() < spec.duplicate_ratio:
+            source_ext, content = rng.choice(originals)
+            # Most copies keep their extension; some were renamed
+            ext = source_ext if rng.random() < 0.8 else rng.choice(FILE_EXTENSIONS)
+            summary["duplicates"] += 1
+        else:
+            ext = rng.choice(FILE_EXTENSIONS)
+            content = rng.randbytes(_file_size(rng, spec))
+            # Keep a bounded random sample of files to copy from
+            if len(originals) < DUPLICATE_SOURCES:
+                originals.append((ext, content))
+            else:
+                originals[rng.randrange(DUPLICATE_SOURCES)] = (ext, content)
+
+        path = os.path.join(directory, f"file{i:06d}{ext}")
+        with open(path, "wb") as f:
+            f.write(content)
+
+        age = _file_age(rng, spec)
+        timestamp = now - age * SECONDS_PER_DAY
+        os.utime(path, (timestamp, timestamp))
+
+        summary["files"] += 1
+        summary["bytes"] += len(content)
+        for days in (30, 90, 365):
+            if age > days:
+                summary[f"older_than_{days}_days"] += 1
+
+    return summary
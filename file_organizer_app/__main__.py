@@ -0,0 +1,9 @@
+"""
+Runs the command-line interface: python -m file_organizer_app COMMAND ...
+"""
+import sys
+
+from file_organizer_app.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
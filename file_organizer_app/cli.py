@@ -0,0 +1,605 @@
+"""
+Command-line interface for running File Organizer operations without a display.
+
+Usage:
+    python -m file_organizer_app [--format text|json|ndjson] [--workers N] [--progress] COMMAND ...
+
+Commands:
+    organize DIR        Organize files into folders (or --resume / --undo the last run)
+    dupes DIR           Find duplicate files
+    unused DIR          Find files not accessed in --days days
+    archive PATH...     Copy or compress files or a folder into an archive
+    restore SOURCE DEST Restore a folder from an incremental archive chain
+                        (or, with --store, files from the dedup store)
+    store [PATH...]     List the files in the dedup store
+    delete PATH...      Delete files and folders (or move them to the trash)
+    trash               List, restore or purge trashed items
+
+Results are written to standard output: readable lines with --format text,
+one JSON document at the end with --format json, or one JSON object per
+line as results are produced with --format ndjson (the last line is the
+summary). Progress and error messages go to standard error.
+
+Exit codes: 0 on success, 1 if the command completed with errors, 2 for
+invalid arguments, and 130 if it was interrupted with Ctrl+C.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import contextlib
+from typing import Dict, Iterable, List, Optional, TextIO
+
+# Only the modules a command needs are imported when it runs, so that
+# --help and quick queries start fast; the archive writer is cheap to import
+from file_organizer_app.utils.archive_writer import ARCHIVE_TYPES, COMPRESS_ALWAYS, COMPRESS_AUTO, COMPRESS_STORE
+
+# Archive modes of incremental_archive (FULL, INCREMENTAL and DIFFERENTIAL),
+# which imports the hashing modules
+ARCHIVE_MODES = ("full", "incremental", "differential")
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 0.5
+
+class Output:
+    """
+    Writes the results of a command in the selected format.
+
+    Records are written as they are produced in ndjson and text formats,
+    and collected into one document in json format. Progress lines go to
+    standard error so they never mix with the results.
+    """
+
+    def __init__(self, fmt: str, stream: TextIO, progress: bool):
+        """
+        Create an output.
+
+        Args:
+            fmt: 'text', 'json' or 'ndjson'
+            stream: Stream to write results to
+            progress: Whether to write progress lines to standard error
+        """
+        self.format = fmt
+        self.stream = stream
+        self.show_progress = progress
+        self.records = []
+        self.errors = []
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, data: Dict, text: Optional[str] = None) -> None:
+        """
+        Write one result.
+
+        Args:
+            data: The result as a JSON-serializable dictionary
+            text: How to show the result in text format (if None, the values are joined with tabs)
+        """
+        with self._lock:
+            if self.format == "json":
+                self.records.append(data)
+            elif self.format == "ndjson":
+                self.stream.write(json.dumps(data) + "\n")
+                self.stream.flush()
+            else:
+                self.stream.write((text if text is not None else "\t".join(str(v) for v in data.values())) + "\n")
+
+    def error(self, message: str) -> None:
+        """
+        Record an error; errors are listed in the summary and make the command exit with EXIT_ERRORS.
+
+        Args:
+            message: The error message
+        """
+        with self._lock:
+            self.errors.append(message)
+        if self.format == "text":
+            print(message, file=sys.stderr)
+
+    def progress(self, done: int, total: Optional[int] = None, label: str = "") -> None:
+        """
+        Report progress, at most every PROGRESS_INTERVAL seconds.
+
+        Args:
+            done: Number of items processed
+            total: Total number of items (if known)
+            label: What is being processed
+        """
+        if not self.show_progress:
+            return
+        # Always report the last item, so the final count is shown
+        now = time.monotonic()
+        if (total is None or done < total) and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        counts = f"{done}/{total}" if total is not None else str(done)
+        print(f"{label} {counts}".strip(), file=sys.stderr, flush=True)
+
+    def summary(self, data: Dict, text: Optional[str] = None) -> None:
+        """
+        Write the summary of the command, including its errors.
+
+        Args:
+            data: Summary values as a JSON-serializable dictionary
+            text: How to show the summary in text format (optional)
+        """
+        data = dict(data, errors=self.errors)
+        if self.format == "json":
+            json.dump(dict(data, results=self.records), self.stream, indent=2)
+            self.stream.write("\n")
+        elif self.format == "ndjson":
+            self.stream.write(json.dumps(dict(data, event="summary")) + "\n")
+        elif text:
+            print(text, file=sys.stderr)
+        self.stream.flush()
+
+def _add_errors(out: Output, errors: Iterable[str]) -> None:
+    for error in errors:
+        out.error(error)
+
+def cmd_organize(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Organize a directory, or resume or undo its last run."""
+    from file_organizer_app.utils.journal import (
+        INCOMPLETE, UNDONE, OrganizeJournal, list_runs, resume_run, run_plan, undo_run
+    )
+    from file_organizer_app.utils.move_planner import DEFAULT_MOVE_WORKERS, count_moves, execute_plan, plan_moves
+    from file_organizer_app.utils.rules import get_default_engine, load_rules
+    from file_organizer_app.utils.scanner import scan_files
+
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        out.error(f"Directory not found: {directory}")
+        out.summary({"command": "organize"})
+        return
+
+    def report_progress(processed, total):
+        out.progress(processed, total, "organize")
+
+    if args.undo or args.resume:
+        # Undo the newest run not undone yet, or resume the newest interrupted one
+        runs = [path for path, _, state in list_runs(dir_path=directory)
+                if (state != UNDONE if args.undo else state == INCOMPLETE)]
+        if not runs:
+            out.error(f"No organize run of {directory} to {'undo' if args.undo else 'resume'}")
+            out.summary({"command": "organize"})
+            return
+        if args.undo:
+            count, errors = undo_run(runs[0], cancel_event, report_progress)
+            _add_errors(out, errors)
+            out.summary({"command": "organize", "undone": count, "journal": runs[0]},
+                        f"Moved {count} files back.")
+            return
+        moved, errors = resume_run(runs[0], cancel_event, report_progress)
+        for move in moved:
+            out.record({"source": move.source, "dest": move.dest})
+        _add_errors(out, errors)
+        out.summary({"command": "organize", "moved": count_moves(moved), "journal": runs[0]},
+                    f"Moved {len(moved)} remaining files.")
+        return
+
+    engine = load_rules(args.rules) if args.rules else get_default_engine()
+    files = []
+    file_exts = []
+    for entry in scan_files(directory, skip_dir=engine.skip_dir(directory), cancel_event=cancel_event):
+        folder = engine.route(entry.path)
+        if folder is not None:
+            files.append((entry.path, folder))
+            file_exts.append(os.path.splitext(entry.name)[-1].lower())
+
+    plan = plan_moves(files, directory, file_exts)
+    if args.dry_run:
+        for move in plan.moves:
+            out.record({"source": move.source, "dest": move.dest})
+        out.summary({"command": "organize", "planned": len(plan.moves), "dry_run": True},
+                    f"Would move {len(plan.moves)} files.")
+        return
+
+    workers = args.workers or DEFAULT_MOVE_WORKERS
+    if args.no_journal:
+        moved, errors = execute_plan(plan, cancel_event, report_progress, workers)
+        journal_path = None
+    else:
+        journal = OrganizeJournal.create(directory, plan)
+        moved, errors = run_plan(journal, plan, cancel_event, report_progress, workers)
+        journal_path = journal.path
+
+    for move in moved:
+        out.record({"source": move.source, "dest": move.dest})
+    _add_errors(out, errors)
+    summary = {"command": "organize", "moved": count_moves(moved), "journal": journal_path}
+    if plan.stats is not None:
+        summary.update(files_per_second=round(plan.stats.files_per_second, 1), seconds=round(plan.stats.seconds, 3))
+    out.summary(summary, f"Moved {len(moved)} files" + (f" ({plan.stats})." if plan.stats else "."))
+
+def cmd_dupes(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Find duplicate files."""
+    from file_organizer_app.utils.catalog import Catalog
+    from file_organizer_app.utils.file_organizer import find_duplicate_files
+    from file_organizer_app.utils.hash_cache import HashCache
+
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        out.error(f"Directory not found: {directory}")
+        out.summary({"command": "dupes"})
+        return
+
+    def report_progress(processed, total):
+        out.progress(processed, total, "hash")
+
+    if args.catalog:
+        with Catalog() as catalog:
+            catalog.refresh(directory, full=args.full, cancel_event=cancel_event)
+            duplicates = catalog.duplicates(directory, args.workers, cancel_event)
+    else:
+        cache = None if args.no_cache else HashCache()
+        try:
+            duplicates = find_duplicate_files(directory, args.workers, args.processes, report_progress,
+                                              cache, cancel_event)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    wasted = 0
+    for duplicate, original in duplicates:
+        try:
+            size = os.path.getsize(duplicate)
+        except OSError:
+            size = None
+        wasted += size or 0
+        out.record({"duplicate": duplicate, "original": original, "size": size},
+                   f"{duplicate}\t{original}")
+    out.summary({"command": "dupes", "duplicates": len(duplicates), "wasted_bytes": wasted},
+                f"Found {len(duplicates)} duplicates ({wasted} bytes).")
+
+def cmd_unused(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Find files that haven't been accessed in a number of days."""
+    from file_organizer_app.utils.catalog import Catalog
+    from file_organizer_app.utils.file_metadata import iter_unused_files
+
+    directory = os.path.abspath(args.directory)
+    if not os.path.isdir(directory):
+        out.error(f"Directory not found: {directory}")
+        out.summary({"command": "unused"})
+        return
+
+    if args.catalog:
+        with Catalog() as catalog:
+            catalog.refresh(directory, full=args.full, cancel_event=cancel_event)
+            records = catalog.unused_files(directory, args.days)
+    else:
+        records = iter_unused_files(directory, args.days, cancel_event)
+
+    count = 0
+    total_size = 0
+    for record in records:
+        count += 1
+        total_size += record.size
+        out.record({"path": record.path, "size": record.size, "accessed": record.atime,
+                    "modified": record.mtime}, record.path)
+        out.progress(count, label="unused")
+    out.summary({"command": "unused", "files": count, "bytes": total_size},
+                f"Found {count} unused files ({total_size} bytes).")
+
+def cmd_archive(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Archive files or a folder."""
+    from file_organizer_app.utils.chunk_store import dedup_archive_files
+    from file_organizer_app.utils.copy_engine import CopyStats
+    from file_organizer_app.utils.file_operations import (
+        archive_files, archive_folder, create_compressed_archive, create_folder_archive
+    )
+    from file_organizer_app.utils.incremental_archive import create_incremental_archive, load_manifest
+    from file_organizer_app.utils.scanner import scan_files
+
+    paths = [os.path.abspath(path) for path in args.paths]
+    folder = paths[0] if len(paths) == 1 and os.path.isdir(paths[0]) else None
+    compression = args.compression
+
+    if args.mode:
+        if folder is None or args.type in ("copy", "dedup"):
+            out.error("Archives with a manifest need one folder and an archive type")
+            out.summary({"command": "archive"})
+            return
+        manifest_path, error = create_incremental_archive(folder, args.dest, args.type, args.mode, cancel_event,
+                                                          args.workers, compression)
+        if error:
+            out.error(error)
+        manifest = load_manifest(manifest_path) if manifest_path else {}
+        out.summary({"command": "archive", "manifest": manifest_path, "archive": manifest.get("archive")},
+                    f"Wrote {manifest_path}." if manifest_path else None)
+        return
+
+    if args.type == "copy":
+        stats = CopyStats()
+        if folder:
+            success, error = archive_folder(folder, args.dest, cancel_event, args.workers, stats)
+            if not success:
+                out.error(error)
+        else:
+            _, errors = archive_files(paths, args.dest, cancel_event, args.workers, stats)
+            _add_errors(out, errors)
+        out.summary({"command": "archive", "files": stats.files, "bytes": stats.bytes,
+                     "seconds": round(stats.seconds, 3), "methods": stats.methods}, f"Copied {stats}.")
+        return
+
+    if args.type == "dedup":
+        if folder:
+            files = [entry.path for entry in scan_files(folder, cancel_event=cancel_event)]
+        else:
+            files = paths
+        count, errors = dedup_archive_files(files, cancel_event=cancel_event)
+        _add_errors(out, errors)
+        out.summary({"command": "archive", "files": count}, f"Stored {count} files.")
+        return
+
+    if folder:
+        success, error = create_folder_archive(folder, args.output, args.type, cancel_event, args.workers,
+                                               compression)
+    else:
+        success, error = create_compressed_archive(paths, args.output, args.type, cancel_event, args.workers,
+                                                   compression)
+    if not success:
+        out.error(error)
+    out.summary({"command": "archive", "success": success}, "Archive created." if success else None)
+
+def cmd_restore(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Restore a folder from an archive manifest, or files from the dedup store."""
+    if args.store:
+        from file_organizer_app.utils.chunk_store import dedup_restore_files
+        count, errors = dedup_restore_files(args.source, args.dest, cancel_event=cancel_event)
+    else:
+        from file_organizer_app.utils.incremental_archive import restore_archive
+        if len(args.source) != 1:
+            out.error("Restoring from a manifest takes exactly one manifest")
+            out.summary({"command": "restore"})
+            return
+        count, errors = restore_archive(args.source[0], args.dest, cancel_event)
+    _add_errors(out, errors)
+    out.summary({"command": "restore", "files": count}, f"Restored {count} files.")
+
+def cmd_store(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """List the file versions in the dedup store."""
+    from file_organizer_app.utils.chunk_store import ChunkStore
+
+    prefixes = [os.path.abspath(path) for path in args.paths]
+    count = 0
+    with ChunkStore() as store:
+        for file_id, path, size, mtime_ns, archived_ns in store.list_files():
+            if prefixes and not any(path == prefix or path.startswith(os.path.join(prefix, ""))
+                                    for prefix in prefixes):
+                continue
+            count += 1
+            archived = archived_ns / 1e9
+            out.record({"id": file_id, "path": path, "size": size, "modified": mtime_ns / 1e9,
+                        "archived": archived},
+                       f"{file_id}\t{time.strftime('%Y-%m-%d %H:%M', time.localtime(archived))}\t{size}\t{path}")
+    out.summary({"command": "store", "files": count})
+
+def _read_paths(args: argparse.Namespace) -> List[str]:
+    paths = list(args.paths)
+    if args.stdin:
+        for line in sys.stdin:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            # Accept the NDJSON output of the unused and dupes commands as well as plain paths
+            if line.startswith("{"):
+                data = json.loads(line)
+                line = data.get("path") or data.get("duplicate")
+                if not line:
+                    continue
+            paths.append(line)
+    return paths
+
+def cmd_delete(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """Delete files and folders."""
+    from file_organizer_app.utils.bulk_delete import DeleteStats
+    from file_organizer_app.utils.file_operations import delete_files, delete_folder
+
+    paths = _read_paths(args)
+    folders = [path for path in paths if os.path.isdir(path) and not os.path.islink(path)]
+    files = [path for path in paths if not (os.path.isdir(path) and not os.path.islink(path))]
+
+    stats = DeleteStats()
+
+    def report_progress(current):
+        out.progress(current.files, label="delete")
+
+    count = 0
+    if files:
+        count, errors = delete_files(files, cancel_event, args.workers, report_progress, stats, args.trash)
+        _add_errors(out, errors)
+    for folder in folders:
+        if cancel_event.is_set():
+            break
+        success, error = delete_folder(folder, cancel_event, args.workers, report_progress, stats, args.trash)
+        if success:
+            count += 1
+        else:
+            out.error(error)
+
+    summary = {"command": "delete", "deleted": count, "trash": args.trash}
+    if not args.trash:
+        summary.update(files=stats.files, folders=stats.directories, seconds=round(stats.seconds, 3),
+                       files_per_second=round(stats.files_per_second, 1))
+    text = f"Moved {count} items to the trash." if args.trash else f"Deleted {count} items ({stats})."
+    out.summary(summary, text)
+
+def cmd_trash(args: argparse.Namespace, out: Output, cancel_event: threading.Event) -> None:
+    """List, restore or purge trashed items."""
+    from file_organizer_app.utils.trash import list_trash, purge_expired, purge_items, restore_items
+
+    if args.action == "purge":
+        count, errors = purge_expired(args.days, cancel_event, args.rate)
+        _add_errors(out, errors)
+        out.summary({"command": "trash", "purged": count}, f"Purged {count} items.")
+        return
+
+    items = list_trash()
+    if args.action == "restore":
+        wanted = {os.path.abspath(path) for path in args.paths}
+        # Restore the newest trashed copy of each path
+        chosen = {}
+        for item in items:
+            if item.original_path in wanted and item.original_path not in chosen:
+                chosen[item.original_path] = item
+        for path in wanted - set(chosen):
+            out.error(f"Not in the trash: {path}")
+        count, errors = restore_items(chosen.values(), cancel_event)
+        _add_errors(out, errors)
+        out.summary({"command": "trash", "restored": count}, f"Restored {count} items.")
+        return
+
+    if args.action == "empty":
+        count, errors = purge_items(items, cancel_event)
+        _add_errors(out, errors)
+        out.summary({"command": "trash", "purged": count}, f"Purged {count} items.")
+        return
+
+    for item in items:
+        out.record({"path": item.original_path, "deleted_at": item.deleted_at, "is_dir": item.is_dir,
+                    "size": item.size, "trash_path": item.path},
+                   f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(item.deleted_at))}\t{item.original_path}")
+    out.summary({"command": "trash", "items": len(items)})
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser of the command-line interface.
+
+    Returns:
+        The parser
+    """
+    parser = argparse.ArgumentParser(prog="file_organizer_app",
+                                     description="Organize, deduplicate, archive and clean up files.")
+    parser.add_argument("--format", choices=("text", "json", "ndjson"), default="text",
+                        help="output format (default: text)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker threads (default: chosen from the core count)")
+    parser.add_argument("--progress", action="store_true", help="report progress on standard error")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    organize = commands.add_parser("organize", help="organize files into folders by type")
+    organize.add_argument("directory")
+    organize.add_argument("--rules", help="JSON rules file (default: ~/.file_organizer/rules.json if present)")
+    organize.add_argument("--dry-run", action="store_true", help="list the planned moves without moving")
+    organize.add_argument("--no-journal", action="store_true", help="don't journal the run (it can't be undone)")
+    organize_run = organize.add_mutually_exclusive_group()
+    organize_run.add_argument("--resume", action="store_true", help="finish the last interrupted run")
+    organize_run.add_argument("--undo", action="store_true", help="move the files of the last run back")
+    organize.set_defaults(func=cmd_organize)
+
+    dupes = commands.add_parser("dupes", help="find duplicate files")
+    dupes.add_argument("directory")
+    dupes.add_argument("--processes", action="store_true", help="hash in worker processes instead of threads")
+    dupes.add_argument("--no-cache", action="store_true", help="don't use the on-disk hash cache")
+    dupes.add_argument("--catalog", action="store_true",
+                       help="refresh and query the file catalog; the refresh only lists folders that "
+                            "changed, so files edited in place since the last refresh can be missed")
+    dupes.add_argument("--full", action="store_true", help="with --catalog, list every folder on refresh")
+    dupes.set_defaults(func=cmd_dupes)
+
+    unused = commands.add_parser("unused", help="find files that haven't been accessed recently")
+    unused.add_argument("directory")
+    unused.add_argument("--days", type=int, default=90, help="days without access (default: 90)")
+    unused.add_argument("--catalog", action="store_true",
+                        help="refresh and query the file catalog; the refresh only lists folders that "
+                             "changed, so files edited in place since the last refresh can be missed")
+    unused.add_argument("--full", action="store_true", help="with --catalog, list every folder on refresh")
+    unused.set_defaults(func=cmd_unused)
+
+    archive = commands.add_parser("archive", help="copy or compress files or a folder")
+    archive.add_argument("paths", nargs="+", metavar="PATH", help="files, or a single folder")
+    archive.add_argument("--type", choices=("copy",) + ARCHIVE_TYPES + ("dedup",), default="zip",
+                         help="archive type (default: zip)")
+    archive.add_argument("--output", help="archive path (default: next to the files, with a timestamp)")
+    archive.add_argument("--dest", help="directory for copies or incremental archives")
+    archive.add_argument("--compression", choices=(COMPRESS_AUTO, COMPRESS_ALWAYS, COMPRESS_STORE),
+                         default=COMPRESS_AUTO, help="'auto' stores already compressed files (default)")
+    archive.add_argument("--mode", choices=ARCHIVE_MODES, default=None,
+                         help="write a manifest, and with incremental or differential only store what "
+                              "changed since the last (or last full) archive of the folder")
+    archive.set_defaults(func=cmd_archive)
+
+    restore = commands.add_parser("restore", help="restore a folder from an archive manifest, "
+                                                  "or files from the dedup store")
+    restore.add_argument("source", nargs="+", metavar="SOURCE",
+                         help="manifest, or with --store a version id or the original path of a file or folder")
+    restore.add_argument("dest", help="directory to restore into")
+    restore.add_argument("--store", action="store_true",
+                         help="restore from the dedup store (the newest version of each file, unless an id is given)")
+    restore.set_defaults(func=cmd_restore)
+
+    store = commands.add_parser("store", help="list the files in the dedup store")
+    store.add_argument("paths", nargs="*", metavar="PATH", help="only list files archived from below these paths")
+    store.set_defaults(func=cmd_store)
+
+    delete = commands.add_parser("delete", help="delete files and folders")
+    delete.add_argument("paths", nargs="*", metavar="PATH")
+    delete.add_argument("--stdin", action="store_true",
+                        help="also read paths (or unused/dupes NDJSON output) from standard input")
+    delete.add_argument("--trash", action="store_true", help="move to the trash instead of deleting")
+    delete.set_defaults(func=cmd_delete)
+
+    trash = commands.add_parser("trash", help="list, restore or purge trashed items")
+    trash.add_argument("action", choices=("list", "restore", "purge", "empty"), nargs="?", default="list")
+    trash.add_argument("paths", nargs="*", metavar="PATH", help="original paths to restore")
+    trash.add_argument("--days", type=float, default=30, help="retention for purge (default: 30)")
+    trash.add_argument("--rate", type=float, default=None, help="maximum files deleted per second by purge")
+    trash.set_defaults(func=cmd_trash)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the command-line interface.
+
+    Args:
+        argv: Command-line arguments (if None, uses sys.argv)
+
+    Returns:
+        The exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    out = Output(args.format, sys.stdout, args.progress)
+    cancel_event = threading.Event()
+
+    # The first Ctrl+C cancels the operation cleanly, a second one aborts
+    def interrupt(signum, frame):
+        if cancel_event.is_set():
+            raise KeyboardInterrupt
+        print("Cancelling...", file=sys.stderr)
+        cancel_event.set()
+
+    previous_handler = None
+    if threading.current_thread() is threading.main_thread():
+        previous_handler = signal.signal(signal.SIGINT, interrupt)
+    try:
+        # The utils report some problems with print(); keep them out of the results
+        with contextlib.redirect_stdout(sys.stderr):
+            args.func(args, out, cancel_event)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except BrokenPipeError:
+        # The reader of the output (e.g. head) exited; stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_ERRORS
+    finally:
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+
+    if cancel_event.is_set():
+        return EXIT_INTERRUPTED
+    return EXIT_ERRORS if out.errors else EXIT_OK
@@ -1,22 +1,54 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import threading
+import datetime
 
+from file_organizer_app.utils.archive_writer import COMPRESS_ALWAYS, COMPRESS_AUTO
+from file_organizer_app.utils.bulk_delete import DeleteStats
+from file_organizer_app.utils.chunk_store import DEFAULT_STORE_DIR, ChunkStore, dedup_archive_files, dedup_restore_files
 from file_organizer_app.utils.file_operations import (
     archive_files, archive_folder, delete_files, delete_folder,
     create_compressed_archive, create_folder_archive
 )
+from file_organizer_app.utils.file_record import FileRecord, FileRecordStore
+from file_organizer_app.utils.incremental_archive import (
+    MANIFEST_SUFFIX, create_incremental_archive, load_manifest, restore_archive
+)
+from file_organizer_app.utils.jobs import JobManager
+from file_organizer_app.utils.scanner import scan_files
+from file_organizer_app.utils.trash import HOME_TRASH_DIR, list_trash, purge_items, restore_items
+from file_organizer_app.gui.progress import ProgressChannel
+from file_organizer_app.gui.virtual_tree import VirtualTreeview
+
+# File view column -> FileRecordStore column used to sort it
+SORT_COLUMNS = {
+    "Name": "name",
+    "Path": "path",
+    "Type": "extension",
+    "Size": "size",
+}
 
 class ArchiveTab:
-    def __init__(self, parent):
+    def __init__(self, parent, progress=None, jobs=None):
         """
         Initialize the Archive & Delete tab.
 
         Args:
             parent: The parent notebook widget
+            progress: ProgressChannel shared with the other tabs (if None, the tab creates its own)
+            jobs: JobManager shared with the other tabs (if None, the tab creates its own)
         """
         self.frame = ttk.Frame(parent)
+        # Channel that applies UI updates from worker threads at a fixed frame rate
+        self.progress = progress if progress else ProgressChannel(self.frame)
+        # Background jobs run by this tab, so the Cancel button can stop them
+        self.jobs = jobs if jobs else JobManager()
+        self.tab_jobs = []
+        # Files loaded from the source directory, and their rows in display order
+        self.loaded_files = FileRecordStore()
+        self.shown_rows = []
+        self.sort_column = None
+        self.sort_reverse = False
         self.create_widgets()
 
     def create_widgets(self):
@@ -32,6 +64,11 @@ class ArchiveTab:
         source_browse_btn = ttk.Button(source_frame, text="Browse", command=self.browse_source)
         source_browse_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # List the files from the file catalog, which only lists folders that changed since its last refresh
+        self.use_catalog_var = tk.BooleanVar(value=False)
+        use_catalog_check = ttk.Checkbutton(source_frame, text="Use catalog", variable=self.use_catalog_var)
+        use_catalog_check.pack(side=tk.LEFT, padx=5, pady=5)
+
         # Archive options frame
         options_frame = ttk.LabelFrame(self.frame, text="Archive Options")
         options_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -49,18 +86,48 @@ class ArchiveTab:
         compression_targz = ttk.Radiobutton(options_frame, text="TAR.GZ", variable=self.compression_var, value="tar.gz")
         compression_targz.pack(side=tk.LEFT, padx=5, pady=5)
 
+        compression_tarxz = ttk.Radiobutton(options_frame, text="TAR.XZ", variable=self.compression_var, value="tar.xz")
+        compression_tarxz.pack(side=tk.LEFT, padx=5, pady=5)
+
+        compression_tarzst = ttk.Radiobutton(options_frame, text="TAR.ZST", variable=self.compression_var, value="tar.zst")
+        compression_tarzst.pack(side=tk.LEFT, padx=5, pady=5)
+
+        compression_tar = ttk.Radiobutton(options_frame, text="TAR (store)", variable=self.compression_var, value="tar")
+        compression_tar.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Deduplicating store: only chunks not archived before are written
+        compression_dedup = ttk.Radiobutton(options_frame, text="Dedup Store", variable=self.compression_var, value="dedup")
+        compression_dedup.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Store images, video and archives as they are instead of compressing them again
+        self.store_compressed_var = tk.BooleanVar(value=True)
+        store_compressed_check = ttk.Checkbutton(options_frame, text="Don't recompress media",
+                                                 variable=self.store_compressed_var)
+        store_compressed_check.pack(side=tk.LEFT, padx=20, pady=5)
+
         # Keep structure option
         self.keep_structure_var = tk.BooleanVar(value=True)
         keep_structure_check = ttk.Checkbutton(options_frame, text="Keep folder structure", variable=self.keep_structure_var)
         keep_structure_check.pack(side=tk.LEFT, padx=20, pady=5)
 
+        # Only store what changed since the folder's last archive
+        self.incremental_var = tk.BooleanVar(value=False)
+        incremental_check = ttk.Checkbutton(options_frame, text="Incremental", variable=self.incremental_var)
+        incremental_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Deleting moves to the trash, where files can be restored until they expire
+        self.use_trash_var = tk.BooleanVar(value=True)
+        use_trash_check = ttk.Checkbutton(options_frame, text="Delete to trash", variable=self.use_trash_var)
+        use_trash_check.pack(side=tk.LEFT, padx=5, pady=5)
+
         # File selection
         file_frame = ttk.LabelFrame(self.frame, text="File Selection")
         file_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Create a treeview for file selection
+        # Create a virtualized treeview for file selection; only the visible rows are materialized
         columns = ("Name", "Path", "Type", "Size")
-        self.file_tree = ttk.Treeview(file_frame, columns=columns, show="headings", selectmode="extended")
+        self.file_view = VirtualTreeview(file_frame, columns=columns, selectmode="extended")
+        self.file_tree = self.file_view.tree
 
         # Configure columns
         self.file_tree.heading("Name", text="Name")
@@ -73,15 +140,9 @@ class ArchiveTab:
         self.file_tree.column("Type", width=50)
         self.file_tree.column("Size", width=80)
 
-        # Add scrollbars
-        y_scrollbar = ttk.Scrollbar(file_frame, orient=tk.VERTICAL, command=self.file_tree.yview)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        x_scrollbar = ttk.Scrollbar(file_frame, orient=tk.HORIZONTAL, command=self.file_tree.xview)
-        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-
-        self.file_tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-        self.file_tree.pack(fill=tk.BOTH, expand=True)
+        # Sort by a column when its heading is clicked
+        self.file_view.bind_sort(self.sort_files)
+        self.file_view.pack(fill=tk.BOTH, expand=True)
 
         # Buttons frame
         buttons_frame = ttk.Frame(self.frame)
@@ -99,6 +160,10 @@ class ArchiveTab:
         archive_folder_btn = ttk.Button(buttons_frame, text="Archive Entire Folder", command=self.archive_entire_folder)
         archive_folder_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Create a button to restore a folder from its archives and add it to the buttons_frame
+        restore_btn = ttk.Button(buttons_frame, text="Restore Archive", command=self.restore_folder_archive)
+        restore_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
        # Create a button to delete only the selected files and add it to the buttons_frame
         delete_files_btn = ttk.Button(buttons_frame, text="Delete Selected Files", command=self.delete_selected_files)
         delete_files_btn.pack(side=tk.LEFT, padx=5, pady=5)
@@ -107,6 +172,18 @@ class ArchiveTab:
         delete_folder_btn = ttk.Button(buttons_frame, text="Delete Entire Folder", command=self.delete_entire_folder)
         delete_folder_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Create a button to restore or purge trashed files and add it to the buttons_frame
+        trash_btn = ttk.Button(buttons_frame, text="Trash...", command=self.open_trash)
+        trash_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Create a button to restore files from the dedup store and add it to the buttons_frame
+        store_btn = ttk.Button(buttons_frame, text="Dedup Store...", command=self.open_store)
+        store_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # Create a button to cancel the running operations and add it to the buttons_frame
+        cancel_btn = ttk.Button(buttons_frame, text="Cancel", command=self.cancel_jobs)
+        cancel_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
         # Status label
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -119,6 +196,29 @@ class ArchiveTab:
         if directory:
             self.source_var.set(directory)
 
+    def run_job(self, name, func, key):
+        """
+        Run a function as a background job.
+
+        Args:
+            name: Description of the job
+            func: Function to run, called with the job's cancel event
+            key: Directory the job works on; jobs on the same directory run one at a time
+        """
+        self.tab_jobs = [job for job in self.tab_jobs if not job.finished]
+        self.tab_jobs.append(self.jobs.submit(name, func, key))
+
+    def cancel_jobs(self):
+        """Cancel the running and queued jobs of this tab."""
+        active = [job for job in self.tab_jobs if not job.finished]
+        if not active:
+            self.status_var.set("Nothing to cancel.")
+            return
+
+        for job in active:
+            job.cancel()
+        self.status_var.set("Cancelling...")
+
     def load_files(self):
         """Load files from the source directory into the treeview."""
         source_dir = self.source_var.get()
@@ -131,59 +231,112 @@ class ArchiveTab:
             return
 
         # Clear previous results
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
+        self.loaded_files = FileRecordStore()
+        self.shown_rows = []
+        self.file_view.set_rows(0, self.get_file_row)
 
         self.status_var.set("Loading files...")
+        use_catalog = self.use_catalog_var.get()
 
         # Run the file loading in a separate thread
-        def load_thread():
+        def load_thread(cancel_event):
             try:
-                files = []
-                for root, _, filenames in os.walk(source_dir):
-                    for filename in filenames:
-                        file_path = os.path.join(root, filename)
-                        file_type = os.path.splitext(filename)[1].lower()
-                        file_size = os.path.getsize(file_path) / 1024  # Size in KB
-                        files.append((filename, file_path, file_type, file_size))
+                if use_catalog:
+                    from file_organizer_app.utils.catalog import get_default_catalog
+                    catalog = get_default_catalog()
+                    catalog.refresh(source_dir, cancel_event=cancel_event)
+                    files = catalog.list_files(source_dir)
+                else:
+                    files = FileRecordStore()
+                    for entry in scan_files(source_dir, cancel_event=cancel_event):
+                        files.append(FileRecord.from_stats(entry.path, entry.stat()))
+
+                if cancel_event.is_set():
+                    self.progress.set(self.status_var, "Loading cancelled.")
+                    return
 
                 # Update the UI in the main thread
-                self.frame.after(0, lambda: self.update_file_tree(files))
+                self.progress.call(self.update_file_tree, files)
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error loading files."))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error loading files.")
 
-        threading.Thread(target=load_thread).start()
+        self.run_job("Load files", load_thread, source_dir)
 
     def update_file_tree(self, files):
         """
         Update the file treeview.
 
         Args:
-            files: List of tuples containing file information
+            files: FileRecordStore containing the loaded files
         """
-        for name, path, file_type, size in files:
-            self.file_tree.insert("", tk.END, values=(name, path, file_type, round(size, 2)))
+        self.loaded_files = files
+        self.shown_rows = list(range(len(files)))
+        self.sort_column = None
+        self.file_view.set_rows(len(self.shown_rows), self.get_file_row)
 
         self.status_var.set(f"Loaded {len(files)} files.")
 
+    def get_file_row(self, index):
+        """
+        Get the column values of a row in the file view.
+
+        Args:
+            index: Row index in the file view
+
+        Returns:
+            Tuple of formatted column values
+        """
+        record = self.loaded_files[self.shown_rows[index]]
+        # Size in KB
+        return (record.name, record.path, record.extension, round(record.size / 1024, 2))
+
+    def sort_files(self, column):
+        """
+        Sort the file view by a column, reversing the order on a repeated click.
+
+        Args:
+            column: Identifier of the clicked column
+        """
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+
+        self.shown_rows = self.loaded_files.sort_indexes(
+            SORT_COLUMNS[column], self.shown_rows, self.sort_reverse)
+        self.file_view.set_rows(len(self.shown_rows))
+
+    def selected_paths(self):
+        """
+        Get the paths of the selected files.
+
+        Returns:
+            List of file paths
+        """
+        return [self.loaded_files.paths[self.shown_rows[index]]
+                for index in self.file_view.selected_rows()]
+
     def archive_selected_files(self):
         """Archive the selected files."""
-        selected = self.file_tree.selection()
-        if not selected:
+        # Get the paths of selected files
+        file_paths = self.selected_paths()
+        if not file_paths:
             messagebox.showinfo("Info", "No files selected.")
             return
 
-        # Get the paths of selected files
-        file_paths = [self.file_tree.item(item, "values")[1] for item in selected]
-
         # Get compression type
         compression_type = self.compression_var.get()
+        compression = COMPRESS_AUTO if self.store_compressed_var.get() else COMPRESS_ALWAYS
 
         # Determine archive method and message
         if compression_type == "none":
             archive_method = "copy"
             confirm_msg = f"Archive {len(file_paths)} files in their original locations?"
+        elif compression_type == "dedup":
+            archive_method = "dedup store"
+            confirm_msg = f"Archive {len(file_paths)} files into the deduplicating store?"
         else:
             archive_method = f"compress ({compression_type})"
             confirm_msg = f"Create {compression_type} archive of {len(file_paths)} files in their original locations?"
@@ -195,29 +348,34 @@ class ArchiveTab:
         self.status_var.set(f"Archiving files ({archive_method})...")
 
         # Run the archive operation in a separate thread
-        def archive_thread():
+        def archive_thread(cancel_event):
             try:
-                if compression_type == "none":
-                    success_count, errors = archive_files(file_paths)
+                if compression_type in ("none", "dedup"):
+                    if compression_type == "dedup":
+                        success_count, errors = dedup_archive_files(file_paths, cancel_event=cancel_event)
+                    else:
+                        success_count, errors = archive_files(file_paths, cancel_event=cancel_event)
 
                     # Update the UI in the main thread
-                    self.frame.after(0, lambda: self.archive_complete(success_count, errors))
+                    self.progress.call(self.archive_complete, success_count, errors)
                 else:
                     # Create compressed archive
-                    success, error = create_compressed_archive(file_paths, archive_type=compression_type)
+                    success, error = create_compressed_archive(file_paths, archive_type=compression_type,
+                                                               cancel_event=cancel_event,
+                                                               compression=compression)
 
                     # Update the UI in the main thread
                     if success:
-                        self.frame.after(0, lambda: self.status_var.set(f"Files archived successfully as {compression_type}."))
-                        self.frame.after(0, lambda: messagebox.showinfo("Success", f"Files archived successfully as {compression_type}."))
+                        self.progress.set(self.status_var, f"Files archived successfully as {compression_type}.")
+                        self.progress.call(messagebox.showinfo, "Success", f"Files archived successfully as {compression_type}.")
                     else:
-                        self.frame.after(0, lambda: self.status_var.set(f"Error: {error}"))
-                        self.frame.after(0, lambda: messagebox.showerror("Error", f"Failed to archive files: {error}"))
+                        self.progress.set(self.status_var, f"Error: {error}")
+                        self.progress.call(messagebox.showerror, "Error", f"Failed to archive files: {error}")
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error archiving files."))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error archiving files.")
 
-        threading.Thread(target=archive_thread).start()
+        self.run_job("Archive selected files", archive_thread, self.source_var.get())
 
     def archive_complete(self, success_count, errors):
         """
@@ -251,11 +409,21 @@ class ArchiveTab:
 
         # Get compression type
         compression_type = self.compression_var.get()
+        compression = COMPRESS_AUTO if self.store_compressed_var.get() else COMPRESS_ALWAYS
+
+        incremental = self.incremental_var.get() and compression_type not in ("none", "dedup")
 
         # Determine archive method and message
         if compression_type == "none":
             archive_method = "copy"
             confirm_msg = f"Archive the entire folder {source_dir} in its parent directory?"
+        elif compression_type == "dedup":
+            archive_method = "dedup store"
+            confirm_msg = f"Archive the entire folder {source_dir} into the deduplicating store?"
+        elif incremental:
+            archive_method = f"incremental {compression_type}"
+            confirm_msg = (f"Create an incremental {compression_type} archive of the changes in {source_dir} "
+                           f"since its last archive?")
         else:
             archive_method = f"compress ({compression_type})"
             confirm_msg = f"Create {compression_type} archive of folder {source_dir} in its parent directory?"
@@ -267,63 +435,140 @@ class ArchiveTab:
         self.status_var.set(f"Archiving folder ({archive_method})...")
 
         # Run the archive operation in a separate thread
-        def archive_thread():
+        def archive_thread(cancel_event):
             try:
+                if incremental:
+                    manifest_path, error = create_incremental_archive(source_dir, archive_type=compression_type,
+                                                                      cancel_event=cancel_event,
+                                                                      compression=compression)
+                    if manifest_path:
+                        manifest = load_manifest(manifest_path)
+                        message = (f"Folder archived ({manifest['mode']}): {len(manifest['stored'])} files stored, "
+                                   f"{len(manifest['deleted'])} deletions recorded.")
+                        self.progress.set(self.status_var, message)
+                        self.progress.call(messagebox.showinfo, "Success", message)
+                    else:
+                        self.progress.set(self.status_var, f"Error: {error}")
+                        self.progress.call(messagebox.showerror, "Error", f"Failed to archive folder: {error}")
+                    return
+
+                if compression_type == "dedup":
+                    file_paths = [entry.path for entry in scan_files(source_dir, cancel_event=cancel_event)]
+                    success_count, errors = dedup_archive_files(file_paths, cancel_event=cancel_event)
+                    self.progress.call(self.archive_complete, success_count, errors)
+                    return
+
                 if compression_type == "none":
-                    success, error = archive_folder(source_dir)
+                    success, error = archive_folder(source_dir, cancel_event=cancel_event)
                 else:
                     # Create compressed archive
-                    success, error = create_folder_archive(source_dir, archive_type=compression_type)
+                    success, error = create_folder_archive(source_dir, archive_type=compression_type,
+                                                           cancel_event=cancel_event,
+                                                           compression=compression)
 
                 # Update the UI in the main thread
                 if success:
-                    self.frame.after(0, lambda: self.status_var.set(f"Folder archived successfully{' as ' + compression_type if compression_type != 'none' else ''}."))
-                    self.frame.after(0, lambda: messagebox.showinfo("Success", f"Folder archived successfully{' as ' + compression_type if compression_type != 'none' else ''}."))
+                    self.progress.set(self.status_var, f"Folder archived successfully{' as ' + compression_type if compression_type != 'none' else ''}.")
+                    self.progress.call(messagebox.showinfo, "Success", f"Folder archived successfully{' as ' + compression_type if compression_type != 'none' else ''}.")
                 else:
-                    self.frame.after(0, lambda: self.status_var.set(f"Error: {error}"))
-                    self.frame.after(0, lambda: messagebox.showerror("Error", f"Failed to archive folder: {error}"))
+                    self.progress.set(self.status_var, f"Error: {error}")
+                    self.progress.call(messagebox.showerror, "Error", f"Failed to archive folder: {error}")
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error archiving folder."))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error archiving folder.")
 
-        threading.Thread(target=archive_thread).start()
+        self.run_job("Archive folder", archive_thread, source_dir)
+
+    def restore_folder_archive(self):
+        """Restore a folder from an archive manifest and the archives before it."""
+        manifest_path = filedialog.askopenfilename(title="Select Archive Manifest",
+                                                   filetypes=[("Archive manifests", "*" + MANIFEST_SUFFIX)])
+        if not manifest_path:
+            return
+
+        dest_dir = filedialog.askdirectory(title="Select Restore Location")
+        if not dest_dir:
+            return
+
+        self.status_var.set("Restoring archive...")
+
+        def restore_thread(cancel_event):
+            try:
+                restored, errors = restore_archive(manifest_path, dest_dir, cancel_event)
+                self.progress.call(self.restore_complete, restored, errors, cancel_event.is_set())
+            except Exception as e:
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error restoring archive.")
+
+        self.run_job("Restore archive", restore_thread, dest_dir)
+
+    def restore_complete(self, restored, errors, cancelled=False):
+        """
+        Handle completion of a restore.
+
+        Args:
+            restored: Number of restored files
+            errors: List of error messages
+            cancelled: Whether the restore was cancelled before it finished
+        """
+        if errors:
+            error_msg = "\n".join(errors[:10])
+            if len(errors) > 10:
+                error_msg += f"\n... and {len(errors) - 10} more errors."
+            messagebox.showwarning("Warning", f"Completed with errors:\n{error_msg}")
+
+        if cancelled:
+            self.status_var.set(f"Restore cancelled. Restored {restored} files.")
+        else:
+            self.status_var.set(f"Restored {restored} files.")
 
     def delete_selected_files(self):
         """Delete the selected files."""
-        selected = self.file_tree.selection()
-        if not selected:
+        # Get the paths of selected files
+        file_paths = self.selected_paths()
+        if not file_paths:
             messagebox.showinfo("Info", "No files selected.")
             return
 
-        # Get the paths of selected files
-        file_paths = [self.file_tree.item(item, "values")[1] for item in selected]
-
         # Confirm the operation
-        if not messagebox.askyesno("Confirm", f"Delete {len(file_paths)} files? This cannot be undone!"):
+        use_trash = self.use_trash_var.get()
+        if use_trash:
+            question = f"Move {len(file_paths)} files to the trash?"
+        else:
+            question = f"Delete {len(file_paths)} files? This cannot be undone!"
+        if not messagebox.askyesno("Confirm", question):
             return
 
         self.status_var.set("Deleting files...")
 
         # Run the delete operation in a separate thread
-        def delete_thread():
+        def delete_thread(cancel_event):
             try:
-                success_count, errors = delete_files(file_paths)
+                def report_progress(stats):
+                    self.progress.set(self.status_var, f"Deleting files... {stats}")
+
+                stats = DeleteStats()
+                success_count, errors = delete_files(file_paths, cancel_event=cancel_event,
+                                                     progress_callback=report_progress, stats=stats,
+                                                     use_trash=use_trash)
 
                 # Update the UI in the main thread
-                self.frame.after(0, lambda: self.delete_complete(success_count, errors))
+                self.progress.call(self.delete_complete, success_count, errors, stats, use_trash)
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error deleting files."))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error deleting files.")
 
-        threading.Thread(target=delete_thread).start()
+        self.run_job("Delete selected files", delete_thread, self.source_var.get())
 
-    def delete_complete(self, success_count, errors):
+    def delete_complete(self, success_count, errors, stats=None, trashed=False):
         """
         Handle completion of delete operation.
 
         Args:
             success_count: Number of successfully deleted files
             errors: List of error messages
+            stats: DeleteStats with the throughput of the delete (optional)
+            trashed: Whether the files were moved to the trash rather than deleted
         """
         if errors:
             error_msg = "\n".join(errors[:10])
@@ -331,7 +576,12 @@ class ArchiveTab:
                 error_msg += f"\n... and {len(errors) - 10} more errors."
             messagebox.showwarning("Warning", f"Completed with errors:\n{error_msg}")
 
-        self.status_var.set(f"Deleted {success_count} files.")
+        if trashed:
+            self.status_var.set(f"Moved {success_count} files to the trash.")
+        else:
+            self.status_var.set(f"Deleted {success_count} files.")
+        if stats is not None and stats.files:
+            self.status_var.set(f"{self.status_var.get()} ({stats})")
 
         # Refresh the file list
         self.load_files()
@@ -348,29 +598,192 @@ class ArchiveTab:
             return
 
         # Confirm the operation
-        if not messagebox.askyesno("Confirm", f"Delete the entire folder {source_dir}? This cannot be undone!"):
-            return
+        use_trash = self.use_trash_var.get()
+        if use_trash:
+            if not messagebox.askyesno("Confirm", f"Move the entire folder {source_dir} to the trash?"):
+                return
+        else:
+            if not messagebox.askyesno("Confirm", f"Delete the entire folder {source_dir}? This cannot be undone!"):
+                return
 
-        # Double-check with a more serious warning
-        if not messagebox.askyesno("WARNING", "This will permanently delete all files and subfolders. Are you absolutely sure?"):
-            return
+            # Double-check with a more serious warning
+            if not messagebox.askyesno("WARNING", "This will permanently delete all files and subfolders. Are you absolutely sure?"):
+                return
 
         self.status_var.set("Deleting folder...")
 
         # Run the delete operation in a separate thread
-        def delete_thread():
+        def delete_thread(cancel_event):
             try:
-                success, error = delete_folder(source_dir)
+                def report_progress(stats):
+                    self.progress.set(self.status_var, f"Deleting folder... {stats}")
+
+                stats = DeleteStats()
+                success, error = delete_folder(source_dir, cancel_event=cancel_event,
+                                               progress_callback=report_progress, stats=stats,
+                                               use_trash=use_trash)
 
                 # Update the UI in the main thread
-                if success:
-                    self.frame.after(0, lambda: self.status_var.set("Folder deleted successfully."))
-                    self.frame.after(0, lambda: messagebox.showinfo("Success", "Folder deleted successfully."))
+                if success and use_trash:
+                    self.progress.set(self.status_var, "Folder moved to the trash.")
+                    self.progress.call(messagebox.showinfo, "Success", "Folder moved to the trash.")
+                elif success:
+                    self.progress.set(self.status_var, f"Folder deleted successfully ({stats}).")
+                    self.progress.call(messagebox.showinfo, "Success", "Folder deleted successfully.")
                 else:
-                    self.frame.after(0, lambda: self.status_var.set(f"Error: {error}"))
-                    self.frame.after(0, lambda: messagebox.showerror("Error", f"Failed to delete folder: {error}"))
+                    self.progress.set(self.status_var, f"Error: {error}")
+                    self.progress.call(messagebox.showerror, "Error", f"Failed to delete folder: {error}")
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error deleting folder."))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error deleting folder.")
+
+        self.run_job("Delete folder", delete_thread, source_dir)
+
+    def open_trash(self):
+        """Show the trash, where deleted files can be restored or permanently deleted."""
+        window = tk.Toplevel(self.frame)
+        window.title("Trash")
+        window.geometry("700x400")
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        items = []
+
+        def refresh():
+            items[:] = list_trash()
+            listbox.delete(0, tk.END)
+            for item in items:
+                deleted_at = datetime.datetime.fromtimestamp(item.deleted_at).strftime("%Y-%m-%d %H:%M")
+                kind = " (folder)" if item.is_dir else ""
+                listbox.insert(tk.END, f"{deleted_at}  {item.original_path}{kind}")
+
+        def refresh_if_open():
+            if window.winfo_exists():
+                refresh()
+
+        def selected_items():
+            return [items[index] for index in listbox.curselection()]
+
+        def run_on_items(name, func, chosen, done_message):
+            def trash_thread(cancel_event):
+                try:
+                    count, errors = func(chosen, cancel_event)
+                    self.progress.call(self.trash_complete, done_message.format(count=count), errors)
+                except Exception as e:
+                    self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                    self.progress.set(self.status_var, "Error updating the trash.")
+                self.progress.call(refresh_if_open)
+
+            self.status_var.set(f"{name}...")
+            self.run_job(name, trash_thread, HOME_TRASH_DIR)
+
+        def restore_selected():
+            chosen = selected_items()
+            if chosen:
+                run_on_items("Restore from trash", restore_items, chosen, "Restored {count} items.")
+
+        def purge_selected():
+            chosen = selected_items()
+            if chosen and messagebox.askyesno("Confirm", f"Permanently delete {len(chosen)} items? "
+                                                         "This cannot be undone!", parent=window):
+                run_on_items("Purge trash", purge_items, chosen, "Permanently deleted {count} items.")
+
+        def empty_trash():
+            if items and messagebox.askyesno("Confirm", "Permanently delete everything in the trash? "
+                                                        "This cannot be undone!", parent=window):
+                run_on_items("Empty trash", purge_items, list(items), "Permanently deleted {count} items.")
+
+        buttons_frame = ttk.Frame(window)
+        buttons_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(buttons_frame, text="Restore", command=restore_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Delete Permanently", command=purge_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Empty Trash", command=empty_trash).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Close", command=window.destroy).pack(side=tk.RIGHT, padx=5)
+
+        refresh()
+
+    def open_store(self):
+        """Show the files in the dedup store, where they can be restored."""
+        window = tk.Toplevel(self.frame)
+        window.title("Dedup Store")
+        window.geometry("700x400")
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        all_versions_var = tk.BooleanVar(value=False)
+        versions = []
+
+        def refresh():
+            with ChunkStore() as store:
+                listed = store.list_files()
+            if not all_versions_var.get():
+                # Newest version of each file only
+                seen = set()
+                listed = [version for version in listed
+                          if version[1] not in seen and not seen.add(version[1])]
+            versions[:] = listed
+            listbox.delete(0, tk.END)
+            for file_id, path, size, _, archived_ns in versions:
+                archived = datetime.datetime.fromtimestamp(archived_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+                listbox.insert(tk.END, f"{archived}  {path}  ({round(size / 1024, 2)} KB)")
+
+        def restore_selected():
+            chosen = [versions[index][0] for index in listbox.curselection()]
+            if not chosen:
+                return
+            dest_dir = filedialog.askdirectory(parent=window, title="Restore To")
+            if not dest_dir:
+                return
+
+            def restore_thread(cancel_event):
+                try:
+                    count, errors = dedup_restore_files(chosen, dest_dir, cancel_event=cancel_event)
+                    self.progress.call(self.trash_complete, f"Restored {count} files to {dest_dir}.", errors)
+                except Exception as e:
+                    self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                    self.progress.set(self.status_var, "Error restoring from the dedup store.")
+
+            self.status_var.set("Restoring from the dedup store...")
+            self.run_job("Restore from dedup store", restore_thread, DEFAULT_STORE_DIR)
+
+        buttons_frame = ttk.Frame(window)
+        buttons_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(buttons_frame, text="Restore To...", command=restore_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(buttons_frame, text="Show all versions", variable=all_versions_var,
+                        command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Close", command=window.destroy).pack(side=tk.RIGHT, padx=5)
+
+        refresh()
+
+    def trash_complete(self, message, errors):
+        """
+        Handle completion of a restore or purge of trash items, or of a restore from the dedup store.
+
+        Args:
+            message: Status message describing what was done
+            errors: List of error messages
+        """
+        if errors:
+            error_msg = "\n".join(errors[:10])
+            if len(errors) > 10:
+                error_msg += f"\n... and {len(errors) - 10} more errors."
+            messagebox.showwarning("Warning", f"Completed with errors:\n{error_msg}")
+
+        self.status_var.set(message)
 
-        threading.Thread(target=delete_thread).start()
+        # Restored files may be back in the loaded folder
+        source_dir = self.source_var.get()
+        if source_dir and os.path.exists(source_dir):
+            self.load_files()
@@ -3,9 +3,48 @@ from tkinter import ttk
 from tkinter import messagebox
 import os
 
-from file_organizer_app.gui.organize_tab import OrganizeTab
-from file_organizer_app.gui.unused_files_tab import UnusedFilesTab
-from file_organizer_app.gui.archive_tab import ArchiveTab
+from file_organizer_app.gui.progress import ProgressChannel
+from file_organizer_app.utils.jobs import JobManager, RUNNING, QUEUED, DONE, FAILED
+
+# Number of long-running operations (scans, hashing, archiving, deleting) run at once
+MAX_RUNNING_JOBS = 2
+
+# Milliseconds after startup before the trash collector is started
+TRASH_COLLECTOR_DELAY = 5000
+
+class LazyTab:
+    """
+    A notebook page whose tab is only imported and created the first time it is shown.
+
+    The tab modules import the utils they use (hashing, archiving, the
+    catalog), so deferring them keeps startup down to the visible tab.
+    """
+
+    def __init__(self, notebook, title, create):
+        """
+        Add a page for a tab to the notebook.
+
+        Args:
+            notebook: The notebook widget
+            title: Label of the page
+            create: Function called with the page frame that imports and returns the tab
+        """
+        self.frame = ttk.Frame(notebook)
+        self.create = create
+        self.tab = None
+        notebook.add(self.frame, text=title)
+
+    def load(self):
+        """
+        Create the tab if it doesn't exist yet.
+
+        Returns:
+            The tab
+        """
+        if self.tab is None:
+            self.tab = self.create(self.frame)
+            self.tab.frame.pack(fill=tk.BOTH, expand=True)
+        return self.tab
 
 class MainWindow:
     def __init__(self, root):
@@ -26,17 +65,25 @@ class MainWindow:
 
        # Initialize and add tabs to the notebook
        # for organizing, finding unused files, and archiving
-        self.organize_tab = OrganizeTab(self.notebook)
-        self.unused_files_tab = UnusedFilesTab(self.notebook)
-        self.archive_tab = ArchiveTab(self.notebook)
+        # All tabs share one channel for UI updates from their worker threads
+        self.progress = ProgressChannel(self.root)
+        # Every tab submits its long-running operations to one job manager, so
+        # they can be queued, cancelled and shown in the status bar
+        self.jobs = JobManager(MAX_RUNNING_JOBS, on_change=self.job_changed)
 
-       # Add the initialized tab frames to the notebook widget.
+       # Add a page for each tab to the notebook widget.
        # Each tab is labeled appropriately based on its functionality.
        # This sets up the tabbed interface for organizing, finding unused files,
-       # and archiving or deleting files.
-        self.notebook.add(self.organize_tab.frame, text="Organize Files")
-        self.notebook.add(self.unused_files_tab.frame, text="Unused Files")
-        self.notebook.add(self.archive_tab.frame, text="Archive & Delete")
+       # and archiving or deleting files. A tab is only built when its page is
+       # first shown, starting with the organize tab.
+        self.tabs = [
+            LazyTab(self.notebook, "Organize Files", self.create_organize_tab),
+            LazyTab(self.notebook, "Unused Files", self.create_unused_files_tab),
+            LazyTab(self.notebook, "Archive & Delete", self.create_archive_tab),
+        ]
+        self.organize_page, self.unused_files_page, self.archive_page = self.tabs
+        self.notebook.bind("<<NotebookTabChanged>>", self.tab_changed)
+        self.organize_page.load()
 
         # Create status bar
         self.status_var = tk.StringVar()
@@ -47,15 +94,71 @@ class MainWindow:
         # Create menu
         self.create_menu()
 
+        # Free the space of expired trash items in the background, at a limited
+        # rate, once the window is up
+        self.trash_collector = None
+        self.root.after(TRASH_COLLECTOR_DELAY, self.start_trash_collector)
+
+        # Cancel running jobs when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
+    def create_organize_tab(self, parent):
+        """Create the organize tab in its page."""
+        from file_organizer_app.gui.organize_tab import OrganizeTab
+        return OrganizeTab(parent, self.progress, self.jobs)
+
+    def create_unused_files_tab(self, parent):
+        """Create the unused files tab in its page."""
+        from file_organizer_app.gui.unused_files_tab import UnusedFilesTab
+        return UnusedFilesTab(parent, self.progress, self.jobs)
+
+    def create_archive_tab(self, parent):
+        """Create the archive and delete tab in its page."""
+        from file_organizer_app.gui.archive_tab import ArchiveTab
+        return ArchiveTab(parent, self.progress, self.jobs)
+
+    @property
+    def organize_tab(self):
+        """The organize tab, created if needed."""
+        return self.organize_page.load()
+
+    @property
+    def unused_files_tab(self):
+        """The unused files tab, created if needed."""
+        return self.unused_files_page.load()
+
+    @property
+    def archive_tab(self):
+        """The archive and delete tab, created if needed."""
+        return self.archive_page.load()
+
+    def tab_changed(self, event):
+        """Build the selected tab the first time it is shown."""
+        index = self.notebook.index(self.notebook.select())
+        self.tabs[index].load()
+
+    def start_trash_collector(self):
+        """Start purging expired trash items in the background."""
+        from file_organizer_app.utils.trash import TrashCollector
+        self.trash_collector = TrashCollector()
+        self.trash_collector.start()
+
     def create_menu(self):
         """Create the application menu."""
         menu_bar = tk.Menu(self.root)
 
         # File menu
         file_menu = tk.Menu(menu_bar, tearoff=0)
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.close)
         menu_bar.add_cascade(label="File", menu=file_menu)
 
+        # Jobs menu
+        jobs_menu = tk.Menu(menu_bar, tearoff=0)
+        jobs_menu.add_command(label="Cancel All Jobs", command=self.cancel_all_jobs)
+        jobs_menu.add_command(label="Pause Queue", command=self.jobs.pause)
+        jobs_menu.add_command(label="Resume Queue", command=self.jobs.resume)
+        menu_bar.add_cascade(label="Jobs", menu=jobs_menu)
+
         # Help menu
         help_menu = tk.Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="About", command=self.show_about)
@@ -75,6 +178,45 @@ class MainWindow:
             "- Archive and delete files\n"
         )
 
+    def job_changed(self, job):
+        """
+        Report a job state change in the status bar (called from worker threads).
+
+        Args:
+            job: The job that changed
+        """
+        counts = self.jobs.status_counts()
+        if job.status == RUNNING:
+            message = f"Running: {job.name}"
+        elif job.status == QUEUED:
+            message = f"Queued: {job.name}"
+        elif job.status == DONE:
+            message = f"Finished: {job.name} in {job.duration:.1f}s"
+        elif job.status == FAILED:
+            message = f"Failed: {job.name} ({job.error})"
+        else:
+            message = f"Cancelled: {job.name}"
+
+        if counts[RUNNING] or counts[QUEUED]:
+            message += f" | {counts[RUNNING]} running, {counts[QUEUED]} queued"
+        if self.jobs.paused:
+            message += " (queue paused)"
+        self.progress.set(self.status_var, message)
+
+    def cancel_all_jobs(self):
+        """Cancel every running and queued job."""
+        self.jobs.cancel_all()
+        self.status_var.set("Cancelling all jobs...")
+
+    def close(self):
+        """Cancel running jobs and close the application."""
+        if self.organize_page.tab is not None:
+            self.organize_page.tab.stop_watching()
+        if self.trash_collector is not None:
+            self.trash_collector.stop(timeout=1.0)
+        self.jobs.shutdown()
+        self.root.destroy()
+
     def update_status(self, message):
         """
         Update the status bar message.
@@ -1,23 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import threading
-import hashlib
 
 # Import the `organize_file` function from the `file_organizer` module.  
 # This function is responsible for organizing files based on their types  
 # or extensions to maintain a clean and structured directory layout.
-from file_organizer_app.utils.file_organizer import organize_file
+from file_organizer_app.utils.file_organizer import organize_file, find_duplicate_files, get_file_hash
+from file_organizer_app.utils.move_planner import count_moves, plan_moves
+from file_organizer_app.utils.hash_cache import HashCache
+from file_organizer_app.utils.jobs import JobManager
+from file_organizer_app.utils.journal import INCOMPLETE, UNDONE, OrganizeJournal, list_runs, resume_run, run_plan, undo_run
+from file_organizer_app.utils.rules import get_default_engine
+from file_organizer_app.utils.scanner import scan_files
+from file_organizer_app.gui.progress import ProgressChannel
+from file_organizer_app.gui.virtual_tree import VirtualTreeview
 
 class OrganizeTab:
-    def __init__(self, parent):
+    def __init__(self, parent, progress=None, jobs=None):
         """
         Initialize the Organize Files tab.
 
         Args:
             parent: The parent notebook widget
+            progress: ProgressChannel shared with the other tabs (if None, the tab creates its own)
+            jobs: JobManager shared with the other tabs (if None, the tab creates its own)
         """
         self.frame = ttk.Frame(parent)
+        # Channel that applies UI updates from worker threads at a fixed frame rate
+        self.progress = progress if progress else ProgressChannel(self.frame)
+        # Background jobs run by this tab, so the Cancel button can stop them
+        self.jobs = jobs if jobs else JobManager()
+        self.tab_jobs = []
+        # Watcher that organizes files as they arrive, while watching is on
+        self.watcher = None
+        self.watched_count = 0
+        # On-disk hash cache, opened on the first duplicate search
+        self.hash_cache = None
+        # Duplicate file pairs shown in the duplicates view
+        self.duplicates = []
         self.create_widgets()
 
     def create_widgets(self):
@@ -43,6 +63,20 @@ class OrganizeTab:
         find_duplicates_btn = ttk.Button(actions_frame, text="Find Duplicates", command=self.find_duplicates)
         find_duplicates_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Search the file catalog, which only lists folders that changed since its last refresh
+        self.use_catalog_var = tk.BooleanVar(value=False)
+        use_catalog_check = ttk.Checkbutton(actions_frame, text="Use catalog", variable=self.use_catalog_var)
+        use_catalog_check.pack(side=tk.LEFT, padx=5, pady=5)
+
+        cancel_btn = ttk.Button(actions_frame, text="Cancel", command=self.cancel_jobs)
+        cancel_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        self.watch_btn = ttk.Button(actions_frame, text="Start Watching", command=self.toggle_watch)
+        self.watch_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
+        undo_btn = ttk.Button(actions_frame, text="Undo Last Organize", command=self.undo_last_organize)
+        undo_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
         # Results frame
         results_frame = ttk.LabelFrame(self.frame, text="Results")
         results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -74,7 +108,9 @@ class OrganizeTab:
 
        # Define the width of the first column to 350 pixels  
        # for consistent layout and better readability.
-        self.duplicates_tree = ttk.Treeview(self.duplicates_frame, columns=("File1", "File2"), show="headings")
+        # The duplicates view is virtualized, so only the visible pairs are materialized
+        self.duplicates_view = VirtualTreeview(self.duplicates_frame, columns=("File1", "File2"))
+        self.duplicates_tree = self.duplicates_view.tree
 
         # Set the heading text for the first column to "File 1"  
         # to indicate the path or name of the first duplicate file.
@@ -90,13 +126,9 @@ class OrganizeTab:
         
         
        # Define the width of the second column to 350 pixels  
-       # to match the first column and maintain symmetry. self.duplicates_tree.column("File2", width=350)
-        self.duplicates_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Add scrollbar to duplicates tree
-        duplicates_scrollbar = ttk.Scrollbar(self.duplicates_frame, orient=tk.VERTICAL, command=self.duplicates_tree.yview)
-        duplicates_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.duplicates_tree.configure(yscrollcommand=duplicates_scrollbar.set)
+       # to match the first column and maintain symmetry.
+        self.duplicates_tree.column("File2", width=350)
+        self.duplicates_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
        # Create a new frame to contain the progress bar widget  
        # This frame is placed inside the main frame of the application  
@@ -106,22 +138,22 @@ class OrganizeTab:
        # Pack the progress frame at the bottom of the main frame  
        # Make it stretch horizontally to fill the entire width of the window  
        # Add padding on the x and y axes for spacing around the frame.
-       progress_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
+        progress_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=10, pady=5)
 
        # Create a DoubleVar to track the progress value dynamically  
        # This variable will store a floating-point number between 0 and 100  
        # which will control the progress bar's fill level as a percentage.        
-       self.progress_var = tk.DoubleVar()
+        self.progress_var = tk.DoubleVar()
         
        # Create a progress bar widget inside the progress frame  
        # Link it to the progress_var so the progress bar updates automatically  
        # Set the maximum value to 100 to represent 100% progress.
-       self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100)
+        self.progress_bar = ttk.Progressbar(progress_frame, variable=self.progress_var, maximum=100)
         
        # Pack the progress bar at the top of the progress frame  
        # Make it expand horizontally to fill the entire width available  
        # Add padding to separate it from other widgets and the frame borders.
-       self.progress_bar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=2)
+        self.progress_bar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=2)
 
         # Create a Tkinter StringVar to hold the status message text  
         # This variable will be dynamically updated to reflect the current status  
@@ -141,7 +173,7 @@ class OrganizeTab:
        # Pack the status label widget at the bottom of the frame  
        # Allow it to stretch horizontally to fill the entire width  
        # so the status message is clearly visible and aligned at the bottom.        
-       status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        status_label.pack(side=tk.BOTTOM, fill=tk.X)
 
     def browse_directory(self):
         """Open a directory browser dialog."""
@@ -149,8 +181,36 @@ class OrganizeTab:
         if directory:
             self.dir_var.set(directory)
 
-    def organize_files(self):
-        """Organize files in the selected directory."""
+    def run_job(self, name, func, key):
+        """
+        Run a function as a background job.
+
+        Args:
+            name: Description of the job
+            func: Function to run, called with the job's cancel event
+            key: Directory the job works on; jobs on the same directory run one at a time
+        """
+        self.tab_jobs = [job for job in self.tab_jobs if not job.finished]
+        self.tab_jobs.append(self.jobs.submit(name, func, key))
+
+    def cancel_jobs(self):
+        """Cancel the running and queued jobs of this tab."""
+        active = [job for job in self.tab_jobs if not job.finished]
+        if not active:
+            self.status_var.set("Nothing to cancel.")
+            return
+
+        for job in active:
+            job.cancel()
+        self.status_var.set("Cancelling...")
+
+    def organize_files(self, check_interrupted=True):
+        """
+        Organize files in the selected directory.
+
+        Args:
+            check_interrupted: Whether to first offer to resume an interrupted run of the directory
+        """
         directory = self.dir_var.get()
         if not directory:
             messagebox.showerror("Error", "Please select a directory first.")
@@ -166,75 +226,207 @@ class OrganizeTab:
 
         # Reset progress bar
         self.progress_var.set(0)
+
         self.status_var.set("Scanning directory...")
 
         # Run the organize operation in a separate thread
-        def organize_thread():
+        def organize_thread(cancel_event):
             try:
-                # First, count total files to organize for progress tracking
-                total_files = 0
-                file_list = []
+                # Offer to finish an earlier run of this directory that was
+                # interrupted (reading the journals can take a while)
+                if check_interrupted:
+                    interrupted = [path for path, _, state in list_runs(dir_path=directory)
+                                   if state == INCOMPLETE]
+                    if interrupted:
+                        self.progress.call(self.offer_resume, interrupted[0])
+                        return
+
+                # First, find the files to organize and their folders
+                files = []
+                file_exts = []
 
                 # Update status
-                self.frame.after(0, lambda: self.status_var.set("Counting files..."))
-
-                for root, _, files in os.walk(directory):
-                    # Skip folders that might already be organized
-                    if any(folder in root for folder in ["_only"]):
-                        continue
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        file_ext = os.path.splitext(file)[-1].lower()
-                        file_list.append((file_path, file_ext))
-                        total_files += 1
+                self.progress.set(self.status_var, "Counting files...")
+
+                # Skip folders that might already be organized
+                engine = get_default_engine()
+                for entry in scan_files(directory, skip_dir=engine.skip_dir(directory),
+                                        cancel_event=cancel_event):
+                    folder = engine.route(entry.path)
+                    if folder is not None:
+                        files.append((entry.path, folder))
+                        file_exts.append(os.path.splitext(entry.name)[-1].lower())
+
+                if cancel_event.is_set():
+                    self.progress.set(self.status_var, "Organizing cancelled.")
+                    return
 
+                total_files = len(files)
                 if total_files == 0:
-                    self.frame.after(0, lambda: self.status_var.set("No files to organize."))
-                    self.frame.after(0, lambda: self.progress_var.set(100))
+                    self.progress.set(self.status_var, "No files to organize.")
+                    self.progress.set(self.progress_var, 100)
                     return
 
+                # Plan every move up front (each destination folder is listed
+                # once and name conflicts are resolved in memory)
+                self.progress.set(self.status_var, f"Planning {total_files} moves...")
+                plan = plan_moves(files, directory, file_exts)
+
                 # Update status
-                self.frame.after(0, lambda: self.status_var.set(f"Organizing {total_files} files..."))
+                self.progress.set(self.status_var, f"Organizing {total_files} files...")
+
+                def report_progress(processed, total):
+                    self.progress.set(self.progress_var, (processed / total) * 100)
+                    self.progress.set(self.status_var, f"Organized {processed}/{total} files...")
 
-                # Organize files with progress updates
-                results = {}
-                processed = 0
+                # Organize files with progress updates, journaling each move
+                # so the run can be resumed after a crash or undone later
+                journal = OrganizeJournal.create(directory, plan)
+                moved, errors = run_plan(journal, plan, cancel_event, report_progress)
+                for error in errors:
+                    print(error)
+                results = count_moves(moved)
 
-                for file_path, file_ext in file_list:
-                    # Call organize_file function (we'll need to modify file_organizer.py)
-                    success, ext = organize_file(file_path, directory)
+                # Update the UI in the main thread
+                self.progress.call(self.update_organize_results, results, cancel_event.is_set(), plan.stats)
+            except Exception as e:
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error organizing files.")
+                self.progress.set(self.progress_var, 0)
 
-                    # Update results
-                    if success and ext:
-                        if ext not in results:
-                            results[ext] = 0
-                        results[ext] += 1
+        self.run_job("Organize files", organize_thread, directory)
 
-                    # Update progress
-                    processed += 1
-                    progress = (processed / total_files) * 100
-                    self.frame.after(0, lambda p=progress: self.progress_var.set(p))
+    def offer_resume(self, journal_path):
+        """
+        Ask whether to resume an interrupted run, or organize from scratch.
 
-                    # Update status periodically
-                    if processed % 10 == 0 or processed == total_files:
-                        self.frame.after(0, lambda p=processed, t=total_files:
-                                        self.status_var.set(f"Organized {p}/{t} files..."))
+        Args:
+            journal_path: Path to the journal of the interrupted run
+        """
+        if messagebox.askyesno("Resume Organize",
+                               "An earlier organize run of this directory did not finish. Resume it?"):
+            self.resume_organize(journal_path)
+        else:
+            self.organize_files(check_interrupted=False)
 
-                # Update the UI in the main thread
-                self.frame.after(0, lambda: self.update_organize_results(results))
+    def resume_organize(self, journal_path):
+        """
+        Finish an interrupted organize run from its journal.
+
+        Args:
+            journal_path: Path to the journal of the run
+        """
+        self.status_var.set("Resuming organize...")
+
+        def resume_thread(cancel_event):
+            try:
+                def report_progress(processed, total):
+                    self.progress.set(self.progress_var, (processed / total) * 100)
+                    self.progress.set(self.status_var, f"Organized {processed}/{total} remaining files...")
+
+                moved, errors = resume_run(journal_path, cancel_event, report_progress)
+                for error in errors:
+                    print(error)
+                self.progress.call(self.update_organize_results, count_moves(moved), cancel_event.is_set())
+            except Exception as e:
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error resuming organize.")
+
+        self.run_job("Resume organize", resume_thread, self.dir_var.get())
+
+    def undo_last_organize(self):
+        """Move the files of the last organize run of the selected directory back."""
+        directory = self.dir_var.get()
+        if not directory:
+            messagebox.showerror("Error", "Please select a directory first.")
+            return
+
+        if not messagebox.askyesno("Confirm Undo",
+                                   "Move the files of the last organize run back to where they were?"):
+            return
+
+        self.progress_var.set(0)
+        self.status_var.set("Undoing organize...")
+
+        def undo_thread(cancel_event):
+            try:
+                def report_progress(processed, total):
+                    self.progress.set(self.progress_var, (processed / total) * 100)
+                    self.progress.set(self.status_var, f"Moved back {processed}/{total} files...")
+
+                runs = [path for path, _, state in list_runs(dir_path=directory) if state != UNDONE]
+                if not runs:
+                    self.progress.call(messagebox.showinfo, "Undo Organize",
+                                       "There is no organize run of this directory to undo.")
+                    self.progress.set(self.status_var, "Nothing to undo.")
+                    return
+
+                count, errors = undo_run(runs[0], cancel_event, report_progress)
+                for error in errors:
+                    print(error)
+                if cancel_event.is_set():
+                    self.progress.set(self.status_var, f"Undo cancelled. Moved back {count} files.")
+                else:
+                    self.progress.set(self.progress_var, 100)
+                    self.progress.set(self.status_var, f"Undo complete. Moved back {count} files.")
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error organizing files."))
-                self.frame.after(0, lambda: self.progress_var.set(0))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error undoing organize.")
+
+        self.run_job("Undo organize", undo_thread, directory)
+
+    def toggle_watch(self):
+        """Start or stop organizing files as they arrive in the selected directory."""
+        if self.watcher is not None:
+            self.stop_watching()
+            self.status_var.set(f"Stopped watching. Organized {self.watched_count} files.")
+            return
+
+        directory = self.dir_var.get()
+        if not directory:
+            messagebox.showerror("Error", "Please select a directory first.")
+            return
+
+        if not os.path.exists(directory):
+            messagebox.showerror("Error", "The selected directory does not exist.")
+            return
+
+        # Loaded on first use, as most sessions never start a watcher
+        from file_organizer_app.utils.watcher import DirectoryWatcher
+
+        self.watched_count = 0
+        self.watcher = DirectoryWatcher(directory, on_organized=self.file_organized)
+        self.watcher.start()
+        self.watch_btn.config(text="Stop Watching")
+        self.status_var.set(f"Watching {directory} for new files ({self.watcher.backend})...")
+
+    def stop_watching(self):
+        """Stop the directory watcher if it is running."""
+        if self.watcher is not None:
+            self.watcher.stop(timeout=2)
+            self.watcher = None
+            self.watch_btn.config(text="Start Watching")
+
+    def file_organized(self, file_path, ext):
+        """
+        Report a file organized by the watcher (called from the watcher thread).
 
-        threading.Thread(target=organize_thread).start()
+        Args:
+            file_path: Original path of the file
+            ext: Extension of the file
+        """
+        self.watched_count += 1
+        self.progress.set(self.status_var, f"Watching: moved {os.path.basename(file_path)} to the {ext} folder "
+                                           f"({self.watched_count} files so far).")
 
-    def update_organize_results(self, results):
+    def update_organize_results(self, results, cancelled=False, stats=None):
         """
         Update the organize results treeview.
 
         Args:
             results: Dictionary with file types as keys and count of files moved as values
+            cancelled: Whether the operation was cancelled before every file was organized
+            stats: MoveStats with the throughput of the moves (optional)
         """
         for file_type, count in results.items():
             if count > 0:
@@ -246,11 +438,16 @@ class OrganizeTab:
         self.progress_var.set(100)
 
         # Update status
-        if total_files > 0:
+        if cancelled:
+            self.status_var.set(f"Organizing cancelled after {total_files} files.")
+        elif total_files > 0:
             self.status_var.set(f"Successfully organized {total_files} files.")
         else:
             self.status_var.set("No files were organized.")
 
+        if stats is not None and stats.files:
+            self.status_var.set(f"{self.status_var.get()} ({stats})")
+
         # Switch to the organize results tab
         self.results_notebook.select(0)
 
@@ -266,73 +463,59 @@ class OrganizeTab:
             return
 
         # Clear previous results
-        for item in self.duplicates_tree.get_children():
-            self.duplicates_tree.delete(item)
+        self.duplicates = []
+        self.duplicates_view.clear()
 
         # Reset progress bar
         self.progress_var.set(0)
         self.status_var.set("Scanning for duplicate files...")
+        use_catalog = self.use_catalog_var.get()
 
         # Run the duplicate finding operation in a separate thread
-        def duplicates_thread():
+        def duplicates_thread(cancel_event):
             try:
-                # First, count total files for progress tracking
-                total_files = 0
-                file_list = []
-
                 # Update status
-                self.frame.after(0, lambda: self.status_var.set("Counting files..."))
+                self.progress.set(self.status_var, "Grouping files by size...")
 
-                for root, _, files in os.walk(directory):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        file_list.append(file_path)
-                        total_files += 1
-
-                if total_files == 0:
-                    self.frame.after(0, lambda: self.status_var.set("No files found to check for duplicates."))
-                    self.frame.after(0, lambda: self.progress_var.set(100))
-                    return
-
-                # Update status
-                self.frame.after(0, lambda: self.status_var.set(f"Checking {total_files} files for duplicates..."))
-
-                # Calculate hashes with progress updates
-                seen_hash = {}
-                duplicates = []
-                processed = 0
-
-                for file_path in file_list:
-                    try:
-                        # Calculate file hash
-                        file_hash = self.calculate_file_hash(file_path)
-
-                        # Check for duplicates
-                        if file_hash in seen_hash:
-                            duplicates.append((file_path, seen_hash[file_hash]))
-                        else:
-                            seen_hash[file_hash] = file_path
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {e}")
-
-                    # Update progress
-                    processed += 1
-                    progress = (processed / total_files) * 100
-                    self.frame.after(0, lambda p=progress: self.progress_var.set(p))
+                def report_progress(processed, total):
+                    progress = (processed / total) * 100
+                    self.progress.set(self.progress_var, progress)
 
                     # Update status periodically
-                    if processed % 10 == 0 or processed == total_files:
-                        self.frame.after(0, lambda p=processed, t=total_files:
-                                        self.status_var.set(f"Processed {p}/{t} files..."))
+                    if processed % 10 == 0 or processed == total:
+                        self.progress.set(self.status_var, f"Checked {processed}/{total} possible duplicates...")
+
+                if use_catalog:
+                    # Sizes and stored hashes come from the catalog's index
+                    from file_organizer_app.utils.catalog import get_default_catalog
+                    self.progress.set(self.status_var, "Refreshing the catalog...")
+                    catalog = get_default_catalog()
+                    catalog.refresh(directory, cancel_event=cancel_event)
+                    self.progress.set(self.status_var, "Checking possible duplicates...")
+                    duplicates = catalog.duplicates(directory, cancel_event=cancel_event)
+                    cache_stats = None
+                else:
+                    # Files are grouped by size first, so only files that may
+                    # have a duplicate are hashed (on a pool of worker threads),
+                    # and files unchanged since the last search come from the cache
+                    cache = self.get_hash_cache()
+                    hits, misses = cache.hits, cache.misses
+                    duplicates = find_duplicate_files(directory, progress_callback=report_progress, cache=cache,
+                                                      cancel_event=cancel_event)
+                    cache_stats = (cache.hits - hits, cache.misses - misses)
+
+                if cancel_event.is_set():
+                    self.progress.set(self.status_var, "Duplicate search cancelled.")
+                    return
 
                 # Update the UI in the main thread
-                self.frame.after(0, lambda: self.update_duplicates_results(duplicates))
+                self.progress.call(self.update_duplicates_results, duplicates, cache_stats)
             except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error finding duplicates."))
-                self.frame.after(0, lambda: self.progress_var.set(0))
+                self.progress.call(messagebox.showerror, "Error", f"An error occurred: {str(e)}")
+                self.progress.set(self.status_var, "Error finding duplicates.")
+                self.progress.set(self.progress_var, 0)
 
-        threading.Thread(target=duplicates_thread).start()
+        self.run_job("Find duplicates", duplicates_thread, directory)
 
     def calculate_file_hash(self, filepath: str) -> str:
         """
@@ -344,34 +527,41 @@ class OrganizeTab:
         Returns:
             MD5 hash of the file as a hexadecimal string
         """
-        hasher = hashlib.md5()
+        return get_file_hash(filepath, self.get_hash_cache())
+
+    def get_hash_cache(self) -> HashCache:
+        """
+        Get the on-disk hash cache, opening it on first use.
 
-        with open(filepath, 'rb') as f:
-            while True:
-                chunk = f.read(8192)
-                if not chunk:
-                    break
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        Returns:
+            The hash cache shared by all duplicate searches in this tab
+        """
+        if self.hash_cache is None:
+            self.hash_cache = HashCache()
+        return self.hash_cache
 
-    def update_duplicates_results(self, duplicates):
+    def update_duplicates_results(self, duplicates, cache_stats=None):
         """
         Update the duplicates results treeview.
 
         Args:
             duplicates: List of tuples containing paths of duplicate files
+            cache_stats: Tuple containing the hash cache hits and misses of the search (optional)
         """
-        for file1, file2 in duplicates:
-            self.duplicates_tree.insert("", tk.END, values=(file1, file2))
+        self.duplicates = duplicates
+        self.duplicates_view.set_rows(len(duplicates), self.duplicates.__getitem__)
 
         # Ensure progress bar is at 100%
         self.progress_var.set(100)
 
         # Update status
         if len(duplicates) > 0:
-            self.status_var.set(f"Found {len(duplicates)} duplicate file pairs.")
+            status = f"Found {len(duplicates)} duplicate file pairs."
         else:
-            self.status_var.set("No duplicate files found.")
+            status = "No duplicate files found."
+        if cache_stats:
+            status += f" (hash cache: {cache_stats[0]} hits, {cache_stats[1]} misses)"
+        self.status_var.set(status)
 
         # Switch to the duplicates tab
         self.results_notebook.select(1)
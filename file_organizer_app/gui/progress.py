@@ -0,0 +1,92 @@
+import threading
+import tkinter as tk
+from typing import Callable
+
+# Number of times per second queued updates are applied to the UI
+FRAME_RATE = 20
+
+class ProgressChannel:
+    """
+    Thread-safe channel for sending UI updates from worker threads.
+
+    Workers call set() to change a Tk variable (such as a progress bar value
+    or a status message) and call() to run a function on the main thread.
+    Updates are applied by a periodic after() poll at a fixed frame rate.
+    Repeated sets of the same variable between polls are coalesced into one,
+    so the cost to the UI stays constant however many files a job handles.
+    Calls and sets are applied in the order they were made.
+    """
+
+    def __init__(self, widget: tk.Misc, frame_rate: int = FRAME_RATE):
+        """
+        Create the channel and start polling it.
+
+        Args:
+            widget: Widget whose event loop applies the updates
+            frame_rate: Number of polls per second
+        """
+        self.widget = widget
+        self.interval_ms = max(1, int(1000 / frame_rate))
+
+        self._lock = threading.Lock()
+        self._pending = []
+        # Variable name -> position of its pending set, and position of the last call
+        self._set_index = {}
+        self._last_call = -1
+
+        self.widget.after(self.interval_ms, self._poll)
+
+    def set(self, variable: tk.Variable, value) -> None:
+        """
+        Set a Tk variable from any thread.
+
+        Args:
+            variable: The variable to set
+            value: The new value
+        """
+        # Tk variables are unhashable, so they are keyed by their Tcl name
+        key = str(variable)
+        with self._lock:
+            index = self._set_index.get(key)
+            if index is not None and index > self._last_call:
+                # Nothing has to happen in between, so only the latest value matters
+                self._pending[index] = ("set", variable, value)
+            else:
+                self._set_index[key] = len(self._pending)
+                self._pending.append(("set", variable, value))
+
+    def call(self, func: Callable, *args) -> None:
+        """
+        Run a function on the main thread from any thread.
+
+        Args:
+            func: The function to run
+            *args: Arguments to pass to the function
+        """
+        with self._lock:
+            self._last_call = len(self._pending)
+            self._pending.append(("call", func, args))
+
+    def flush(self) -> None:
+        """Apply all pending updates now (must be called on the main thread)."""
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+            self._set_index = {}
+            self._last_call = -1
+
+        for kind, target, value in pending:
+            if kind == "set":
+                target.set(value)
+            else:
+                target(*value)
+
+    def _poll(self) -> None:
+        try:
+            self.flush()
+        finally:
+            try:
+                self.widget.after(self.interval_ms, self._poll)
+            except tk.TclError:
+                # The widget has been destroyed
+                pass
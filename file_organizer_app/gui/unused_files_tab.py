@@ -4,19 +4,52 @@ import os
 import threading
 from datetime import datetime
 
-from file_organizer_app.utils.file_metadata import find_unused_files
+from file_organizer_app.utils.file_metadata import iter_unused_files
+from file_organizer_app.utils.file_record import FileRecordStore
+from file_organizer_app.utils.jobs import JobManager
+from file_organizer_app.gui.progress import ProgressChannel
+from file_organizer_app.gui.virtual_tree import VirtualTreeview
+
+# Number of results handed to the UI at a time
+RESULT_BATCH_SIZE = 200
+
+# Maximum number of result batches waiting for the UI; the search pauses when it is full
+MAX_PENDING_BATCHES = 20
+
+# Results view column -> FileRecordStore column used to sort it
+SORT_COLUMNS = {
+    "Name": "name",
+    "Path": "path",
+    "Size": "size",
+    "Last Accessed": "accessed",
+    "Last Modified": "modified",
+    "Type": "extension",
+}
 
 class UnusedFilesTab:
-    def __init__(self, parent):
+    def __init__(self, parent, progress=None, jobs=None):
         """
         Initialize the Unused Files tab.
 
         Args:
             parent: The parent notebook widget
+            progress: ProgressChannel shared with the other tabs (if None, the tab creates its own)
+            jobs: JobManager shared with the other tabs (if None, the tab creates its own)
         """
         self.frame = ttk.Frame(parent)
+        # Channel that applies UI updates from worker threads at a fixed frame rate
+        self.progress = progress if progress else ProgressChannel(self.frame)
+        # Background jobs that run the searches
+        self.jobs = jobs if jobs else JobManager()
         # Store all unused files for client-side filtering
-        self.all_unused_files = []
+        self.all_unused_files = FileRecordStore()
+        # Rows of the store shown in the results view, in display order
+        self.shown_rows = []
+        self.sort_column = None
+        self.sort_reverse = False
+        # Event that stops the running search; it also identifies the search
+        # whose results are being shown
+        self.cancel_event = None
         self.create_widgets()
 
     def create_widgets(self):
@@ -52,16 +85,25 @@ class UnusedFilesTab:
         # Bind the combobox to filter results when changed
         self.file_type_combo.bind("<<ComboboxSelected>>", self.filter_results)
 
+        # Query the file catalog, which only lists folders that changed since its last refresh
+        self.use_catalog_var = tk.BooleanVar(value=False)
+        use_catalog_check = ttk.Checkbutton(filter_frame, text="Use catalog", variable=self.use_catalog_var)
+        use_catalog_check.pack(side=tk.LEFT, padx=5, pady=5)
+
         find_btn = ttk.Button(filter_frame, text="Find Unused Files", command=self.find_unused_files)
         find_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
+        stop_btn = ttk.Button(filter_frame, text="Stop", command=self.stop_search)
+        stop_btn.pack(side=tk.LEFT, padx=5, pady=5)
+
         # Results frame
         results_frame = ttk.LabelFrame(self.frame, text="Unused Files")
         results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Create a treeview for results
+        # Create a virtualized treeview for results; only the visible rows are materialized
         columns = ("Name", "Path", "Size", "Last Accessed", "Last Modified", "Type")
-        self.results_tree = ttk.Treeview(results_frame, columns=columns, show="headings")
+        self.results_view = VirtualTreeview(results_frame, columns=columns)
+        self.results_tree = self.results_view.tree
 
         # Configure columns
         self.results_tree.heading("Name", text="Name")
@@ -78,15 +120,9 @@ class UnusedFilesTab:
         self.results_tree.column("Last Modified", width=150)
         self.results_tree.column("Type", width=50)
 
-        # Add scrollbars
-        y_scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results_tree.yview)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        x_scrollbar = ttk.Scrollbar(results_frame, orient=tk.HORIZONTAL, command=self.results_tree.xview)
-        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-
-        self.results_tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-        self.results_tree.pack(fill=tk.BOTH, expand=True)
+        # Sort by a column when its heading is clicked
+        self.results_view.bind_sort(self.sort_results)
+        self.results_view.pack(fill=tk.BOTH, expand=True)
 
         # Add right-click menu
         self.context_menu = tk.Menu(self.frame, tearoff=0)
@@ -122,79 +158,156 @@ class UnusedFilesTab:
             return
 
         days = self.days_var.get()
-        file_type = self.file_type_var.get()
+        use_catalog = self.use_catalog_var.get()
+
+        # Stop any search that is still running
+        self.stop_search()
 
         # Clear previous results
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        self.all_unused_files = FileRecordStore()
+        self.shown_rows = []
+        self.sort_column = None
+        self.results_view.set_rows(0, self.get_result_row)
+
+        self.status_var.set("Finding unused files... Results are shown as they are found.")
+
+        # Batches sent to the UI and not shown yet
+        pending = threading.BoundedSemaphore(MAX_PENDING_BATCHES)
+
+        # Run the search as a background job, streaming results to the UI
+        def search_thread(cancel_event):
+            def put(item):
+                # Block while the UI catches up, unless the search is stopped
+                while not cancel_event.is_set():
+                    if pending.acquire(timeout=0.1):
+                        self.progress.call(self.add_results, cancel_event, pending, item)
+                        return True
+                return False
 
-        self.status_var.set("Finding unused files... This may take a while for large directories.")
+            try:
+                if use_catalog:
+                    from file_organizer_app.utils.catalog import get_default_catalog
+                    catalog = get_default_catalog()
+                    catalog.refresh(directory, cancel_event=cancel_event)
+                    found = catalog.unused_files(directory, days)
+                else:
+                    found = iter_unused_files(directory, days, cancel_event)
+
+                batch = []
+                for file_info in found:
+                    batch.append(file_info)
+                    if len(batch) >= RESULT_BATCH_SIZE:
+                        if not put(batch):
+                            return
+                        batch = []
+
+                if batch and not put(batch):
+                    return
+                put(None)
+            except Exception as e:
+                put(e)
 
-        # Store all unused files for client-side filtering
-        self.all_unused_files = []
+        job = self.jobs.submit("Find unused files", search_thread, directory)
+        self.cancel_event = job.cancel_event
 
-        # Run the search in a separate thread
-        def search_thread():
-            try:
-                # Get all unused files regardless of type
-                unused_files = find_unused_files(directory, days)
+    def stop_search(self):
+        """Stop the running search, keeping the results found so far."""
+        if self.cancel_event is not None and not self.cancel_event.is_set():
+            self.cancel_event.set()
+            self.status_var.set(f"Search stopped. Found {len(self.all_unused_files)} unused files.")
 
-                # Store all results for client-side filtering
-                self.all_unused_files = unused_files
+    def add_results(self, cancel_event, pending, batch):
+        """
+        Show a batch of results found by the search thread (called on the main thread).
 
-                # Apply filter if needed
-                filtered_files = unused_files
-                if file_type != "All":
-                    filtered_files = [f for f in unused_files if f["extension"] == file_type]
+        Args:
+            cancel_event: Cancel event of the search that found the batch
+            pending: Semaphore counting the batches waiting for the UI
+            batch: List of FileRecords, None when the search has finished,
+                or the exception that stopped it
+        """
+        pending.release()
 
-                # Update the UI in the main thread
-                self.frame.after(0, lambda: self.update_results(filtered_files))
-            except Exception as e:
-                self.frame.after(0, lambda: messagebox.showerror("Error", f"An error occurred: {str(e)}"))
-                self.frame.after(0, lambda: self.status_var.set("Error finding unused files."))
+        # Ignore results from a search that was replaced or stopped
+        if cancel_event is not self.cancel_event or cancel_event.is_set():
+            return
 
-        threading.Thread(target=search_thread).start()
+        if batch is None or isinstance(batch, Exception):
+            # The search has finished
+            self.cancel_event = None
+
+        if batch is None:
+            self.status_var.set(f"Found {len(self.all_unused_files)} unused files.")
+            return
+
+        if isinstance(batch, Exception):
+            messagebox.showerror("Error", f"An error occurred: {str(batch)}")
+            self.status_var.set("Error finding unused files.")
+            return
 
-    def update_results(self, unused_files):
+        file_type = self.file_type_var.get()
+        first_row = len(self.all_unused_files)
+        self.all_unused_files.extend(batch)
+        for row, file_info in enumerate(batch, first_row):
+            if file_type == "All" or file_info.extension == file_type:
+                self.shown_rows.append(row)
+
+        # Appended rows only change the scrollbar unless they are on screen
+        self.results_view.set_rows(len(self.shown_rows), keep_position=True)
+
+        self.status_var.set(f"Finding unused files... {len(self.all_unused_files)} found so far.")
+
+    def get_result_row(self, index):
         """
-        Update the results treeview.
+        Get the column values of a row in the results view.
 
         Args:
-            unused_files: List of dictionaries containing metadata of unused files
+            index: Row index in the results view
+
+        Returns:
+            Tuple of formatted column values
         """
-        for file_info in unused_files:
-            # Format the size in KB
-            size_kb = round(file_info["size"] / 1024, 2)
+        file_info = self.all_unused_files[self.shown_rows[index]]
 
-            # Format the dates
-            accessed = file_info["accessed"].strftime("%Y-%m-%d %H:%M")
-            modified = file_info["modified"].strftime("%Y-%m-%d %H:%M")
+        # Format the size in KB
+        size_kb = round(file_info.size / 1024, 2)
 
-            self.results_tree.insert("", tk.END, values=(
-                file_info["name"],
-                file_info["path"],
-                size_kb,
-                accessed,
-                modified,
-                file_info["extension"]
-            ))
+        # Format the dates
+        accessed = file_info.accessed.strftime("%Y-%m-%d %H:%M")
+        modified = file_info.modified.strftime("%Y-%m-%d %H:%M")
 
-        self.status_var.set(f"Found {len(unused_files)} unused files.")
+        return (
+            file_info.name,
+            file_info.path,
+            size_kb,
+            accessed,
+            modified,
+            file_info.extension
+        )
+
+    def selected_paths(self):
+        """
+        Get the paths of the selected files.
+
+        Returns:
+            List of file paths
+        """
+        return [self.all_unused_files.paths[self.shown_rows[index]]
+                for index in self.results_view.selected_rows()]
 
     def show_context_menu(self, event):
         """Show the context menu on right-click."""
         # Select the item under the cursor
-        item = self.results_tree.identify_row(event.y)
-        if item:
-            self.results_tree.selection_set(item)
+        index = self.results_view.row_at(event.y)
+        if index is not None:
+            self.results_view.select_row(index)
             self.context_menu.post(event.x_root, event.y_root)
 
     def open_file(self):
         """Open the selected file."""
-        selected = self.results_tree.selection()
+        selected = self.selected_paths()
         if selected:
-            item = selected[0]
-            file_path = self.results_tree.item(item, "values")[1]
+            file_path = selected[0]
             try:
                 os.startfile(file_path)
             except Exception as e:
@@ -202,10 +315,9 @@ class UnusedFilesTab:
 
     def open_folder(self):
         """Open the folder containing the selected file."""
-        selected = self.results_tree.selection()
+        selected = self.selected_paths()
         if selected:
-            item = selected[0]
-            file_path = self.results_tree.item(item, "values")[1]
+            file_path = selected[0]
             folder_path = os.path.dirname(file_path)
             try:
                 os.startfile(folder_path)
@@ -214,13 +326,33 @@ class UnusedFilesTab:
 
     def select_all(self):
         """Select all items in the treeview."""
-        for item in self.results_tree.get_children():
-            self.results_tree.selection_add(item)
+        self.results_view.select_all()
 
     def deselect_all(self):
         """Deselect all items in the treeview."""
-        for item in self.results_tree.get_children():
-            self.results_tree.selection_remove(item)
+        self.results_view.deselect_all()
+
+    def sort_results(self, column):
+        """
+        Sort the shown results by a column, reversing the order on a repeated click.
+
+        Args:
+            column: Identifier of the clicked column
+        """
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+
+        self.apply_sort()
+
+    def apply_sort(self):
+        """Reorder the shown results by the current sort column and show them."""
+        if self.sort_column is not None:
+            self.shown_rows = self.all_unused_files.sort_indexes(
+                SORT_COLUMNS[self.sort_column], self.shown_rows, self.sort_reverse)
+        self.results_view.set_rows(len(self.shown_rows))
 
     def filter_results(self, event=None):
         """
@@ -233,18 +365,14 @@ class UnusedFilesTab:
 
         file_type = self.file_type_var.get()
 
-        # Clear current display
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-
-        # Apply filter
+        # Apply filter on the extension column of the store
         if file_type == "All":
-            filtered_files = self.all_unused_files
+            self.shown_rows = list(range(len(self.all_unused_files)))
         else:
-            filtered_files = [f for f in self.all_unused_files if f["extension"] == file_type]
+            self.shown_rows = self.all_unused_files.filter_extension(file_type)
 
-        # Update display with filtered results
-        self.update_results(filtered_files)
+        # Keep the current sort order
+        self.apply_sort()
 
         # Update status
-        self.status_var.set(f"Showing {len(filtered_files)} unused files with type {file_type}")
+        self.status_var.set(f"Showing {len(self.shown_rows)} unused files with type {file_type}")
@@ -0,0 +1,277 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional, Sequence
+
+# Row height used until the treeview has been drawn and can be measured
+DEFAULT_ROW_HEIGHT = 20
+
+# Modifier bits of a Tk event's state
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+class VirtualTreeview:
+    """
+    A treeview that only creates items for the rows currently on screen.
+
+    Rows live in a backing model that is read through a get_row callback, so
+    showing, clearing, filtering or sorting any number of rows only ever
+    touches the few dozen items in the visible window (plus a small buffer).
+    Selection is kept as a set of model row indexes and survives scrolling.
+    """
+
+    def __init__(self, parent, columns: Sequence[str], selectmode: str = "extended", buffer_rows: int = 5):
+        """
+        Create the view with its own scrollbars inside a container frame.
+
+        Args:
+            parent: The parent widget
+            columns: Column identifiers of the treeview
+            selectmode: Treeview selection mode ('extended', 'browse' or 'none')
+            buffer_rows: Number of rows rendered past the bottom of the window
+        """
+        self.frame = ttk.Frame(parent)
+        self.buffer_rows = buffer_rows
+
+        self.row_count = 0
+        self.get_row = None
+        self.offset = 0
+        self.selected = set()
+        # Treeview item id -> model row index for the rendered window
+        self.item_rows = {}
+        self._rendering = False
+
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", selectmode=selectmode)
+
+        # Add scrollbars; the vertical one scrolls the model, not the treeview
+        self.y_scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        x_scrollbar = ttk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", lambda event: self.render())
+        self.tree.bind("<<TreeviewSelect>>", self._sync_selection)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_by(3))
+        self.tree.bind("<Prior>", lambda event: self._scroll_by(-self.visible_rows()))
+        self.tree.bind("<Next>", lambda event: self._scroll_by(self.visible_rows()))
+        self.tree.bind("<Up>", self._on_key_up)
+        self.tree.bind("<Down>", self._on_key_down)
+
+    def pack(self, **kwargs):
+        """Pack the container frame of the view."""
+        self.frame.pack(**kwargs)
+
+    def bind_sort(self, callback: Callable[[str], None]) -> None:
+        """
+        Call a function with the column identifier when a heading is clicked.
+
+        Args:
+            callback: Function that reorders the model for the clicked column
+        """
+        for column in self.tree["columns"]:
+            self.tree.heading(column, command=lambda c=column: callback(c))
+
+    def set_rows(self, row_count: int, get_row: Optional[Callable[[int], Sequence]] = None,
+                 keep_position: bool = False) -> None:
+        """
+        Point the view at a new or changed model.
+
+        Args:
+            row_count: Number of rows in the model
+            get_row: Function returning the column values of a model row (if None, keeps the current one)
+            keep_position: Whether to keep the scroll position and selection (e.g. when rows were appended)
+        """
+        self.row_count = row_count
+        if get_row is not None:
+            self.get_row = get_row
+        if not keep_position:
+            self.offset = 0
+            self.selected = set()
+        self.render()
+
+    def clear(self) -> None:
+        """Remove every row from the view."""
+        self.set_rows(0)
+
+    def refresh(self) -> None:
+        """Redraw the visible rows from the model."""
+        self.render()
+
+    def row_height(self) -> int:
+        """
+        Get the height of a row in pixels.
+
+        Returns:
+            The row height, measured from the first rendered item if possible
+        """
+        children = self.tree.get_children()
+        if children:
+            bbox = self.tree.bbox(children[0])
+            if bbox:
+                return max(1, bbox[3])
+        return DEFAULT_ROW_HEIGHT
+
+    def visible_rows(self) -> int:
+        """
+        Get the number of rows that fit in the treeview.
+
+        Returns:
+            The number of visible rows (at least one)
+        """
+        # Leave room for the heading row
+        return max(1, self.tree.winfo_height() // self.row_height() - 1)
+
+    def render(self) -> None:
+        """Materialize the rows in the visible window and update the scrollbar."""
+        visible = self.visible_rows()
+        max_offset = max(0, self.row_count - visible)
+        self.offset = min(max(0, self.offset), max_offset)
+
+        first = self.offset
+        last = min(self.row_count, first + visible + self.buffer_rows)
+
+        self._rendering = True
+        try:
+            # Reuse existing items instead of deleting and recreating them
+            items = list(self.tree.get_children())
+            needed = last - first
+            if len(items) > needed:
+                self.tree.delete(*items[needed:])
+                items = items[:needed]
+            while len(items) < needed:
+                items.append(self.tree.insert("", tk.END))
+
+            self.item_rows = {}
+            selection = []
+            for item, row in zip(items, range(first, last)):
+                self.tree.item(item, values=self.get_row(row))
+                self.item_rows[item] = row
+                if row in self.selected:
+                    selection.append(item)
+
+            self.tree.selection_set(selection)
+            self.tree.yview_moveto(0)
+        finally:
+            self._rendering = False
+
+        if self.row_count:
+            self.y_scrollbar.set(first / self.row_count, min(1.0, (first + visible) / self.row_count))
+        else:
+            self.y_scrollbar.set(0.0, 1.0)
+
+    def yview(self, *args) -> None:
+        """Handle scrollbar commands ('moveto' and 'scroll') by moving through the model."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.row_count)
+            self.render()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows()
+            self._scroll_by(amount)
+
+    def scroll_to(self, row: int) -> None:
+        """
+        Scroll so that a model row is visible.
+
+        Args:
+            row: Model row index
+        """
+        visible = self.visible_rows()
+        if row < self.offset:
+            self.offset = row
+        elif row >= self.offset + visible:
+            self.offset = row - visible + 1
+        self.render()
+
+    def selected_rows(self) -> List[int]:
+        """
+        Get the selected model rows.
+
+        Returns:
+            Sorted list of selected model row indexes
+        """
+        return sorted(self.selected)
+
+    def select_all(self) -> None:
+        """Select every row in the model."""
+        self.selected = set(range(self.row_count))
+        self.render()
+
+    def deselect_all(self) -> None:
+        """Clear the selection."""
+        self.selected = set()
+        self.render()
+
+    def select_row(self, row: int) -> None:
+        """
+        Select a single model row, clearing any other selection.
+
+        Args:
+            row: Model row index
+        """
+        self.selected = {row}
+        self.render()
+
+    def row_at(self, y: int) -> Optional[int]:
+        """
+        Get the model row at a vertical position in the treeview.
+
+        Args:
+            y: Y coordinate relative to the treeview
+
+        Returns:
+            The model row index, or None if there is no row there
+        """
+        item = self.tree.identify_row(y)
+        return self.item_rows.get(item) if item else None
+
+    def _scroll_by(self, rows: int) -> str:
+        self.offset += rows
+        self.render()
+        return "break"
+
+    def _on_mousewheel(self, event) -> str:
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, event) -> None:
+        # A plain click replaces the selection, including rows scrolled out of view
+        if not event.state & (SHIFT_MASK | CONTROL_MASK):
+            self.selected = set()
+
+    def _on_key_up(self, event) -> Optional[str]:
+        # Moving past the top of the window scrolls the model instead
+        focus = self.tree.focus()
+        row = self.item_rows.get(focus) if focus else None
+        if row is not None and row == self.offset and row > 0:
+            self.selected = {row - 1}
+            return self._scroll_by(-1)
+        return None
+
+    def _on_key_down(self, event) -> Optional[str]:
+        # Moving past the bottom of the window scrolls the model instead
+        focus = self.tree.focus()
+        row = self.item_rows.get(focus) if focus else None
+        if row is not None and row >= self.offset + self.visible_rows() - 1 and row + 1 < self.row_count:
+            self.selected = {row + 1}
+            return self._scroll_by(1)
+        return None
+
+    def _sync_selection(self, event=None) -> None:
+        # Programmatic selection changes while rendering already match the model
+        if self._rendering:
+            return
+        selection = set(self.tree.selection())
+        for item, row in self.item_rows.items():
+            if item in selection:
+                self.selected.add(row)
+            else:
+                self.selected.discard(row)
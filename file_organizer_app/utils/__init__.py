@@ -1,11 +1,36 @@
 # Initialize utils package
-# Import utility modules for easier access
+# Utility functions can be imported from the package for easier access.
+# Their modules are only loaded the first time one of their names is used
+# (PEP 562), so importing a single utils module, such as the scanner, does
+# not pay for the archive and hashing modules as well.
 
-from file_organizer_app.utils.file_operations import (
-    archive_files, archive_folder, delete_files, delete_folder,
-    create_compressed_archive, create_folder_archive
-)
+import importlib
 
-from file_organizer_app.utils.file_metadata import (
-    get_file_metadata, find_unused_files
-)
+# Name -> module it is defined in
+_EXPORTS = {
+    "archive_files": "file_operations",
+    "archive_folder": "file_operations",
+    "delete_files": "file_operations",
+    "delete_folder": "file_operations",
+    "create_compressed_archive": "file_operations",
+    "create_folder_archive": "file_operations",
+    "get_file_metadata": "file_metadata",
+    "find_unused_files": "file_metadata",
+    "iter_unused_files": "file_metadata",
+    "FileRecord": "file_record",
+    "FileRecordStore": "file_record",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    # Cache it, so later lookups don't come back here
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,723 @@
+import os
+import time
+import zlib
+import contextlib
+import struct
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple
+
+# Bytes of input compressed as one unit of work
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# zlib level used when none is given (the same default as zipfile and tarfile)
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Supported archive types; 'tar' is stored without compression
+ARCHIVE_TYPES = ('zip', 'tar', 'tar.gz', 'tar.xz', 'tar.zst')
+
+# Compression policies: compress everything, store everything, or store
+# files whose type is already compressed and compress the rest
+COMPRESS_ALWAYS = "always"
+COMPRESS_STORE = "store"
+COMPRESS_AUTO = "auto"
+
+# Extensions of formats that are already compressed, where compressing
+# again costs CPU time and saves next to nothing
+INCOMPRESSIBLE_EXTENSIONS = frozenset([
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.m4a', '.aac', '.ogg', '.opus', '.flac',
+    '.mp4', '.m4v', '.mkv', '.webm', '.avi', '.mov', '.wmv',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar', '.jar', '.apk',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub',
+])
+
+# Deflate looks back at most 32 KiB, so that much of the previous block primes the next one
+DICTIONARY_SIZE = 32 * 1024
+
+# Sizes and offsets above this need the ZIP64 extensions
+ZIP64_LIMIT = 0xFFFFFFFF
+# Stands in a 32-bit header field for a value stored in the ZIP64 extra field
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP_MAX_ENTRIES = 0xFFFF
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_UTF8_FLAG = 0x800
+ZIP_VERSION = 20
+ZIP64_VERSION = 45
+ZIP_CREATE_SYSTEM_UNIX = 3
+
+LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+CENTRAL_HEADER = struct.Struct("<4sBBHHHHHLLLHHHHHLL")
+END_RECORD = struct.Struct("<4sHHHHLLH")
+ZIP64_END_RECORD = struct.Struct("<4sQHHLLQQQQ")
+ZIP64_LOCATOR = struct.Struct("<4sLQL")
+
+def default_workers() -> int:
+    """
+    Gets the number of compression threads to use by default.
+
+    Returns:
+        The number of CPUs available to the process
+    """
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _deflate_block(data: bytes, level: int, dictionary: Optional[bytes], last: bool) -> bytes:
+    """
+    Compresses one block into a piece of a raw deflate stream.
+
+    Every block but the last ends with a sync flush, which aligns the output
+    to a byte boundary without ending the stream, so the compressed blocks
+    can simply be concatenated. The dictionary is the end of the previous
+    block, which lets matches reach back across the block boundary as they
+    would in a serial compressor.
+
+    Args:
+        data: Bytes to compress
+        level: zlib compression level
+        dictionary: End of the previous block of the same stream (optional)
+        last: Whether this block ends the stream
+
+    Returns:
+        The compressed bytes
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+class ArchiveCancelled(Exception):
+    """Raised when the cancel event is set while an archive is written."""
+
+class OrderedCompressor:
+    """
+    Compresses blocks on a thread pool and hands them back in order.
+
+    zlib releases the GIL while it compresses, so the blocks are compressed
+    on all cores at once. At most max_in_flight blocks are pending at any
+    time: submitting another one first waits for the oldest and passes its
+    output to the sink, which keeps memory use bounded however large the
+    input is.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, sink: Callable[[object, bytes], None],
+                 max_in_flight: int = 8, cancel_event: Optional[threading.Event] = None):
+        """
+        Create a compressor.
+
+        Args:
+            executor: Thread pool that compresses the blocks
+            sink: Function called with the tag and compressed bytes of each block, in submission order
+            max_in_flight: Maximum number of blocks submitted but not yet passed to the sink
+            cancel_event: Event that stops compressing when set (optional)
+        """
+        self.executor = executor
+        self.sink = sink
+        self.max_in_flight = max(1, max_in_flight)
+        self.cancel_event = cancel_event
+        self._pending = deque()
+
+    def submit(self, tag: object, compress: Optional[Callable[..., bytes]], data: bytes, *args) -> None:
+        """
+        Queue a block for compression.
+
+        Args:
+            tag: Value passed back to the sink with the compressed block
+            compress: Function called with the data and args that returns the compressed bytes
+                (if None, the data is passed to the sink as it is)
+            data: Bytes to compress
+            *args: Further arguments of the compress function
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ArchiveCancelled()
+        while len(self._pending) >= self.max_in_flight:
+            self._complete_oldest()
+        if compress is None:
+            self._pending.append((tag, None, data))
+        else:
+            self._pending.append((tag, self.executor.submit(compress, data, *args), None))
+
+    def drain(self) -> None:
+        """Wait for every queued block and pass it to the sink."""
+        while self._pending:
+            self._complete_oldest()
+
+    def cancel(self) -> None:
+        """Drop the queued blocks that have not started yet."""
+        while self._pending:
+            future = self._pending.popleft()[1]
+            if future is not None:
+                future.cancel()
+
+    def _complete_oldest(self) -> None:
+        tag, future, data = self._pending.popleft()
+        self.sink(tag, future.result() if future is not None else data)
+
+def should_compress(name: str, compression: str = COMPRESS_AUTO) -> bool:
+    """
+    Decides whether a file is compressed or stored in an archive.
+
+    Args:
+        name: Name of the file
+        compression: Compression policy (COMPRESS_AUTO, COMPRESS_ALWAYS or COMPRESS_STORE)
+
+    Returns:
+        True if the file should be compressed
+    """
+    if compression == COMPRESS_STORE:
+        return False
+    if compression == COMPRESS_AUTO:
+        return os.path.splitext(name)[-1].lower() not in INCOMPRESSIBLE_EXTENSIONS
+    return True
+
+@contextlib.contextmanager
+def _new_archive(archive_path: str) -> Iterator[BinaryIO]:
+    """
+    Opens a new archive file, removing it again if writing it fails.
+
+    Args:
+        archive_path: Path of the archive to create
+
+    Yields:
+        The open archive file
+    """
+    out = open(archive_path, "wb")
+    try:
+        with out:
+            yield out
+    except BaseException:
+        try:
+            os.remove(archive_path)
+        except OSError:
+            pass
+        raise
+
+def _dos_time(timestamp: float) -> Tuple[int, int]:
+    """
+    Converts a timestamp to the date and time fields of a ZIP header.
+
+    Args:
+        timestamp: Modification time of a file
+
+    Returns:
+        Tuple containing the DOS time and DOS date
+    """
+    local = time.localtime(timestamp)
+    if local.tm_year < 1980:
+        # ZIP dates start in 1980
+        return 0, (0 << 9) | (1 << 5) | 1
+    return ((local.tm_hour << 11) | (local.tm_min << 5) | (local.tm_sec // 2),
+            ((local.tm_year - 1980) << 9) | (local.tm_mon << 5) | local.tm_mday)
+
+class _ZipEntry:
+    """A member of a ZIP archive being written."""
+
+    __slots__ = ("name", "flags", "method", "mode", "dos_time", "dos_date", "file_size", "compress_size",
+                 "crc", "header_offset", "zip64")
+
+    def __init__(self, arcname: str, stats: os.stat_result, method: int = ZIP_DEFLATED):
+        try:
+            self.name = arcname.encode("ascii")
+            self.flags = 0
+        except UnicodeEncodeError:
+            self.name = arcname.encode("utf-8")
+            self.flags = ZIP_UTF8_FLAG
+        self.method = method
+        self.mode = stats.st_mode & 0xFFFF
+        self.dos_time, self.dos_date = _dos_time(stats.st_mtime)
+        self.file_size = 0
+        self.compress_size = 0
+        self.crc = 0
+        self.header_offset = 0
+        # Sizes are only known once the entry is written, so like zipfile the
+        # ZIP64 fields are reserved up front for files that could need them
+        self.zip64 = stats.st_size * 1.05 > ZIP64_LIMIT
+
+    def local_header(self) -> bytes:
+        if self.zip64:
+            extra = struct.pack("<HHQQ", 1, 16, self.file_size, self.compress_size)
+            sizes = (ZIP64_MARKER, ZIP64_MARKER)
+        else:
+            extra = b""
+            sizes = (self.compress_size, self.file_size)
+        return LOCAL_HEADER.pack(b"PK\x03\x04", ZIP64_VERSION if self.zip64 else ZIP_VERSION,
+                                 self.flags, self.method, self.dos_time, self.dos_date, self.crc,
+                                 sizes[0], sizes[1], len(self.name), len(extra)) + self.name + extra
+
+    def central_header(self) -> bytes:
+        fields = []
+        file_size, compress_size, header_offset = self.file_size, self.compress_size, self.header_offset
+        if file_size > ZIP64_LIMIT or self.zip64:
+            fields.append(file_size)
+            file_size = ZIP64_MARKER
+        if compress_size > ZIP64_LIMIT or self.zip64:
+            fields.append(compress_size)
+            compress_size = ZIP64_MARKER
+        if header_offset > ZIP64_LIMIT:
+            fields.append(header_offset)
+            header_offset = ZIP64_MARKER
+        extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+        version = ZIP64_VERSION if fields else ZIP_VERSION
+        return CENTRAL_HEADER.pack(b"PK\x01\x02", version, ZIP_CREATE_SYSTEM_UNIX, version, self.flags,
+                                   self.method, self.dos_time, self.dos_date, self.crc, compress_size,
+                                   file_size, len(self.name), len(extra), 0, 0, 0, self.mode << 16,
+                                   header_offset) + self.name + extra
+
+def write_zip(entries: Iterable[Tuple[str, str]], archive_path: str, level: int = DEFAULT_COMPRESS_LEVEL,
+              workers: Optional[int] = None, block_size: int = DEFAULT_BLOCK_SIZE,
+              cancel_event: Optional[threading.Event] = None, compression: str = COMPRESS_AUTO) -> int:
+    """
+    Writes a ZIP archive, compressing on several threads.
+
+    Files are read in blocks and the blocks of all entries are compressed
+    in parallel, so both many small files and a single large file keep
+    every core busy. The compressed blocks are written in order as they
+    complete, and each entry's header is filled in once it is written, so
+    only a bounded number of blocks is held in memory. The result is a
+    standard ZIP archive (with ZIP64 extensions where sizes require them).
+
+    Each entry is deflated or stored according to the compression policy;
+    by default, files that are already compressed are stored.
+
+    Args:
+        entries: Tuples containing the path of each file and its name inside the archive
+        archive_path: Path of the archive to create
+        level: zlib compression level (0-9)
+        workers: Number of compression threads (if None, uses one per CPU)
+        block_size: Bytes of input compressed as one unit of work
+        cancel_event: Event that stops writing when set; raises ArchiveCancelled (optional)
+        compression: Compression policy (COMPRESS_AUTO, COMPRESS_ALWAYS or COMPRESS_STORE)
+
+    Returns:
+        Number of files written to the archive
+    """
+    workers = workers if workers else default_workers()
+    written = []
+
+    with _new_archive(archive_path) as out:
+        def write_block(tag, compressed):
+            entry, first, last = tag
+            if first:
+                entry.header_offset = out.tell()
+                out.write(entry.local_header())
+            out.write(compressed)
+            entry.compress_size += len(compressed)
+            if last:
+                if not entry.zip64 and (entry.file_size > ZIP64_LIMIT or entry.compress_size > ZIP64_LIMIT):
+                    raise OSError(f"{entry.name.decode('utf-8')} grew past 4 GiB while it was archived")
+                # Fill in the CRC and sizes now that they are known
+                end = out.tell()
+                out.seek(entry.header_offset)
+                out.write(entry.local_header())
+                out.seek(end)
+                written.append(entry)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            compressor = OrderedCompressor(executor, write_block, workers * 4, cancel_event)
+            try:
+                for file_path, arcname in entries:
+                    with open(file_path, "rb") as f:
+                        compress = should_compress(arcname, compression)
+                        entry = _ZipEntry(arcname.replace(os.sep, "/"), os.fstat(f.fileno()),
+                                          ZIP_DEFLATED if compress else ZIP_STORED)
+                        data = f.read(block_size)
+                        dictionary = None
+                        first = True
+                        while True:
+                            # Read one block ahead to know whether this one is the last
+                            following = f.read(block_size) if len(data) == block_size else b""
+                            entry.crc = zlib.crc32(data, entry.crc)
+                            entry.file_size += len(data)
+                            last = not following
+                            if compress:
+                                compressor.submit((entry, first, last), _deflate_block, data, level,
+                                                  dictionary, last)
+                            else:
+                                compressor.submit((entry, first, last), None, data)
+                            if last:
+                                break
+                            dictionary = data[-DICTIONARY_SIZE:]
+                            first = False
+                            data = following
+                compressor.drain()
+            except BaseException:
+                compressor.cancel()
+                raise
+
+        _write_central_directory(out, written)
+
+    return len(written)
+
+def _write_central_directory(out: BinaryIO, entries: list) -> None:
+    """
+    Writes the central directory and end records of a ZIP archive.
+
+    Args:
+        out: Archive file, positioned after the last entry
+        entries: The entries of the archive in the order they were written
+    """
+    start = out.tell()
+    for entry in entries:
+        out.write(entry.central_header())
+    size = out.tell() - start
+
+    count = len(entries)
+    if count > ZIP_MAX_ENTRIES or start > ZIP64_LIMIT or size > ZIP64_LIMIT:
+        zip64_end = out.tell()
+        out.write(ZIP64_END_RECORD.pack(b"PK\x06\x06", ZIP64_END_RECORD.size - 12,
+                                        (ZIP_CREATE_SYSTEM_UNIX << 8) | ZIP64_VERSION, ZIP64_VERSION,
+                                        0, 0, count, count, size, start))
+        out.write(ZIP64_LOCATOR.pack(b"PK\x06\x07", 0, zip64_end, 1))
+    out.write(END_RECORD.pack(b"PK\x05\x06", 0, 0, min(count, ZIP_MAX_ENTRIES), min(count, ZIP_MAX_ENTRIES),
+                              ZIP64_MARKER if size > ZIP64_LIMIT else size,
+                              ZIP64_MARKER if start > ZIP64_LIMIT else start, 0))
+
+
+class _GzipCodec:
+    """Block codec producing one gzip member out of deflate blocks chained like pigz does."""
+
+    suffix = "gz"
+    block_size = DEFAULT_BLOCK_SIZE
+    default_level = DEFAULT_COMPRESS_LEVEL
+    # Level 0 writes stored deflate blocks, which costs little more than a copy
+    store_level = 0
+
+    def header(self, level: int) -> bytes:
+        # Magic, deflate, no flags, modification time, extra flags, Unix
+        xfl = 2 if level == 9 else 4 if level == 1 else 0
+        return struct.pack("<BBBBLBB", 0x1F, 0x8B, 8, 0, int(time.time()), xfl, 3)
+
+    def compress(self, data: bytes, level: int, dictionary: Optional[bytes], last: bool) -> bytes:
+        return _deflate_block(data, level, dictionary, last)
+
+    def trailer(self, crc: int, size: int) -> bytes:
+        return struct.pack("<LL", crc, size & 0xFFFFFFFF)
+
+def _xz_varint(value: int) -> bytes:
+    # xz multibyte integer: 7 bits per byte, least significant first
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _xz_padding(size: int) -> bytes:
+    return b"\0" * (-size % 4)
+
+def _xz_store(data: bytes) -> bytes:
+    """
+    Wraps bytes in an xz stream without compressing them.
+
+    Even its fastest preset makes LZMA spend seconds per hundred megabytes
+    on data that will not shrink, so incompressible data is written as
+    uncompressed LZMA2 chunks instead, which every xz reader accepts.
+
+    Args:
+        data: Bytes to store
+
+    Returns:
+        A complete xz stream with a CRC32 check
+    """
+    flags = b"\x00\x01"
+    out = [b"\xfd7zXZ\x00", flags, struct.pack("<L", zlib.crc32(flags))]
+
+    records = []
+    if data:
+        # Header size in 4-byte units minus one, no optional sizes, one filter:
+        # LZMA2 with the smallest dictionary, since nothing refers back to it
+        block_header = b"\x02\x00\x21\x01\x00" + b"\0" * 3
+        block_header += struct.pack("<L", zlib.crc32(block_header))
+        chunks = bytearray()
+        for start in range(0, len(data), 65536):
+            piece = data[start:start + 65536]
+            # Uncompressed chunk that resets the dictionary
+            chunks += b"\x01" + struct.pack(">H", len(piece) - 1) + piece
+        chunks += b"\x00"
+        unpadded = len(block_header) + len(chunks) + 4
+        out += [block_header, bytes(chunks), _xz_padding(len(block_header) + len(chunks)),
+                struct.pack("<L", zlib.crc32(data))]
+        records.append((unpadded, len(data)))
+
+    index = b"\x00" + _xz_varint(len(records))
+    for unpadded, size in records:
+        index += _xz_varint(unpadded) + _xz_varint(size)
+    index += _xz_padding(len(index))
+    index += struct.pack("<L", zlib.crc32(index))
+    out.append(index)
+
+    footer = struct.pack("<L", len(index) // 4 - 1) + flags
+    out += [struct.pack("<L", zlib.crc32(footer)), footer, b"YZ"]
+    return b"".join(out)
+
+class _XzCodec:
+    """Block codec producing concatenated xz streams, which xz readers decode as one."""
+
+    suffix = "xz"
+    # Bigger blocks, since LZMA gains from a long history
+    block_size = 8 * 1024 * 1024
+    default_level = 6
+    # None stores the data in uncompressed LZMA2 chunks
+    store_level = None
+
+    def header(self, level: int) -> bytes:
+        return b""
+
+    def compress(self, data: bytes, level: Optional[int], dictionary: Optional[bytes], last: bool) -> bytes:
+        if level is None:
+            return _xz_store(data)
+        # Loaded here so importing this module stays cheap for zip and gzip archives
+        import lzma
+        return lzma.compress(data, preset=level)
+
+    def trailer(self, crc: int, size: int) -> bytes:
+        return b""
+
+def _load_zstd() -> Optional[Callable[[bytes, int], bytes]]:
+    """
+    Loads a zstd compression function.
+
+    The zstandard package is used if it is installed, otherwise the
+    compression.zstd module of the standard library (Python 3.14+).
+
+    Returns:
+        Function compressing bytes at a level into one zstd frame, or None if zstd is not available
+    """
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        # Compressor objects are not thread-safe, so each thread keeps its own per level
+        local = threading.local()
+
+        def compress(data, level):
+            compressors = getattr(local, "compressors", None)
+            if compressors is None:
+                compressors = local.compressors = {}
+            compressor = compressors.get(level)
+            if compressor is None:
+                compressor = compressors[level] = zstandard.ZstdCompressor(level=level)
+            return compressor.compress(data)
+        return compress
+
+    try:
+        from compression import zstd
+    except ImportError:
+        return None
+    return lambda data, level: zstd.compress(data, level)
+
+class _ZstdCodec:
+    """Block codec producing concatenated zstd frames, which zstd readers decode as one."""
+
+    suffix = "zst"
+    block_size = 4 * 1024 * 1024
+    default_level = 3
+    # zstd stores incompressible blocks raw on its own; the fastest level finds out quickest
+    store_level = 1
+
+    def __init__(self):
+        self._compress = _load_zstd()
+        if self._compress is None:
+            raise OSError("tar.zst archives need the zstandard package or Python 3.14 or newer")
+
+    def header(self, level: int) -> bytes:
+        return b""
+
+    def compress(self, data: bytes, level: int, dictionary: Optional[bytes], last: bool) -> bytes:
+        return self._compress(data, level)
+
+    def trailer(self, crc: int, size: int) -> bytes:
+        return b""
+
+# Codec name -> block codec class
+CODECS = {"gz": _GzipCodec, "xz": _XzCodec, "zst": _ZstdCodec}
+
+class ParallelCompressWriter:
+    """
+    A write-only file object that compresses what is written to it on several threads.
+
+    The input is cut into blocks that are compressed in parallel and
+    written out in order. For gzip the blocks are chained into one member
+    the way pigz does it; for xz and zstd each block becomes its own stream
+    or frame, which their readers decode back to back. Either way any
+    standard tool can decompress the result. Only a bounded number of
+    blocks is held in memory, so it can sit under a streaming writer such
+    as tarfile's 'w|' mode.
+
+    Setting store to True makes the following blocks use the codec's
+    cheapest level, for input that is known to be compressed already.
+    """
+
+    def __init__(self, fileobj: BinaryIO, codec: str = "gz", level: Optional[int] = None,
+                 workers: Optional[int] = None, block_size: Optional[int] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        """
+        Start a compressed stream.
+
+        Args:
+            fileobj: File the compressed stream is written to
+            codec: Compression format ('gz', 'xz' or 'zst')
+            level: Compression level (if None, uses the codec's default)
+            workers: Number of compression threads (if None, uses one per CPU)
+            block_size: Bytes of input compressed as one unit of work (if None, uses the codec's default)
+            cancel_event: Event that stops writing when set; raises ArchiveCancelled (optional)
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec: {codec}")
+        workers = workers if workers else default_workers()
+        self.codec = CODECS[codec]()
+        self.fileobj = fileobj
+        self.level = level if level is not None else self.codec.default_level
+        self.block_size = block_size if block_size else self.codec.block_size
+        self._store = False
+        self._buffer = bytearray()
+        self._dictionary = None
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._compressor = OrderedCompressor(self._executor, lambda tag, data: self.fileobj.write(data),
+                                             workers * 2, cancel_event)
+        self.fileobj.write(self.codec.header(self.level))
+
+    @property
+    def store(self) -> bool:
+        return self._store
+
+    @store.setter
+    def store(self, store: bool) -> None:
+        if store != self._store and self._buffer:
+            # End the block here so the data written so far keeps its own level
+            self._submit(bytes(self._buffer), last=False)
+            self._buffer = bytearray()
+        self._store = store
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) > self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]), last=False)
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes, last: bool) -> None:
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        level = self.codec.store_level if self._store else self.level
+        self._compressor.submit(None, self.codec.compress, block, level, self._dictionary, last)
+        self._dictionary = block[-DICTIONARY_SIZE:]
+
+    def close(self) -> None:
+        """Compress the rest of the input and end the stream (the file itself stays open)."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._submit(bytes(self._buffer), last=True)
+            self._buffer = bytearray()
+            self._compressor.drain()
+            self.fileobj.write(self.codec.trailer(self._crc, self._size))
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        """Stop compressing without finishing the stream."""
+        self._closed = True
+        self._compressor.cancel()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_tar(entries: Iterable[Tuple[str, str]], archive_path: str, codec: Optional[str] = "gz",
+              level: Optional[int] = None, workers: Optional[int] = None, block_size: Optional[int] = None,
+              cancel_event: Optional[threading.Event] = None, compression: str = COMPRESS_AUTO) -> int:
+    """
+    Writes a TAR archive, compressing it on several threads.
+
+    With the auto policy, the parts of the stream that hold already
+    compressed files are passed through at the codec's cheapest level
+    instead of being compressed again.
+
+    Args:
+        entries: Tuples containing the path of each file or folder and its name inside the
+            archive (folders are added with their contents)
+        archive_path: Path of the archive to create
+        codec: Compression format ('gz', 'xz' or 'zst'), or None for an uncompressed archive
+        level: Compression level (if None, uses the codec's default)
+        workers: Number of compression threads (if None, uses one per CPU)
+        block_size: Bytes of input compressed as one unit of work (if None, uses the codec's default)
+        cancel_event: Event that stops writing when set; raises ArchiveCancelled (optional)
+        compression: Compression policy (COMPRESS_AUTO, COMPRESS_ALWAYS or COMPRESS_STORE)
+
+    Returns:
+        Number of members written to the archive
+    """
+    count = 0
+    stream = None
+
+    def check_member(tarinfo):
+        nonlocal count
+        if cancel_event is not None and cancel_event.is_set():
+            raise ArchiveCancelled()
+        if stream is not None and tarinfo.isfile():
+            # Applies to the blocks buffered from here on, which hold this member's data
+            stream.store = not should_compress(tarinfo.name, compression)
+        count += 1
+        return tarinfo
+
+    # Loaded here so importing this module stays cheap for zip archives
+    import tarfile
+
+    with _new_archive(archive_path) as out:
+        if codec is None:
+            with tarfile.open(fileobj=out, mode="w") as tarf:
+                for path, arcname in entries:
+                    tarf.add(path, arcname=arcname, filter=check_member)
+            return count
+
+        with ParallelCompressWriter(out, codec, level, workers, block_size, cancel_event) as stream:
+            # Stream mode writes the tar data straight through in order
+            with tarfile.open(fileobj=stream, mode="w|") as tarf:
+                for path, arcname in entries:
+                    tarf.add(path, arcname=arcname, filter=check_member)
+    return count
+
+def write_archive(entries: Iterable[Tuple[str, str]], archive_path: str, archive_type: str,
+                  cancel_event: Optional[threading.Event] = None, workers: Optional[int] = None,
+                  compression: str = COMPRESS_AUTO) -> int:
+    """
+    Writes an archive of the given type.
+
+    Args:
+        entries: Tuples containing the path of each file and its name inside the archive
+        archive_path: Path of the archive to create
+        archive_type: One of ARCHIVE_TYPES
+        cancel_event: Event that stops writing when set; raises ArchiveCancelled (optional)
+        workers: Number of compression threads (if None, uses one per CPU)
+        compression: Compression policy (COMPRESS_AUTO, COMPRESS_ALWAYS or COMPRESS_STORE)
+
+    Returns:
+        Number of entries written to the archive
+    """
+    if archive_type not in ARCHIVE_TYPES:
+        raise ValueError(f"Unsupported archive type: {archive_type}")
+    if archive_type == 'zip':
+        return write_zip(entries, archive_path, workers=workers, cancel_event=cancel_event,
+                         compression=compression)
+    # 'tar' is uncompressed, otherwise the suffix names the codec
+    codec = archive_type.split('.', 1)[1] if '.' in archive_type else None
+    return write_tar(entries, archive_path, codec, workers=workers, cancel_event=cancel_event,
+                     compression=compression)
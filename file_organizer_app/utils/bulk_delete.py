@@ -0,0 +1,350 @@
+import errno
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from file_organizer_app.utils.archive_writer import default_workers
+
+# Deleting is bound by metadata round trips, not CPU, so even one core
+# benefits from many requests in flight (especially on network storage)
+MIN_DELETE_WORKERS = 8
+# Files unlinked per task; large directories are split into several tasks
+DELETE_BATCH_SIZE = 512
+# Seconds between progress reports
+PROGRESS_INTERVAL = 1.0
+
+_DIR_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)
+# Directories are opened without following a symlink swapped in for them
+_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+_HAVE_DIR_FD = os.unlink in os.supports_dir_fd and os.scandir in os.supports_fd
+
+def default_delete_workers() -> int:
+    """
+    Gets the number of delete threads to use by default.
+
+    Returns:
+        Four threads per CPU, at least MIN_DELETE_WORKERS
+    """
+    return max(MIN_DELETE_WORKERS, 4 * default_workers())
+
+class DeleteStats:
+    """Throughput of a bulk delete."""
+
+    def __init__(self):
+        self.files = 0
+        self.directories = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._started = None
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    def _start(self) -> None:
+        self._started = time.perf_counter() - self.seconds
+
+    def _add(self, files: int = 0, directories: int = 0, errors: int = 0,
+             progress_callback: Optional[Callable[['DeleteStats'], None]] = None) -> None:
+        with self._lock:
+            self.files += files
+            self.directories += directories
+            self.errors += errors
+            self.seconds = time.perf_counter() - self._started
+            if not progress_callback or self.seconds - self._last_report < PROGRESS_INTERVAL:
+                return
+            self._last_report = self.seconds
+        progress_callback(self)
+
+    def __str__(self) -> str:
+        text = f"{self.files} files"
+        if self.directories:
+            text += f" and {self.directories} folders"
+        text += f" in {self.seconds:.2f}s ({self.files_per_second:.0f} files/s)"
+        if self.errors:
+            text += f", {self.errors} errors"
+        return text
+
+def _unlink_batch(parent: str, names: List[str], stats: DeleteStats,
+                  cancel_event: Optional[threading.Event],
+                  progress_callback: Optional[Callable[[DeleteStats], None]]) -> List[str]:
+    """
+    Deletes files that share a parent directory.
+
+    The directory is opened once and each file is unlinked relative to it,
+    so the server or filesystem only resolves the parent path once per batch.
+
+    Returns:
+        List of errors
+    """
+    errors = []
+    deleted = 0
+    dir_fd = None
+
+    if _HAVE_DIR_FD:
+        try:
+            dir_fd = os.open(parent or '.', _DIR_FLAGS)
+        except FileNotFoundError:
+            errors.extend(f"File not found: {os.path.join(parent, name)}" for name in names)
+            stats._add(errors=len(errors), progress_callback=progress_callback)
+            return errors
+        except OSError:
+            dir_fd = None
+
+    try:
+        for name in names:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            path = os.path.join(parent, name)
+            try:
+                if dir_fd is not None:
+                    os.unlink(name, dir_fd=dir_fd)
+                else:
+                    os.unlink(path)
+                deleted += 1
+            except FileNotFoundError:
+                errors.append(f"File not found: {path}")
+            except OSError as e:
+                if e.errno in (errno.EISDIR, errno.EPERM) and os.path.isdir(path):
+                    errors.append(f"Error deleting {path}: is a folder")
+                else:
+                    errors.append(f"Error deleting {path}: {str(e)}")
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+    stats._add(files=deleted, errors=len(errors), progress_callback=progress_callback)
+    return errors
+
+def delete_paths(file_paths: List[str], workers: Optional[int] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 progress_callback: Optional[Callable[[DeleteStats], None]] = None,
+                 stats: Optional[DeleteStats] = None) -> Tuple[int, List[str]]:
+    """
+    Deletes many files on several threads.
+
+    Files are grouped by parent directory and each group is deleted with
+    unlink calls relative to an open handle on the directory, in batches
+    spread over a thread pool. Errors are collected and never stop the
+    other deletes. Folders are not deleted; use delete_tree for those.
+
+    Args:
+        file_paths: List of file paths to delete
+        workers: Number of delete threads (if None, uses default_delete_workers())
+        cancel_event: Event that stops deleting when set; whatever was not deleted yet is kept (optional)
+        progress_callback: Function called about once a second with the DeleteStats so far (optional)
+        stats: DeleteStats to record the throughput in (optional)
+
+    Returns:
+        Tuple containing count of successfully deleted files and list of errors
+    """
+    if stats is None:
+        stats = DeleteStats()
+    stats._start()
+    deleted_before = stats.files
+
+    groups: Dict[str, List[str]] = {}
+    for file_path in file_paths:
+        parent, name = os.path.split(file_path)
+        groups.setdefault(parent, []).append(name)
+
+    batches = [(parent, names[i:i + DELETE_BATCH_SIZE])
+               for parent, names in groups.items()
+               for i in range(0, len(names), DELETE_BATCH_SIZE)]
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers or default_delete_workers()) as executor:
+        futures = [executor.submit(_unlink_batch, parent, names, stats, cancel_event, progress_callback)
+                   for parent, names in batches]
+        for future in futures:
+            errors.extend(future.result())
+
+    stats._add()
+    return stats.files - deleted_before, errors
+
+class _TreeNode:
+    """A directory being emptied; removed once its listing and all subdirectories are done."""
+
+    __slots__ = ('path', 'parent', 'identity', 'pending', 'failed')
+
+    def __init__(self, path: str, parent: Optional['_TreeNode'], identity: Tuple[int, int]):
+        self.path = path
+        self.parent = parent
+        # Device and inode the directory had when it was listed, checked again when it is opened
+        self.identity = identity
+        self.pending = 1
+        self.failed = False
+
+class _TreeRemover:
+    """
+    Removes a directory tree bottom-up on a thread pool.
+
+    Each directory is listed by one task, which unlinks its files and
+    submits a task per subdirectory. A directory is removed by whichever
+    task finishes its last pending child, so independent branches are
+    emptied and removed in parallel. A directory that could not be emptied
+    is kept, along with all its parents, and reported once.
+
+    Subdirectories are opened by path in their own tasks, so each one is
+    opened without following symlinks and must still be the directory its
+    parent listed; if it was replaced in between, it is left alone.
+    """
+
+    def __init__(self, workers: int, cancel_event: Optional[threading.Event],
+                 progress_callback: Optional[Callable[[DeleteStats], None]], stats: DeleteStats):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.cancel_event = cancel_event
+        self.progress_callback = progress_callback
+        self.stats = stats
+        self.errors = []
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.done = threading.Condition(self.lock)
+
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def run(self, path: str) -> List[str]:
+        stats = os.lstat(path)
+        self._submit(_TreeNode(path, None, (stats.st_dev, stats.st_ino)))
+        with self.done:
+            while self.outstanding:
+                self.done.wait()
+        self.executor.shutdown()
+        return self.errors
+
+    def _submit(self, node: _TreeNode) -> None:
+        with self.lock:
+            self.outstanding += 1
+        self.executor.submit(self._task, node)
+
+    def _task(self, node: _TreeNode) -> None:
+        try:
+            self._clear(node)
+        except Exception as e:
+            self._error(node, f"Error deleting folder {node.path}: {str(e)}")
+            self._finish(node)
+        finally:
+            with self.done:
+                self.outstanding -= 1
+                if not self.outstanding:
+                    self.done.notify_all()
+
+    def _error(self, node: _TreeNode, message: str) -> None:
+        with self.lock:
+            self.errors.append(message)
+            node.failed = True
+        self.stats._add(errors=1, progress_callback=self.progress_callback)
+
+    def _clear(self, node: _TreeNode) -> None:
+        if self.cancelled():
+            node.failed = True
+            self._finish(node)
+            return
+
+        subdirs = []
+        deleted = 0
+        dir_fd = os.open(node.path, _DIR_FLAGS | _NOFOLLOW) if _HAVE_DIR_FD else None
+        try:
+            stats = os.fstat(dir_fd) if dir_fd is not None else os.lstat(node.path)
+            if (stats.st_dev, stats.st_ino) != node.identity:
+                raise OSError(errno.ESTALE, "Folder was replaced while deleting", node.path)
+            with os.scandir(dir_fd if dir_fd is not None else node.path) as entries:
+                for entry in entries:
+                    if self.cancelled():
+                        node.failed = True
+                        break
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir:
+                            entry_stats = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        subdirs.append((os.path.join(node.path, entry.name),
+                                        (entry_stats.st_dev, entry_stats.st_ino)))
+                        continue
+                    try:
+                        if dir_fd is not None:
+                            os.unlink(entry.name, dir_fd=dir_fd)
+                        else:
+                            os.unlink(entry.path)
+                        deleted += 1
+                    except FileNotFoundError:
+                        deleted += 1
+                    except OSError as e:
+                        self._error(node, f"Error deleting {os.path.join(node.path, entry.name)}: {str(e)}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+        self.stats._add(files=deleted, progress_callback=self.progress_callback)
+
+        with self.lock:
+            node.pending += len(subdirs)
+        for subdir, identity in subdirs:
+            self._submit(_TreeNode(subdir, node, identity))
+        self._finish(node)
+
+    def _finish(self, node: _TreeNode) -> None:
+        """Marks one piece of a directory done, removing it and walking up when it was the last."""
+        while node is not None:
+            with self.lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+                failed = node.failed
+                if failed and node.parent is not None:
+                    node.parent.failed = True
+
+            if not failed:
+                try:
+                    os.rmdir(node.path)
+                    self.stats._add(directories=1, progress_callback=self.progress_callback)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self._error(node, f"Error deleting folder {node.path}: {str(e)}")
+                    if node.parent is not None:
+                        with self.lock:
+                            node.parent.failed = True
+            node = node.parent
+
+def delete_tree(folder_path: str, workers: Optional[int] = None,
+                cancel_event: Optional[threading.Event] = None,
+                progress_callback: Optional[Callable[[DeleteStats], None]] = None,
+                stats: Optional[DeleteStats] = None) -> List[str]:
+    """
+    Deletes a folder and all its contents on several threads.
+
+    Directories are listed and emptied in parallel and removed bottom-up as
+    soon as everything below them is gone. Symbolic links are removed, never
+    followed. Errors are collected and never stop the rest of the tree from
+    being deleted; the folders that contain files that could not be deleted
+    are kept.
+
+    Args:
+        folder_path: Path to the folder to delete
+        workers: Number of delete threads (if None, uses default_delete_workers())
+        cancel_event: Event that stops deleting when set; whatever was not deleted yet is kept (optional)
+        progress_callback: Function called about once a second with the DeleteStats so far (optional)
+        stats: DeleteStats to record the throughput in (optional)
+
+    Returns:
+        List of errors
+    """
+    if stats is None:
+        stats = DeleteStats()
+    stats._start()
+
+    if os.path.islink(folder_path) or not os.path.isdir(folder_path):
+        raise NotADirectoryError(errno.ENOTDIR, "Not a folder", folder_path)
+
+    remover = _TreeRemover(workers or default_delete_workers(), cancel_event, progress_callback, stats)
+    errors = remover.run(folder_path)
+    stats._add()
+    return errors
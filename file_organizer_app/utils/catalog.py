@@ -0,0 +1,455 @@
+import os
+import stat
+import sqlite3
+import datetime
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from file_organizer_app.utils.file_record import FileRecord, FileRecordStore
+from file_organizer_app.utils.file_organizer import PARTIAL_HASH_SIZE, get_file_hash, get_partial_hash
+from file_organizer_app.utils.hash_pool import hash_files
+
+# Default location of the on-disk file catalog
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".file_organizer", "catalog.db")
+
+# Number of directories refreshed between commits
+COMMIT_INTERVAL = 200
+
+def _prefix_range(root: str) -> Tuple[str, str]:
+    """
+    Gets the bounds of a range query matching every path below a directory.
+
+    Args:
+        root: Absolute path of the directory
+
+    Returns:
+        Tuple containing the inclusive lower and exclusive upper bound
+    """
+    prefix = os.path.join(root, "")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+class Catalog:
+    """
+    Persistent index of files backed by SQLite.
+
+    The catalog stores the path, size, timestamps, extension and (once
+    computed) content hash of every file under the refreshed directories.
+    A refresh only lists the directories whose modification time changed
+    since the last one; any other directory is known to contain the same
+    entries, so its files are not listed or stat-ed again and only its
+    subdirectories are visited. Queries for unused files, duplicates and
+    directory listings then run against the indexes instead of the disk.
+
+    A directory's modification time does not change when a file in it is
+    rewritten in place or merely read, so sizes and timestamps of such files
+    are only updated by a full refresh. Queries therefore stat each file
+    they are about to report: files that are gone are dropped, changed
+    files are updated and their stored hash is discarded, so results never
+    rest on stale rows.
+    """
+
+    def __init__(self, db_path: str = None):
+        """
+        Open (or create) a catalog.
+
+        Args:
+            db_path: Path of the SQLite database (if None, uses DEFAULT_CATALOG_PATH)
+        """
+        self.db_path = db_path if db_path else DEFAULT_CATALOG_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+
+        # Refreshes run in worker threads, so the connection is shared behind a lock
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            " path TEXT PRIMARY KEY,"
+            " parent TEXT,"
+            " mtime_ns INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " dir TEXT NOT NULL,"
+            " extension TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " ctime REAL NOT NULL,"
+            " mtime REAL NOT NULL,"
+            " atime REAL NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " hash TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_atime ON files (atime)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (hash)")
+        self._conn.commit()
+
+    def refresh(self, root: str, full: bool = False,
+                cancel_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """
+        Brings the catalog up to date with a directory tree.
+
+        Args:
+            root: Path to the directory to refresh
+            full: Whether to list every directory, even if its modification time is unchanged
+            cancel_event: Event that stops the refresh when set; directories
+                refreshed so far are kept (optional)
+
+        Returns:
+            Dictionary containing the number of directories listed and skipped,
+            and the number of files added, updated and removed
+        """
+        root = os.path.abspath(root)
+        counts = {"dirs_listed": 0, "dirs_skipped": 0,
+                  "files_added": 0, "files_updated": 0, "files_removed": 0}
+        stack = [root]
+
+        with self._lock:
+            while stack:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+
+                current = stack.pop()
+                try:
+                    dir_stats = os.stat(current)
+                except OSError:
+                    # The directory is gone; forget it and everything below it
+                    counts["files_removed"] += self._remove_tree(current)
+                    continue
+
+                row = self._conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (current,)).fetchone()
+                if row is not None and row[0] == dir_stats.st_mtime_ns and not full:
+                    # Same entries as last time, so only its subdirectories can have changed
+                    subdirs = [r[0] for r in self._conn.execute(
+                        "SELECT path FROM dirs WHERE parent = ? ORDER BY path", (current,))]
+                    stack.extend(reversed(subdirs))
+                    counts["dirs_skipped"] += 1
+                    continue
+
+                subdirs = self._list_directory(current, dir_stats, counts)
+                if subdirs is None:
+                    continue
+                stack.extend(reversed(subdirs))
+
+                counts["dirs_listed"] += 1
+                if counts["dirs_listed"] % COMMIT_INTERVAL == 0:
+                    self._conn.commit()
+
+            self._conn.commit()
+
+        return counts
+
+    def _list_directory(self, path: str, dir_stats: os.stat_result,
+                        counts: Dict[str, int]) -> Optional[List[str]]:
+        """
+        Lists one directory and updates its files and subdirectories in the catalog.
+
+        Args:
+            path: Absolute path of the directory
+            dir_stats: Result of os.stat for the directory, taken before listing it
+            counts: Refresh counters to update
+
+        Returns:
+            Sorted list of subdirectory paths, or None if the directory could not be listed
+        """
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            # Directory symlinks are not followed, as in scan_files
+                            if not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            continue
+                        files.append((entry.path, entry.stat()))
+                    except OSError as e:
+                        print(f"Error processing {entry.path}: {e}")
+        except OSError as e:
+            print(f"Error scanning {path}: {e}")
+            return None
+
+        known = {r[0]: (r[1], r[2]) for r in self._conn.execute(
+            "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (path,))}
+
+        rows = []
+        for file_path, stats in files:
+            previous = known.pop(file_path, None)
+            if previous is None:
+                counts["files_added"] += 1
+            elif previous != (stats.st_size, stats.st_mtime_ns):
+                counts["files_updated"] += 1
+            rows.append((file_path, path, os.path.splitext(file_path)[1].lower(), stats.st_size,
+                         stats.st_ctime, stats.st_mtime, stats.st_atime, stats.st_mtime_ns,
+                         stats.st_size, stats.st_mtime_ns, file_path))
+
+        # Keep the stored hash while the content is unchanged
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files (path, dir, extension, size, ctime, mtime, atime, mtime_ns, hash)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?,"
+            " (SELECT hash FROM files WHERE size = ? AND mtime_ns = ? AND path = ?))",
+            rows
+        )
+
+        if known:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in known])
+            counts["files_removed"] += len(known)
+
+        # Forget subdirectories that were removed or renamed
+        subdirs.sort()
+        present = set(subdirs)
+        for r in self._conn.execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall():
+            if r[0] not in present:
+                counts["files_removed"] += self._remove_tree(r[0])
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+            (path, os.path.dirname(path), dir_stats.st_mtime_ns)
+        )
+        return subdirs
+
+    def _remove_tree(self, path: str) -> int:
+        """
+        Removes a directory and everything below it from the catalog.
+
+        Args:
+            path: Absolute path of the directory
+
+        Returns:
+            Number of files removed
+        """
+        low, high = _prefix_range(path)
+        removed = self._conn.execute("DELETE FROM files WHERE path >= ? AND path < ?", (low, high)).rowcount
+        self._conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+        return removed
+
+    def _restat(self, rows: List[Tuple[str, int, int, Optional[str]]]
+                ) -> List[Tuple[str, os.stat_result, Optional[str]]]:
+        """
+        Checks catalogued files against the disk before their rows are used.
+
+        Files that no longer exist are removed from the catalog. The rows of
+        the others are updated with their current size and timestamps, and
+        the stored hash is dropped if the size or modification time changed.
+
+        Args:
+            rows: (path, size, mtime_ns, hash) rows of the files
+
+        Returns:
+            List of (path, current stat result, hash or None if it is no
+            longer valid) for the files that still exist
+        """
+        current = []
+        removed = []
+        updated = []
+        for path, size, mtime_ns, file_hash in rows:
+            try:
+                stats = os.stat(path)
+            except OSError:
+                removed.append((path,))
+                continue
+            if stat.S_ISDIR(stats.st_mode):
+                removed.append((path,))
+                continue
+            if (stats.st_size, stats.st_mtime_ns) != (size, mtime_ns):
+                file_hash = None
+            updated.append((stats.st_size, stats.st_ctime, stats.st_mtime, stats.st_atime,
+                            stats.st_mtime_ns, file_hash, path))
+            current.append((path, stats, file_hash))
+
+        with self._lock:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            self._conn.executemany(
+                "UPDATE files SET size = ?, ctime = ?, mtime = ?, atime = ?, mtime_ns = ?, hash = ?"
+                " WHERE path = ?", updated)
+            self._conn.commit()
+        return current
+
+    def list_files(self, root: str) -> FileRecordStore:
+        """
+        Lists the catalogued files below a directory.
+
+        Args:
+            root: Path to the directory
+
+        Returns:
+            FileRecordStore containing the files, ordered by path
+        """
+        low, high = _prefix_range(os.path.abspath(root))
+        store = FileRecordStore()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, ctime, mtime, atime, extension FROM files"
+                " WHERE path >= ? AND path < ? ORDER BY path", (low, high))
+            store.extend(FileRecord(*row) for row in rows)
+        return store
+
+    def unused_files(self, root: str, days: int = 90) -> List[FileRecord]:
+        """
+        Finds catalogued files below a directory that haven't been accessed in the specified number of days.
+
+        Each candidate is stat-ed again, so files read or removed since the
+        last refresh are not reported.
+
+        Args:
+            root: Path to the directory
+            days: Number of days to consider a file unused
+
+        Returns:
+            List of FileRecords for the unused files, ordered by path
+        """
+        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
+        low, high = _prefix_range(os.path.abspath(root))
+        cutoff = cutoff_date.timestamp()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, hash, extension FROM files"
+                " WHERE atime < ? AND path >= ? AND path < ? ORDER BY path",
+                (cutoff, low, high)).fetchall()
+        extensions = {row[0]: row[4] for row in rows}
+
+        return [FileRecord(path, stats.st_size, stats.st_ctime, stats.st_mtime, stats.st_atime,
+                           extensions[path])
+                for path, stats, _ in self._restat([row[:4] for row in rows])
+                if stats.st_atime < cutoff]
+
+    def duplicates(self, root: str, workers: Optional[int] = None,
+                   cancel_event: Optional[threading.Event] = None) -> List[Tuple[str, str]]:
+        """
+        Finds duplicate files below a directory.
+
+        Only files that share a size with another catalogued file are
+        considered. Each of them is stat-ed again first: files that are gone
+        are dropped, and a stored hash is only used while the file's size
+        and modification time are unchanged. Files without a valid hash are
+        compared by a partial hash first, and full hashes are computed for
+        those that still collide and stored for later searches. A file whose
+        size changed since the last refresh is only compared with the other
+        candidates, so a refresh can find duplicates this search misses.
+
+        Args:
+            root: Path to the directory
+            workers: Number of hashing workers (if None, chosen from the core count)
+            cancel_event: Event that stops hashing when set (optional)
+
+        Returns:
+            List of tuples containing paths of duplicate files
+        """
+        low, high = _prefix_range(os.path.abspath(root))
+        with self._lock:
+            stored = self._conn.execute(
+                "SELECT path, size, mtime_ns, hash FROM files WHERE path >= ? AND path < ? AND size IN"
+                " (SELECT size FROM files WHERE path >= ? AND path < ? GROUP BY size HAVING COUNT(*) > 1)"
+                " ORDER BY path", (low, high, low, high)).fetchall()
+
+        # Group by the current sizes, since files can have changed since the refresh
+        current = self._restat(stored)
+        size_counts = {}
+        for _, stats, _ in current:
+            size_counts[stats.st_size] = size_counts.get(stats.st_size, 0) + 1
+        rows = [(path, stats.st_size, file_hash) for path, stats, file_hash in current
+                if size_counts[stats.st_size] > 1]
+
+        full_hashes = {path: file_hash for path, _, file_hash in rows if file_hash}
+
+        # Small files are read whole by the partial hash anyway, so hash them in full
+        sizes = {path: size for path, size, file_hash in rows if not file_hash}
+        to_hash = [path for path, size in sizes.items() if size <= PARTIAL_HASH_SIZE * 2]
+        large = [(path, size) for path, size in sizes.items() if size > PARTIAL_HASH_SIZE * 2]
+
+        by_partial = {}
+        for path, partial, error in hash_files(large, get_partial_hash, workers, cancel_event=cancel_event):
+            if error:
+                print(f"Error processing {path}: {error}")
+            else:
+                by_partial.setdefault((sizes[path], partial), []).append(path)
+
+        # Unhashed files can also match a stored hash, so keep every size that has one
+        hashed_sizes = {size for path, size, file_hash in rows if file_hash}
+        for (size, _), paths in by_partial.items():
+            if len(paths) > 1 or size in hashed_sizes:
+                to_hash.extend(paths)
+
+        computed = []
+        for path, file_hash, error in hash_files(to_hash, get_file_hash, workers, cancel_event=cancel_event):
+            if error:
+                print(f"Error processing {path}: {error}")
+            else:
+                full_hashes[path] = file_hash
+                computed.append((file_hash, path))
+
+        with self._lock:
+            self._conn.executemany("UPDATE files SET hash = ? WHERE path = ?", computed)
+            self._conn.commit()
+
+        # Pair each file with the first file (by path) that has the same hash
+        seen_hash = {}
+        duplicates = []
+        for path, _, _ in rows:
+            file_hash = full_hashes.get(path)
+            if file_hash is None:
+                continue
+            if file_hash in seen_hash:
+                duplicates.append((path, seen_hash[file_hash]))
+            else:
+                seen_hash[file_hash] = path
+
+        return duplicates
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gets the size of the catalog.
+
+        Returns:
+            Dictionary containing the number of catalogued directories and files
+        """
+        with self._lock:
+            dirs = self._conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {"dirs": dirs, "files": files}
+
+    def clear(self) -> None:
+        """Removes every directory and file from the catalog."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM dirs")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Commits pending changes and closes the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# Catalog shared by the GUI tabs, opened on first use
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+def get_default_catalog() -> Catalog:
+    """
+    Gets the catalog at DEFAULT_CATALOG_PATH, opening it on first use.
+
+    Searches run in worker threads, so the tabs share this one catalog and
+    its lock instead of opening competing connections to the database.
+
+    Returns:
+        The default catalog
+    """
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = Catalog()
+        return _default_catalog
@@ -0,0 +1,478 @@
+import os
+import time
+import zlib
+import random
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from file_organizer_app.utils.archive_writer import should_compress
+
+# Default location of the deduplicating archive store
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".file_organizer", "chunk_store")
+
+# Chunk size bounds; the average lands near MIN_CHUNK_SIZE + 2 ** (BOUNDARY_BITS + 1)
+MIN_CHUNK_SIZE = 2 * 1024
+BOUNDARY_BITS = 12
+MAX_CHUNK_SIZE = 64 * 1024
+
+# Bytes read from a file at a time while chunking
+READ_SIZE = 4 * 1024 * 1024
+
+# A pack file is closed and a new one started once it grows past this size
+PACK_SIZE = 64 * 1024 * 1024
+
+# zlib level for chunks; a chunk is stored raw unless this saves at least 1/32 of it
+CHUNK_COMPRESS_LEVEL = 3
+
+# Number of bytes mixed into each position's mark bit
+MARK_WINDOW = 4
+
+# Every position of the data gets a mark bit: the XOR of one pseudo-random
+# bit from each of the last MARK_WINDOW bytes. A chunk ends after
+# BOUNDARY_BITS marks in a row are 1, which makes the boundary test a
+# rolling hash over the last MARK_WINDOW + BOUNDARY_BITS - 1 bytes: whether
+# a position is a boundary depends only on the bytes just before it, so
+# inserting or removing data only moves the boundaries next to the edit.
+# Mixing several bytes keeps the marks balanced on data with a small
+# alphabet, such as text. The marks are computed with bytes.translate and
+# big-integer shifts and XORs and searched with bytes.find, so the whole
+# scan runs in C.
+#
+# Bit d of a byte's entry in the table is the bit it contributes to the
+# mark of the position d bytes after it
+_MARK_TABLE = bytes(random.Random(0x5EED).choices(range(1 << MARK_WINDOW), k=256))
+# Keeps the lowest bit of each byte
+_LOW_BIT_TABLE = bytes(value & 1 for value in range(256))
+_BOUNDARY_MARK = b"\x01" * BOUNDARY_BITS
+
+def boundary_marks(data: bytes) -> bytes:
+    """
+    Computes the mark bit of every position of the data.
+
+    Args:
+        data: The data to chunk
+
+    Returns:
+        One byte (0 or 1) per byte of data
+    """
+    bits = int.from_bytes(data.translate(_MARK_TABLE), "big")
+    marks = bits
+    for distance in range(1, MARK_WINDOW):
+        # Shifting right by 9 bits per step moves bit d of the byte d positions
+        # earlier onto bit 0; the other bits are dropped below
+        marks ^= bits >> (9 * distance)
+    return marks.to_bytes(len(data), "big").translate(_LOW_BIT_TABLE)
+
+def find_boundary(marks: bytes, start: int, end: int) -> int:
+    """
+    Finds where the chunk starting at an offset ends.
+
+    Args:
+        marks: The mark bits of the data (see boundary_marks)
+        start: Offset where the chunk starts
+        end: Offset where the data available for this chunk ends
+
+    Returns:
+        Offset just past the end of the chunk
+    """
+    limit = min(end, start + MAX_CHUNK_SIZE)
+    if limit - start <= MIN_CHUNK_SIZE:
+        return limit
+    found = marks.find(_BOUNDARY_MARK, start + MIN_CHUNK_SIZE - BOUNDARY_BITS, limit)
+    if found < 0:
+        return limit
+    return found + BOUNDARY_BITS
+
+def iter_chunks(f, cancel_event: Optional[threading.Event] = None) -> Iterator[bytes]:
+    """
+    Splits a file into content-defined chunks.
+
+    Args:
+        f: File opened in binary mode
+        cancel_event: Event that stops chunking when set (optional)
+
+    Returns:
+        Iterator of the chunks, in order
+    """
+    buffer = b""
+    eof = False
+    while True:
+        if not eof and len(buffer) < MAX_CHUNK_SIZE:
+            data = f.read(READ_SIZE)
+            eof = not data
+            buffer += data
+            if cancel_event is not None and cancel_event.is_set():
+                return
+        if not buffer:
+            return
+
+        marks = boundary_marks(buffer)
+        start = 0
+        # Cut every chunk that is certain not to change with more data
+        while len(buffer) - start >= MAX_CHUNK_SIZE or (eof and start < len(buffer)):
+            end = find_boundary(marks, start, len(buffer))
+            yield buffer[start:end]
+            start = end
+        buffer = buffer[start:]
+
+class ChunkStore:
+    """
+    Deduplicating archive store.
+
+    Files are split into content-defined chunks, and each chunk is stored
+    once, keyed on its SHA-256 digest, in append-only pack files. An
+    archived file is a list of chunk digests, so archiving a file that
+    shares most of its content with files archived before only writes the
+    new chunks. A file whose path, size and modification time match its
+    last archived version is not read at all.
+
+    The chunk index and the file lists are kept in SQLite. Pack files are
+    flushed to disk before the index rows that point into them are
+    committed, so a crash can only leave unreferenced bytes at the end of
+    a pack.
+    """
+
+    def __init__(self, store_dir: str = None):
+        """
+        Open (or create) a chunk store.
+
+        Args:
+            store_dir: Directory of the store (if None, uses DEFAULT_STORE_DIR)
+        """
+        self.store_dir = store_dir if store_dir else DEFAULT_STORE_DIR
+        self.pack_dir = os.path.join(self.store_dir, "packs")
+        os.makedirs(self.pack_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(self.store_dir, "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " digest BLOB PRIMARY KEY,"
+            " pack INTEGER NOT NULL,"
+            " offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " compressed INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        # Each archived version of a file, with its chunk digests concatenated
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY,"
+            " path TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " mode INTEGER NOT NULL,"
+            " archived_ns INTEGER NOT NULL,"
+            " chunks BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_path ON files (path)")
+        self._conn.commit()
+
+        self._pack = None
+        self._pack_number = None
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def _open_pack(self) -> None:
+        numbers = [int(name[5:-5]) for name in os.listdir(self.pack_dir)
+                   if name.startswith("pack-") and name.endswith(".pack")]
+        self._pack_number = max(numbers) if numbers else 1
+        self._pack = open(self._pack_path(self._pack_number), "ab")
+        if self._pack.tell() >= PACK_SIZE:
+            self._next_pack()
+
+    def _next_pack(self) -> None:
+        # _sync only reaches the current pack, so the full one is synced before it is left
+        self._pack.flush()
+        os.fsync(self._pack.fileno())
+        self._pack.close()
+        self._pack_number += 1
+        self._pack = open(self._pack_path(self._pack_number), "ab")
+
+    def _pack_path(self, number: int) -> str:
+        return os.path.join(self.pack_dir, f"pack-{number:06d}.pack")
+
+    def _has_chunk(self, digest: bytes) -> bool:
+        return self._conn.execute("SELECT 1 FROM chunks WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def _write_chunk(self, digest: bytes, chunk: bytes, compress: bool) -> int:
+        if self._pack is None:
+            self._open_pack()
+        elif self._pack.tell() >= PACK_SIZE:
+            self._next_pack()
+
+        payload = chunk
+        compressed = 0
+        if compress:
+            packed = zlib.compress(chunk, CHUNK_COMPRESS_LEVEL)
+            if len(packed) < len(chunk) - len(chunk) // 32:
+                payload = packed
+                compressed = 1
+
+        offset = self._pack.tell()
+        self._pack.write(payload)
+        self._conn.execute("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                           (digest, self._pack_number, offset, len(payload), len(chunk), compressed))
+        return len(payload)
+
+    def _sync(self) -> None:
+        # Chunks must be on disk before the rows that point at them are committed
+        if self._pack is not None:
+            self._pack.flush()
+            os.fsync(self._pack.fileno())
+        self._conn.commit()
+
+    def add_file(self, file_path: str, cancel_event: Optional[threading.Event] = None) -> Tuple[Optional[int], int]:
+        """
+        Archives a file into the store.
+
+        Args:
+            file_path: Path to the file
+            cancel_event: Event that stops archiving when set; the file is then not recorded (optional)
+
+        Returns:
+            Tuple containing the id of the archived version (None if cancelled) and the
+            number of new bytes written to the packs
+        """
+        path = os.path.abspath(file_path)
+        with self._lock:
+            with open(path, "rb") as f:
+                stats = os.fstat(f.fileno())
+
+                # An unchanged file reuses the chunk list of its last version without being read
+                row = self._conn.execute(
+                    "SELECT chunks FROM files WHERE path = ? AND size = ? AND mtime_ns = ?"
+                    " ORDER BY id DESC LIMIT 1", (path, stats.st_size, stats.st_mtime_ns)).fetchone()
+                if row is not None:
+                    digests = row[0]
+                    written = 0
+                else:
+                    compress = should_compress(path)
+                    digests = bytearray()
+                    written = 0
+                    # Chunks repeated within the file are only looked up once
+                    seen = set()
+                    for chunk in iter_chunks(f, cancel_event):
+                        digest = hashlib.sha256(chunk).digest()
+                        digests += digest
+                        if digest in seen:
+                            continue
+                        seen.add(digest)
+                        if not self._has_chunk(digest):
+                            written += self._write_chunk(digest, chunk, compress)
+                    if cancel_event is not None and cancel_event.is_set():
+                        # Chunks already written are kept; the next run reuses them
+                        self._sync()
+                        return None, written
+                    digests = bytes(digests)
+
+            cursor = self._conn.execute(
+                "INSERT INTO files (path, size, mtime_ns, mode, archived_ns, chunks) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, stats.st_size, stats.st_mtime_ns, stats.st_mode, time.time_ns(), digests))
+            self._sync()
+            return cursor.lastrowid, written
+
+    def list_files(self, path_prefix: str = None) -> List[Tuple[int, str, int, int, int]]:
+        """
+        Lists the archived file versions.
+
+        Args:
+            path_prefix: Only list files whose path starts with this prefix (optional)
+
+        Returns:
+            List of tuples containing the id, original path, size, modification time
+            (in nanoseconds) and archive time (in nanoseconds) of each version, newest first
+        """
+        query = "SELECT id, path, size, mtime_ns, archived_ns FROM files"
+        params = ()
+        if path_prefix:
+            query += " WHERE substr(path, 1, ?) = ?"
+            params = (len(path_prefix), path_prefix)
+        with self._lock:
+            return self._conn.execute(query + " ORDER BY id DESC", params).fetchall()
+
+    def _read_chunk(self, digest: bytes) -> bytes:
+        row = self._conn.execute("SELECT pack, offset, length, size, compressed FROM chunks WHERE digest = ?",
+                                 (digest,)).fetchone()
+        if row is None:
+            raise OSError(f"Chunk {digest.hex()} is missing from the store")
+        pack, offset, length, size, compressed = row
+
+        if pack == self._pack_number and self._pack is not None:
+            self._pack.flush()
+        reader = self._readers.get(pack)
+        if reader is None:
+            reader = self._readers[pack] = open(self._pack_path(pack), "rb")
+        reader.seek(offset)
+        payload = reader.read(length)
+        chunk = zlib.decompress(payload) if compressed else payload
+        if len(chunk) != size or hashlib.sha256(chunk).digest() != digest:
+            raise OSError(f"Chunk {digest.hex()} is corrupt")
+        return chunk
+
+    def restore_file(self, file_id: int, dest_path: str) -> None:
+        """
+        Restores an archived file version, checking every chunk against its digest.
+
+        Args:
+            file_id: Id of the archived version
+            dest_path: Path to write the file to
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT mtime_ns, mode, chunks FROM files WHERE id = ?",
+                                     (file_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"No archived file with id {file_id}")
+            mtime_ns, mode, digests = row
+
+            os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+            with open(dest_path, "wb") as out:
+                for start in range(0, len(digests), 32):
+                    out.write(self._read_chunk(digests[start:start + 32]))
+            os.chmod(dest_path, mode & 0o7777)
+            os.utime(dest_path, ns=(mtime_ns, mtime_ns))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gets the size of the store.
+
+        Returns:
+            Dictionary containing the number of file versions and unique chunks, the total
+            size of the archived files and the bytes stored in the packs
+        """
+        with self._lock:
+            files, logical = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+            chunks, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+        return {"files": files, "chunks": chunks, "logical_bytes": logical, "stored_bytes": stored}
+
+    def close(self) -> None:
+        """Close the packs and the index."""
+        with self._lock:
+            if self._pack is not None:
+                self._sync()
+                self._pack.close()
+                self._pack = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers = {}
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def dedup_archive_files(file_paths: List[str], store_dir: str = None,
+                        cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+    """
+    Archives files into the deduplicating chunk store.
+
+    Args:
+        file_paths: List of file paths to archive
+        store_dir: Directory of the store (if None, uses DEFAULT_STORE_DIR)
+        cancel_event: Event that stops archiving before the next file when set (optional)
+
+    Returns:
+        Tuple containing count of successfully archived files and list of errors
+    """
+    success_count = 0
+    errors = []
+
+    with ChunkStore(store_dir) as store:
+        for file_path in file_paths:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+            try:
+                if os.path.exists(file_path):
+                    file_id, _ = store.add_file(file_path, cancel_event)
+                    if file_id is not None:
+                        success_count += 1
+                else:
+                    errors.append(f"File not found: {file_path}")
+            except Exception as e:
+                errors.append(f"Error archiving {file_path}: {str(e)}")
+
+    return success_count, errors
+
+def _newest_versions(store: ChunkStore, source) -> List[Tuple[int, str, str]]:
+    """
+    Finds the file versions a restore source refers to.
+
+    Args:
+        store: The chunk store
+        source: Id of a file version, or the original path of a file or folder
+
+    Returns:
+        List of tuples containing the id of each version, its original path, and the
+        path it is restored to relative to the destination directory
+    """
+    if isinstance(source, int) or str(source).isdigit():
+        file_id = int(source)
+        return [(version[0], version[1], os.path.basename(version[1]))
+                for version in store.list_files() if version[0] == file_id]
+
+    source = os.path.abspath(source)
+    parent = os.path.dirname(source)
+    versions = []
+    seen = set()
+    # Newest first, so the first version of each path is the one to restore
+    for file_id, path, _, _, _ in store.list_files(source):
+        if path in seen or not (path == source or path.startswith(os.path.join(source, ""))):
+            continue
+        seen.add(path)
+        versions.append((file_id, path, os.path.relpath(path, parent)))
+    return versions
+
+def dedup_restore_files(sources: List, dest_dir: str, store_dir: str = None,
+                        cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+    """
+    Restores files from the deduplicating chunk store.
+
+    Each source is either the id of an archived file version, which is
+    restored under its file name, or the original path of a file or
+    folder, in which case the newest version of the file, or of each file
+    archived from below the folder, is restored under the folder's name.
+    Existing files are never overwritten.
+
+    Args:
+        sources: Version ids and original paths to restore
+        dest_dir: Directory to restore the files into
+        store_dir: Directory of the store (if None, uses DEFAULT_STORE_DIR)
+        cancel_event: Event that stops restoring before the next file when set (optional)
+
+    Returns:
+        Tuple containing count of successfully restored files and list of errors
+    """
+    success_count = 0
+    errors = []
+
+    with ChunkStore(store_dir) as store:
+        for source in sources:
+            versions = _newest_versions(store, source)
+            if not versions:
+                errors.append(f"Not in the store: {source}")
+                continue
+
+            for file_id, path, relative in versions:
+                if cancel_event is not None and cancel_event.is_set():
+                    return success_count, errors
+
+                dest_path = os.path.join(dest_dir, relative)
+                if os.path.lexists(dest_path):
+                    errors.append(f"Already exists: {dest_path}")
+                    continue
+                try:
+                    store.restore_file(file_id, dest_path)
+                    success_count += 1
+                except Exception as e:
+                    errors.append(f"Error restoring {path}: {str(e)}")
+                    if os.path.exists(dest_path):
+                        os.remove(dest_path)
+
+    return success_count, errors
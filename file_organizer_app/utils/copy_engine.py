@@ -0,0 +1,378 @@
+import errno
+import mmap
+import os
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from file_organizer_app.utils.archive_writer import default_workers
+
+# ioctl request that makes the destination share the source's extents
+# (btrfs, xfs with reflink=1, bcachefs, ...). Same value on all common
+# Linux architectures.
+FICLONE = 0x40049409
+
+# Size of the buffer used when the kernel cannot copy for us
+COPY_BUFFER_SIZE = 1024 * 1024
+# Largest request passed to copy_file_range/sendfile at once; also how
+# often a large copy checks for cancellation
+KERNEL_COPY_CHUNK = 64 * 1024 * 1024
+
+# Copy methods, from cheapest to most expensive
+METHOD_CLONE = 'clone'
+METHOD_COPY_FILE_RANGE = 'copy_file_range'
+METHOD_SENDFILE = 'sendfile'
+METHOD_BUFFERED = 'buffered'
+
+# Errors that mean "this method is not available here", not "the copy failed"
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP,
+                       errno.EBADF, errno.EPERM}
+
+class CopyCancelled(Exception):
+    """Raised when a copy is stopped through its cancel event."""
+
+class CopyStats:
+    """
+    Counts what a copy did and which method was used for each file.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.methods = {}
+        self._lock = threading.Lock()
+
+    def add(self, size: int, method: str) -> None:
+        """
+        Records one copied file.
+
+        Args:
+            size: Number of bytes in the file
+            method: Method used to copy it
+        """
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+    def __str__(self) -> str:
+        rate = self.bytes / self.seconds / (1024 * 1024) if self.seconds else 0.0
+        methods = ", ".join(f"{count} {method}" for method, count in sorted(self.methods.items()))
+        return (f"{self.files} files, {self.bytes} bytes in {self.seconds:.2f}s "
+                f"({rate:.1f} MB/s; {methods or 'nothing copied'})")
+
+class _MethodCache:
+    """
+    Remembers which methods failed between two devices so later files skip them.
+    """
+
+    def __init__(self):
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def usable(self, method: str, devices: Tuple[int, int]) -> bool:
+        return (method, devices) not in self._failed
+
+    def failed(self, method: str, devices: Tuple[int, int]) -> None:
+        with self._lock:
+            self._failed.add((method, devices))
+
+_methods = _MethodCache()
+_buffers = threading.local()
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise CopyCancelled()
+
+def _clone(src_fd: int, dst_fd: int) -> bool:
+    """
+    Makes the destination a reflink of the source.
+
+    Returns:
+        True if the filesystem shared the data, False if it cannot
+    """
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except (ImportError, AttributeError):
+        return False
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            return False
+        raise
+
+def _kernel_copy(copy_func: Callable[[int], int], remaining: int,
+                 cancel_event: Optional[threading.Event]) -> Tuple[bool, int]:
+    """
+    Runs a kernel copy call until the source is exhausted.
+
+    Both file offsets advance with each call, so when the method turns out
+    to be unsupported part-way through, the next method can pick up where
+    this one stopped.
+
+    Args:
+        copy_func: Function that copies up to the given number of bytes and returns the count
+        remaining: Number of bytes still to copy
+        cancel_event: Event that stops the copy between calls when set (optional)
+
+    Returns:
+        Tuple containing whether the method worked and the number of bytes it copied
+    """
+    copied = 0
+    while True:
+        _check_cancelled(cancel_event)
+        try:
+            count = copy_func(min(max(remaining - copied, COPY_BUFFER_SIZE), KERNEL_COPY_CHUNK))
+        except OSError as e:
+            if e.errno in _UNSUPPORTED_ERRNOS:
+                return False, copied
+            raise
+        if count == 0:
+            return True, copied
+        copied += count
+
+def _buffer() -> mmap.mmap:
+    """
+    Gets this thread's copy buffer.
+
+    An anonymous mapping is page aligned, which lets the kernel move whole
+    pages instead of copying through an unaligned heap buffer.
+    """
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = mmap.mmap(-1, COPY_BUFFER_SIZE)
+    return buffer
+
+def _buffered_copy(src_fd: int, dst_fd: int, cancel_event: Optional[threading.Event]) -> int:
+    """
+    Copies the rest of the source through a large buffer.
+
+    Returns:
+        Number of bytes copied
+    """
+    view = memoryview(_buffer())
+    copied = 0
+    try:
+        while True:
+            _check_cancelled(cancel_event)
+            count = os.readv(src_fd, [view])
+            if count == 0:
+                return copied
+            written = 0
+            while written < count:
+                written += os.write(dst_fd, view[written:count])
+            copied += count
+    finally:
+        view.release()
+
+def _fast_copy(src_fd: int, dst_fd: int, size: int, devices: Tuple[int, int],
+               cancel_event: Optional[threading.Event]) -> Tuple[Optional[str], int]:
+    """
+    Copies a regular file with a reflink or in the kernel.
+
+    Methods that fail between the two devices are remembered and not tried
+    again for later files.
+
+    Args:
+        src_fd: Descriptor of the source, positioned at the start
+        dst_fd: Descriptor of the empty destination
+        size: Size of the source
+        devices: Device numbers of the source and destination
+        cancel_event: Event that stops the copy when set (optional)
+
+    Returns:
+        Tuple containing the method that finished the copy (None if none
+        could) and the number of bytes copied
+    """
+    _check_cancelled(cancel_event)
+    if _methods.usable(METHOD_CLONE, devices):
+        if _clone(src_fd, dst_fd):
+            return METHOD_CLONE, size
+        _methods.failed(METHOD_CLONE, devices)
+
+    kernel_methods = []
+    if hasattr(os, 'copy_file_range'):
+        kernel_methods.append((METHOD_COPY_FILE_RANGE, lambda count: os.copy_file_range(src_fd, dst_fd, count)))
+    if hasattr(os, 'sendfile'):
+        kernel_methods.append((METHOD_SENDFILE, lambda count: os.sendfile(dst_fd, src_fd, None, count)))
+
+    copied = 0
+    for method, copy_func in kernel_methods:
+        if not _methods.usable(method, devices):
+            continue
+        worked, count = _kernel_copy(copy_func, size - copied, cancel_event)
+        copied += count
+        if worked:
+            return method, copied
+        _methods.failed(method, devices)
+    return None, copied
+
+def copy_file(src: str, dst: str, cancel_event: Optional[threading.Event] = None) -> Tuple[int, str]:
+    """
+    Copies a file and its metadata using the cheapest method available.
+
+    The methods are tried in order: a reflink (FICLONE), which shares the
+    data and is near-instant on btrfs and xfs; copy_file_range, which keeps
+    the data in the kernel and lets NFS and SMB copy on the server; sendfile;
+    and a read/write loop through a large page-aligned buffer. Like
+    shutil.copy2, symbolic links are followed, permissions and timestamps
+    are copied, and copying a file onto itself is refused. A partially written destination is removed if
+    the copy fails or is cancelled.
+
+    Args:
+        src: Path to the file to copy
+        dst: Path of the new file
+        cancel_event: Event that stops the copy when set (optional)
+
+    Returns:
+        Tuple containing the number of bytes copied and the method used
+
+    Raises:
+        CopyCancelled: If the cancel event was set
+        shutil.SameFileError: If src and dst are the same file
+        OSError: If the file could not be copied
+    """
+    with open(src, 'rb') as fsrc:
+        src_stat = os.fstat(fsrc.fileno())
+        if stat.S_ISDIR(src_stat.st_mode):
+            raise IsADirectoryError(errno.EISDIR, "Is a directory", src)
+        # Opening dst for writing would truncate the source
+        try:
+            if os.path.samestat(src_stat, os.stat(dst)):
+                raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(dst, 'wb') as fdst:
+                src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                devices = (src_stat.st_dev, os.fstat(dst_fd).st_dev)
+                method = None
+                # Pseudo-files and pipes can report a size of 0 and still have
+                # data, which the kernel copy calls would silently skip
+                if src_stat.st_size and stat.S_ISREG(src_stat.st_mode):
+                    method, copied = _fast_copy(src_fd, dst_fd, src_stat.st_size, devices, cancel_event)
+                else:
+                    copied = 0
+
+                if method is None:
+                    copied += _buffered_copy(src_fd, dst_fd, cancel_event)
+                    method = METHOD_BUFFERED
+        except BaseException:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            raise
+
+    shutil.copystat(src, dst)
+    return copied, method
+
+def copy_files(pairs: Iterable[Tuple[str, str]], workers: Optional[int] = None,
+               cancel_event: Optional[threading.Event] = None,
+               stats: Optional[CopyStats] = None) -> Tuple[int, List[str]]:
+    """
+    Copies files on several threads.
+
+    The copy system calls release the GIL, so files on fast storage are
+    copied in parallel; on slow disks the extra threads mostly keep the
+    device queue full.
+
+    Args:
+        pairs: (source, destination) path pairs; the destination directories must exist
+        workers: Number of copy threads (if None, uses one per CPU, at least four)
+        cancel_event: Event that stops copying when set; files being copied are removed (optional)
+        stats: CopyStats to record the copied files in (optional)
+
+    Returns:
+        Tuple containing count of successfully copied files and list of errors
+    """
+    if workers is None:
+        workers = max(4, default_workers())
+    started = time.perf_counter()
+    success_count = 0
+    errors = []
+
+    def copy_one(pair):
+        src, dst = pair
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        try:
+            size, method = copy_file(src, dst, cancel_event)
+        except CopyCancelled:
+            return None
+        except Exception as e:
+            return f"Error copying {src}: {str(e)}"
+        if stats is not None:
+            stats.add(size, method)
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(copy_one, pairs):
+            if result is True:
+                success_count += 1
+            elif result:
+                errors.append(result)
+
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
+    return success_count, errors
+
+def copy_tree(src_dir: str, dst_dir: str, workers: Optional[int] = None,
+              cancel_event: Optional[threading.Event] = None,
+              stats: Optional[CopyStats] = None) -> Tuple[int, List[str]]:
+    """
+    Copies a directory tree, copying its files on several threads.
+
+    Matches shutil.copytree with its defaults: symbolic links are followed,
+    and file and directory metadata is copied. The source is listed before
+    anything is created, so a destination inside the source is not copied
+    into itself. Then the directories are created, all files are copied in
+    parallel, and finally the directory timestamps are set, since adding
+    files changes them.
+
+    Args:
+        src_dir: Path to the directory to copy
+        dst_dir: Path of the new directory; it must not exist
+        workers: Number of copy threads (if None, uses one per CPU, at least four)
+        cancel_event: Event that stops copying when set (optional)
+        stats: CopyStats to record the copied files in (optional)
+
+    Returns:
+        Tuple containing count of successfully copied files and list of errors
+
+    Raises:
+        CopyCancelled: If the cancel event was set
+        OSError: If the destination could not be created
+    """
+    directories = []
+    pairs = []
+
+    for root, _, files in os.walk(src_dir, followlinks=True):
+        _check_cancelled(cancel_event)
+        target_root = os.path.normpath(os.path.join(dst_dir, os.path.relpath(root, src_dir)))
+        for file in files:
+            pairs.append((os.path.join(root, file), os.path.join(target_root, file)))
+        directories.append((root, target_root))
+
+    # os.walk lists parents before their children
+    os.makedirs(dst_dir)
+    for _, target_root in directories[1:]:
+        os.mkdir(target_root)
+
+    success_count, errors = copy_files(pairs, workers, cancel_event, stats)
+    _check_cancelled(cancel_event)
+
+    # Deepest directories first, so setting a parent's times is the last change to it
+    for src, dst in reversed(directories):
+        try:
+            shutil.copystat(src, dst)
+        except OSError as e:
+            errors.append(f"Error copying metadata of {src}: {str(e)}")
+
+    return success_count, errors
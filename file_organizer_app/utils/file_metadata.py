@@ -1,78 +1,79 @@
 import os
 import datetime
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import Dict, Iterator, List, Tuple, Optional
 
-def get_file_metadata(file_path: str) -> Dict[str, any]:
+from file_organizer_app.utils.file_record import FileRecord
+from file_organizer_app.utils.scanner import scan_files
+
+def get_file_metadata(file_path: str, stats: Optional[os.stat_result] = None) -> Optional[FileRecord]:
     """
     Gets metadata for a file.
 
     Args:
         file_path: Path to the file
+        stats: Result of os.stat for the file, if already known (optional)
 
     Returns:
-        Dictionary containing file metadata
+        FileRecord containing file metadata (readable like a dictionary),
+        or None if the file could not be read
     """
     try:
-        stats = os.stat(file_path)
-
-        created_datetime = datetime.datetime.fromtimestamp(stats.st_ctime)
-        modified_datetime = datetime.datetime.fromtimestamp(stats.st_mtime)
-        accessed_datetime = datetime.datetime.fromtimestamp(stats.st_atime)
-
-        return {
-            "path": file_path,
-            "name": os.path.basename(file_path),
-            "size": stats.st_size,
-            "created": created_datetime,
-            "modified": modified_datetime,
-            "accessed": accessed_datetime,
-            "extension": os.path.splitext(file_path)[1].lower()
-        }
+        if stats is None:
+            stats = os.stat(file_path)
+
+        return FileRecord.from_stats(file_path, stats)
     except Exception as e:
         print(f"Error getting metadata for {file_path}: {e}")
-        return {}
+        return None
 
-def find_unused_files(dir_path: str, days: int = 90) -> List[Dict[str, any]]:
+def iter_unused_files(dir_path: str, days: int = 90,
+                      cancel_event: Optional[threading.Event] = None) -> Iterator[FileRecord]:
     """
-    Finds files that haven't been accessed in the specified number of days.
-    Optimized for faster performance.
+    Yields files that haven't been accessed in the specified number of days,
+    as they are found.
+
+    The tree is scanned lazily, so nothing is held beyond the current
+    directory and the scan only advances as fast as the caller consumes
+    results.
 
     Args:
         dir_path: Path to the directory to search
         days: Number of days to consider a file unused
+        cancel_event: Event that stops the scan when set (optional)
 
     Returns:
-        List of dictionaries containing metadata of unused files
+        Iterator of FileRecords for the unused files
     """
-    unused_files = []
     cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
+    cutoff_timestamp = cutoff_date.timestamp()
+
+    # Scan the tree once, stat-ing each file a single time
+    for entry in scan_files(dir_path, cancel_event=cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+        try:
+            stats = entry.stat()
+
+            # Quick check if the file is unused before building its record
+            if stats.st_atime < cutoff_timestamp:
+                yield FileRecord.from_stats(entry.path, stats)
+        except Exception as e:
+            print(f"Error processing {entry.path}: {e}")
+
+def find_unused_files(dir_path: str, days: int = 90) -> List[FileRecord]:
+    """
+    Finds files that haven't been accessed in the specified number of days.
+
+    Args:
+        dir_path: Path to the directory to search
+        days: Number of days to consider a file unused
 
-    # Use a more efficient approach by processing files in batches
-    batch_size = 100
-    all_files = []
-
-    # First, collect all file paths (faster than processing one by one)
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            all_files.append(os.path.join(root, file))
-
-    # Process files in batches
-    for i in range(0, len(all_files), batch_size):
-        batch = all_files[i:i+batch_size]
-        for file_path in batch:
-            try:
-                stats = os.stat(file_path)
-                accessed_datetime = datetime.datetime.fromtimestamp(stats.st_atime)
-
-                # Quick check if the file is unused before getting full metadata
-                if accessed_datetime < cutoff_date:
-                    metadata = get_file_metadata(file_path)
-                    if metadata:
-                        unused_files.append(metadata)
-            except Exception as e:
-                print(f"Error processing {file_path}: {e}")
-
-    return unused_files
+    Returns:
+        List of FileRecords for the unused files
+    """
+    return list(iter_unused_files(dir_path, days))
 
 def print_metadata(dir_path: str) -> None:
     """
@@ -81,14 +82,17 @@ def print_metadata(dir_path: str) -> None:
     Args:
         dir_path: Path to the directory
     """
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            metadata = get_file_metadata(file_path)
-
-            if metadata:
-                print(f"\nFile: {metadata['path']}")
-                print(f"Size: {metadata['size']} bytes")
-                print(f"Created: {metadata['created']}")
-                print(f"Modified: {metadata['modified']}")
-                print(f"Accessed: {metadata['accessed']}")
+    for entry in scan_files(dir_path):
+        try:
+            stats = entry.stat()
+        except OSError:
+            # Let get_file_metadata report the error
+            stats = None
+        metadata = get_file_metadata(entry.path, stats)
+
+        if metadata:
+            print(f"\nFile: {metadata['path']}")
+            print(f"Size: {metadata['size']} bytes")
+            print(f"Created: {metadata['created']}")
+            print(f"Modified: {metadata['modified']}")
+            print(f"Accessed: {metadata['accessed']}")
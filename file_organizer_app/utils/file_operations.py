@@ -1,25 +1,75 @@
 import os
 import shutil
 import datetime
-import zipfile
-import tarfile
-from typing import List, Tuple, Optional
+import threading
+from typing import Callable, List, Tuple, Optional
 
-def archive_files(file_paths: List[str], archive_dir: str = None) -> Tuple[int, List[str]]:
+from file_organizer_app.utils.archive_writer import ARCHIVE_TYPES, COMPRESS_AUTO, ArchiveCancelled, write_archive
+from file_organizer_app.utils.bulk_delete import DeleteStats, delete_paths, delete_tree
+from file_organizer_app.utils.copy_engine import CopyCancelled, CopyStats, copy_files, copy_tree
+from file_organizer_app.utils.scanner import scan_files
+from file_organizer_app.utils.trash import trash_paths
+
+class _Cancelled(Exception):
+    """Raised from shutil and tarfile callbacks to stop a cancelled operation."""
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """
+    Raises _Cancelled if the cancel event is set.
+
+    Args:
+        cancel_event: Event that is set when the operation should stop (optional)
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise _Cancelled()
+
+def _remove_partial(path: str) -> None:
     """
-    Archives files by moving them to an archive directory.
+    Removes a partially written archive or copy after a cancelled operation.
+
+    Args:
+        path: Path to the file or folder to remove
+    """
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"Error removing {path}: {e}")
+
+def archive_files(file_paths: List[str], archive_dir: str = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  workers: Optional[int] = None,
+                  stats: Optional[CopyStats] = None) -> Tuple[int, List[str]]:
+    """
+    Archives files by copying them to an archive directory.
+
+    The copies are made on several threads with the cheapest method the
+    filesystem offers (see copy_engine); on btrfs and xfs they share the
+    original data and take no extra space.
 
     Args:
         file_paths: List of file paths to archive
-        archive_dir: Directory to move files to (if None, uses the source file's directory)
+        archive_dir: Directory to copy files to (if None, uses the source file's directory)
+        cancel_event: Event that stops archiving when set; files being copied are removed (optional)
+        workers: Number of copy threads (if None, uses one per CPU, at least four)
+        stats: CopyStats to record the copied files in (optional)
 
     Returns:
         Tuple containing count of successfully archived files and list of errors
     """
-    success_count = 0
     errors = []
+    pairs = []
+    taken = set()
+
+    # Create a timestamp to avoid conflicts
+    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
 
     for file_path in file_paths:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
         try:
             if os.path.exists(file_path):
                 # Get the filename and directory
@@ -33,31 +83,43 @@ def archive_files(file_paths: List[str], archive_dir: str = None) -> Tuple[int,
                 if not os.path.exists(dest_dir):
                     os.makedirs(dest_dir)
 
-                # Create a timestamp to avoid conflicts
-                timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+                # Number copies of files that share a name, since they are all copied at once
                 name, ext = os.path.splitext(filename)
-                unique_filename = f"{name}_{timestamp}{ext}"
-
-                # Create the destination path
-                dest_path = os.path.join(dest_dir, unique_filename)
-
-                # Copy the file to the archive (instead of moving to avoid errors)
-                shutil.copy2(file_path, dest_path)
-                success_count += 1
+                dest_path = os.path.join(dest_dir, f"{name}_{timestamp}{ext}")
+                counter = 1
+                while dest_path in taken or os.path.exists(dest_path):
+                    dest_path = os.path.join(dest_dir, f"{name}_{timestamp}_{counter}{ext}")
+                    counter += 1
+                taken.add(dest_path)
+
+                pairs.append((file_path, dest_path))
             else:
                 errors.append(f"File not found: {file_path}")
         except Exception as e:
             errors.append(f"Error archiving {file_path}: {str(e)}")
 
+    # Copy the files to the archive (instead of moving to avoid errors)
+    success_count, copy_errors = copy_files(pairs, workers, cancel_event, stats)
+    errors.extend(copy_errors)
     return success_count, errors
 
-def archive_folder(folder_path: str, archive_dir: str = None) -> Tuple[bool, Optional[str]]:
+def archive_folder(folder_path: str, archive_dir: str = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   workers: Optional[int] = None,
+                   stats: Optional[CopyStats] = None) -> Tuple[bool, Optional[str]]:
     """
     Archives an entire folder by copying it to an archive directory.
 
+    The files are copied on several threads with the cheapest method the
+    filesystem offers (see copy_engine); on btrfs and xfs the copy is
+    near-instant and shares the original data.
+
     Args:
         folder_path: Path to the folder to archive
         archive_dir: Directory to copy the folder to (if None, uses the parent directory of the folder)
+        cancel_event: Event that stops the copy when set (optional)
+        workers: Number of copy threads (if None, uses one per CPU, at least four)
+        stats: CopyStats to record the copied files in (optional)
 
     Returns:
         Tuple containing success status and error message if any
@@ -82,65 +144,119 @@ def archive_folder(folder_path: str, archive_dir: str = None) -> Tuple[bool, Opt
             dest_path = os.path.join(dest_dir, f"{folder_name}_{timestamp}")
 
             # Copy the folder to the archive (instead of moving to avoid errors)
-            shutil.copytree(folder_path, dest_path)
+            if os.path.lexists(dest_path):
+                return False, f"Archive already exists: {dest_path}"
+
+            # A cancelled or failed copy is removed, so no incomplete archive is left behind
+            try:
+                _, errors = copy_tree(folder_path, dest_path, workers, cancel_event, stats)
+            except CopyCancelled:
+                _remove_partial(dest_path)
+                return False, "Archive cancelled"
+            except Exception:
+                _remove_partial(dest_path)
+                raise
+            if errors:
+                _remove_partial(dest_path)
+                return False, f"Error archiving folder {folder_path}: " + "; ".join(errors)
             return True, None
         else:
             return False, f"Folder not found: {folder_path}"
     except Exception as e:
         return False, f"Error archiving folder {folder_path}: {str(e)}"
 
-def delete_files(file_paths: List[str]) -> Tuple[int, List[str]]:
+def delete_files(file_paths: List[str], cancel_event: Optional[threading.Event] = None,
+                 workers: Optional[int] = None,
+                 progress_callback: Optional[Callable[[DeleteStats], None]] = None,
+                 stats: Optional[DeleteStats] = None,
+                 use_trash: bool = False) -> Tuple[int, List[str]]:
     """
     Deletes files.
 
+    Files are deleted on several threads, grouped by folder (see
+    bulk_delete). An error deleting one file does not stop the others.
+    With use_trash, the files are instead renamed into the trash of their
+    volume, where they can be restored until the retention period ends
+    (see trash).
+
     Args:
         file_paths: List of file paths to delete
+        cancel_event: Event that stops deleting when set (optional)
+        workers: Number of delete threads (if None, uses the bulk_delete default)
+        progress_callback: Function called about once a second with the DeleteStats so far (optional)
+        stats: DeleteStats to record the throughput in (optional)
+        use_trash: Whether to move the files to the trash instead of deleting them
 
     Returns:
         Tuple containing count of successfully deleted files and list of errors
     """
-    success_count = 0
-    errors = []
-
-    for file_path in file_paths:
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                success_count += 1
-            else:
-                errors.append(f"File not found: {file_path}")
-        except Exception as e:
-            errors.append(f"Error deleting {file_path}: {str(e)}")
-
-    return success_count, errors
-
-def delete_folder(folder_path: str) -> Tuple[bool, Optional[str]]:
+    if use_trash:
+        return trash_paths(file_paths, cancel_event)
+    return delete_paths(file_paths, workers, cancel_event, progress_callback, stats)
+
+def delete_folder(folder_path: str, cancel_event: Optional[threading.Event] = None,
+                  workers: Optional[int] = None,
+                  progress_callback: Optional[Callable[[DeleteStats], None]] = None,
+                  stats: Optional[DeleteStats] = None,
+                  use_trash: bool = False) -> Tuple[bool, Optional[str]]:
     """
     Deletes a folder and all its contents.
 
+    Subfolders are emptied and removed on several threads, bottom-up (see
+    bulk_delete). An error deleting one file does not stop the others; the
+    folders containing it are kept. With use_trash, the folder is instead
+    renamed into the trash of its volume in one step, whatever its size.
+
     Args:
         folder_path: Path to the folder to delete
+        cancel_event: Event that stops deleting when set; whatever was not deleted yet is kept (optional)
+        workers: Number of delete threads (if None, uses the bulk_delete default)
+        progress_callback: Function called about once a second with the DeleteStats so far (optional)
+        stats: DeleteStats to record the throughput in (optional)
+        use_trash: Whether to move the folder to the trash instead of deleting it
 
     Returns:
         Tuple containing success status and error message if any
     """
     try:
         if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)
+            if use_trash:
+                count, errors = trash_paths([folder_path])
+                return (True, None) if count else (False, errors[0])
+
+            errors = delete_tree(folder_path, workers, cancel_event, progress_callback, stats)
+            if cancel_event is not None and cancel_event.is_set():
+                return False, "Delete cancelled"
+            if errors:
+                error = "; ".join(errors[:10])
+                if len(errors) > 10:
+                    error += f"; ... and {len(errors) - 10} more errors"
+                return False, error
             return True, None
         else:
             return False, f"Folder not found: {folder_path}"
     except Exception as e:
         return False, f"Error deleting folder {folder_path}: {str(e)}"
 
-def create_compressed_archive(file_paths: List[str], archive_path: str = None, archive_type: str = 'zip') -> Tuple[bool, Optional[str]]:
+def create_compressed_archive(file_paths: List[str], archive_path: str = None, archive_type: str = 'zip',
+                              cancel_event: Optional[threading.Event] = None,
+                              workers: Optional[int] = None,
+                              compression: str = COMPRESS_AUTO) -> Tuple[bool, Optional[str]]:
     """
     Creates a compressed archive of the specified files.
 
+    The files are compressed on several threads (see archive_writer), and
+    the result is a standard archive that any zip or tar tool can read.
+    By default, files that are already compressed (images, video, archives)
+    are stored rather than compressed again.
+
     Args:
         file_paths: List of file paths to include in the archive
         archive_path: Path where the archive will be created (if None, uses the directory of the first file)
-        archive_type: Type of archive ('zip' or 'tar.gz')
+        archive_type: Type of archive ('zip', 'tar', 'tar.gz', 'tar.xz' or 'tar.zst')
+        cancel_event: Event that stops archiving when set; the partial archive is removed (optional)
+        workers: Number of compression threads (if None, uses one per CPU)
+        compression: 'auto' to store already compressed files, 'always' or 'store'
 
     Returns:
         Tuple containing success status and error message if any
@@ -149,54 +265,51 @@ def create_compressed_archive(file_paths: List[str], archive_path: str = None, a
         if not file_paths:
             return False, "No files provided for archiving"
 
+        if archive_type not in ARCHIVE_TYPES:
+            return False, f"Unsupported archive type: {archive_type}"
+
         # If archive_path is None, create one based on the first file's location
         if archive_path is None:
             first_file = file_paths[0]
             first_file_dir = os.path.dirname(first_file)
             timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-
-            if archive_type == 'zip':
-                archive_path = os.path.join(first_file_dir, f"archive_{timestamp}.zip")
-            elif archive_type == 'tar.gz':
-                archive_path = os.path.join(first_file_dir, f"archive_{timestamp}.tar.gz")
-            else:
-                return False, f"Unsupported archive type: {archive_type}"
+            archive_path = os.path.join(first_file_dir, f"archive_{timestamp}.{archive_type}")
 
         # Create parent directory if it doesn't exist
         os.makedirs(os.path.dirname(archive_path), exist_ok=True)
 
-        if archive_type == 'zip':
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in file_paths:
-                    if os.path.exists(file_path):
-                        # Add file to zip with relative path
-                        arcname = os.path.basename(file_path)
-                        zipf.write(file_path, arcname)
-            return True, None
+        # Add each file with its base name, skipping files that no longer exist
+        entries = ((file_path, os.path.basename(file_path)) for file_path in file_paths
+                   if os.path.exists(file_path))
 
-        elif archive_type == 'tar.gz':
-            with tarfile.open(archive_path, 'w:gz') as tarf:
-                for file_path in file_paths:
-                    if os.path.exists(file_path):
-                        # Add file to tar with relative path
-                        arcname = os.path.basename(file_path)
-                        tarf.add(file_path, arcname=arcname)
-            return True, None
-
-        else:
-            return False, f"Unsupported archive type: {archive_type}"
+        write_archive(entries, archive_path, archive_type, cancel_event, workers, compression)
+        return True, None
 
+    except (_Cancelled, ArchiveCancelled):
+        _remove_partial(archive_path)
+        return False, "Archive cancelled"
     except Exception as e:
         return False, f"Error creating archive: {str(e)}"
 
-def create_folder_archive(folder_path: str, archive_path: str = None, archive_type: str = 'zip') -> Tuple[bool, Optional[str]]:
+def create_folder_archive(folder_path: str, archive_path: str = None, archive_type: str = 'zip',
+                          cancel_event: Optional[threading.Event] = None,
+                          workers: Optional[int] = None,
+                          compression: str = COMPRESS_AUTO) -> Tuple[bool, Optional[str]]:
     """
     Creates a compressed archive of an entire folder.
 
+    The files are compressed on several threads (see archive_writer), and
+    the result is a standard archive that any zip or tar tool can read.
+    By default, files that are already compressed (images, video, archives)
+    are stored rather than compressed again.
+
     Args:
         folder_path: Path to the folder to archive
         archive_path: Path where the archive will be created (if None, uses the parent directory of the folder)
-        archive_type: Type of archive ('zip' or 'tar.gz')
+        archive_type: Type of archive ('zip', 'tar', 'tar.gz', 'tar.xz' or 'tar.zst')
+        cancel_event: Event that stops archiving when set; the partial archive is removed (optional)
+        workers: Number of compression threads (if None, uses one per CPU)
+        compression: 'auto' to store already compressed files, 'always' or 'store'
 
     Returns:
         Tuple containing success status and error message if any
@@ -205,41 +318,35 @@ def create_folder_archive(folder_path: str, archive_path: str = None, archive_ty
         if not os.path.exists(folder_path):
             return False, f"Folder not found: {folder_path}"
 
+        if archive_type not in ARCHIVE_TYPES:
+            return False, f"Unsupported archive type: {archive_type}"
+
         folder_name = os.path.basename(folder_path)
 
         # If archive_path is None, create one based on the folder's parent directory
         if archive_path is None:
             parent_dir = os.path.dirname(folder_path)
             timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-
-            if archive_type == 'zip':
-                archive_path = os.path.join(parent_dir, f"{folder_name}_{timestamp}.zip")
-            elif archive_type == 'tar.gz':
-                archive_path = os.path.join(parent_dir, f"{folder_name}_{timestamp}.tar.gz")
-            else:
-                return False, f"Unsupported archive type: {archive_type}"
+            archive_path = os.path.join(parent_dir, f"{folder_name}_{timestamp}.{archive_type}")
 
         # Create parent directory if it doesn't exist
         os.makedirs(os.path.dirname(archive_path), exist_ok=True)
 
         if archive_type == 'zip':
-            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(folder_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        # Calculate path inside the zip file
-                        rel_path = os.path.relpath(file_path, os.path.dirname(folder_path))
-                        zipf.write(file_path, rel_path)
-            return True, None
-
-        elif archive_type == 'tar.gz':
-            with tarfile.open(archive_path, 'w:gz') as tarf:
-                # Add the folder to the archive with its base name
-                tarf.add(folder_path, arcname=folder_name)
-            return True, None
-
+            # Calculate paths inside the zip file relative to the folder's parent
+            parent_dir = os.path.dirname(folder_path)
+            entries = ((entry.path, os.path.relpath(entry.path, parent_dir))
+                       for entry in scan_files(folder_path, cancel_event=cancel_event))
+            write_archive(entries, archive_path, archive_type, cancel_event, workers, compression)
+            _check_cancelled(cancel_event)
         else:
-            return False, f"Unsupported archive type: {archive_type}"
-
+            # Add the folder to the archive with its base name
+            write_archive([(folder_path, folder_name)], archive_path, archive_type, cancel_event, workers,
+                           compression)
+        return True, None
+
+    except (_Cancelled, ArchiveCancelled):
+        _remove_partial(archive_path)
+        return False, "Archive cancelled"
     except Exception as e:
         return False, f"Error creating folder archive: {str(e)}"
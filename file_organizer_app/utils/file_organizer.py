@@ -1,186 +1,128 @@
 import os
-import datetime
 import hashlib
 import shutil
-from typing import List, Tuple, Dict, Optional
+import threading
+from typing import Callable, Iterator, List, Tuple, Dict, Optional
+
+from file_organizer_app.utils.hash_cache import HashCache
+from file_organizer_app.utils.hash_pool import hash_files
+from file_organizer_app.utils.journal import OrganizeJournal, run_plan
+from file_organizer_app.utils.move_planner import count_moves, execute_plan, move_file, plan_moves, unique_name
+from file_organizer_app.utils.rules import RulesEngine, get_default_engine
+from file_organizer_app.utils.scanner import scan_files
 
 # Function to organize a single file
-def organize_file(file_path: str, dir_path: str) -> Tuple[bool, Optional[str]]:
+def organize_file(file_path: str, dir_path: str, engine: Optional[RulesEngine] = None) -> Tuple[bool, Optional[str]]:
     """
-    Organizes a single file by moving it to the appropriate folder based on its extension.
+    Organizes a single file by moving it to the folder chosen by the rules engine.
 
     Args:
         file_path: Path to the file to organize
         dir_path: Base directory for organizing
+        engine: Rules engine that picks the folder (if None, uses the default engine)
 
     Returns:
         Tuple containing success status and file extension if successful
     """
-    # Define common file extensions and their corresponding folders
-    extensions = {
-        '.pdf': 'pdf_only',
-        '.jpg': 'jpg_only',
-        '.png': 'png_only',
-        '.jpeg': 'jpeg_only',
-        '.docx': 'docx_only',
-        '.pptx': 'pptx_only',
-        '.doc': 'doc_only',
-        '.txt': 'txt_only',
-        '.xlsx': 'xlsx_only',
-        '.zip': 'zip_only',
-        '.mp3': 'mp3_only',
-        '.mp4': 'mp4_only',
-        '.exe': 'exe_only',
-        '.dll': 'dll_only',
-        '.html': 'html_only',
-        '.css': 'css_only',
-        '.js': 'js_only',
-        '.py': 'py_only',
-        '.java': 'java_only',
-        '.c': 'c_only',
-        '.cpp': 'cpp_only',
-        '.h': 'h_only',
-        '.json': 'json_only',
-        '.xml': 'xml_only',
-        '.csv': 'csv_only'
-    }
+    if engine is None:
+        engine = get_default_engine()
 
     try:
         # Get file extension
         file_ext = os.path.splitext(file_path)[-1].lower()
 
-        # Check if we handle this extension
-        if file_ext not in extensions:
+        # Check if a rule handles this file
+        folder = engine.route(file_path)
+        if folder is None:
             return False, None
 
         # Create destination folder if it doesn't exist
-        folder = extensions[file_ext]
         destination_folder_path = os.path.join(dir_path, folder)
         if not os.path.exists(destination_folder_path):
             os.makedirs(destination_folder_path)
 
-        # Get filename
-        filename = os.path.basename(file_path)
+        # Add a timestamp (and a counter if needed) to the name if it is taken
+        filename = unique_name(os.path.basename(file_path),
+                               lambda name: os.path.exists(os.path.join(destination_folder_path, name)))
         dest_path = os.path.join(destination_folder_path, filename)
 
-        # Check if destination file already exists
-        if os.path.exists(dest_path):
-            # Add a timestamp to make the filename unique
-            name, ext = os.path.splitext(filename)
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            new_filename = f"{name}_{timestamp}{ext}"
-            dest_path = os.path.join(destination_folder_path, new_filename)
-
-        # Move the file
-        os.rename(file_path, dest_path)
+        # Move the file (copying it if the folder is on another filesystem)
+        move_file(file_path, dest_path)
         return True, file_ext
     except Exception as e:
         print(f"Error organizing {file_path}: {e}")
         return False, None
 
 # Function to organize the files into folders
-def organize_files(dir_path: str) -> Dict[str, int]:
+def organize_files(dir_path: str, cancel_event: Optional[threading.Event] = None,
+                   engine: Optional[RulesEngine] = None, journal_dir: Optional[str] = None) -> Dict[str, int]:
     """
-    Organizes files in the given directory into folders based on file extension.
+    Organizes files in the given directory into folders chosen by the rules engine.
     Only creates folders for file types that are present in the directory.
 
     Args:
         dir_path: Path to the directory containing files to organize
+        cancel_event: Event that stops organizing when set; files already moved stay moved (optional)
+        engine: Rules engine that picks the folders (if None, uses the default engine)
+        journal_dir: Directory to write a journal of the run to, so that it can be
+            resumed or undone with the journal module (if None, no journal is kept)
 
     Returns:
         Dictionary with file types as keys and count of files moved as values
     """
-    # Define common file extensions and their corresponding folders
-    extensions = {
-        '.pdf': 'pdf_only',
-        '.jpg': 'jpg_only',
-        '.png': 'png_only',
-        '.jpeg': 'jpeg_only',
-        '.docx': 'docx_only',
-        '.pptx': 'pptx_only',
-        '.doc': 'doc_only',
-        '.txt': 'txt_only',
-        '.xlsx': 'xlsx_only',
-        '.zip': 'zip_only',
-        '.mp3': 'mp3_only',
-        '.mp4': 'mp4_only',
-        '.exe': 'exe_only',
-        '.dll': 'dll_only',
-        '.html': 'html_only',
-        '.css': 'css_only',
-        '.js': 'js_only',
-        '.py': 'py_only',
-        '.java': 'java_only',
-        '.c': 'c_only',
-        '.cpp': 'cpp_only',
-        '.h': 'h_only',
-        '.json': 'json_only',
-        '.xml': 'xml_only',
-        '.csv': 'csv_only'
-    }
-
-    # First scan to find which file types are actually present
-    present_extensions = set()
-    for root, _, file_names in os.walk(dir_path):
-        # Skip folders that might already be organized
-        if any(folder in root for folder in extensions.values()):
-            continue
+    if engine is None:
+        engine = get_default_engine()
 
-        for file in file_names:
-            file_ext = os.path.splitext(file)[-1].lower()
-            if file_ext in extensions:
-                present_extensions.add(file_ext)
+    # Scan once to find the files to move and the folder of each
+    files = []
+    file_exts = []
+    for entry in scan_files(dir_path, skip_dir=engine.skip_dir(dir_path), cancel_event=cancel_event):
+        folder = engine.route(entry.path)
+        if folder is not None:
+            files.append((entry.path, folder))
+            file_exts.append(os.path.splitext(entry.name)[-1].lower())
 
-    # Create folders only for file types that are present
-    for ext in present_extensions:
-        folder = extensions[ext]
-        destination_folder_path = os.path.join(dir_path, folder)
-        if not os.path.exists(destination_folder_path):
-            os.makedirs(destination_folder_path)
+    # Plan every move up front: each destination folder is listed once and
+    # name conflicts are resolved in memory, then the moves are applied in bulk
+    plan = plan_moves(files, dir_path, file_exts)
+    if journal_dir:
+        journal = OrganizeJournal.create(dir_path, plan, journal_dir)
+        moved, errors = run_plan(journal, plan, cancel_event)
+    else:
+        moved, errors = execute_plan(plan, cancel_event)
+    for error in errors:
+        print(error)
 
     # Dictionary to track number of files moved by type
-    files_moved = {ext: 0 for ext in extensions.keys()}
+    files_moved = {ext: 0 for ext in engine.extensions}
+    files_moved.update(count_moves(moved))
 
-    # Walk through directory and organize files
-    for root, _, file_names in os.walk(dir_path):
-        # Skip the destination folders to avoid moving already organized files
-        if any(folder in root for folder in extensions.values()):
-            continue
+    return files_moved
 
-        for file in file_names:
-            file_ext = os.path.splitext(file)[-1].lower()
-            if file_ext in extensions:
-                source_path = os.path.join(root, file)
-                dest_folder = os.path.join(dir_path, extensions[file_ext])
-                dest_path = os.path.join(dest_folder, file)
-
-                # Check if destination file already exists
-                if os.path.exists(dest_path):
-                    # Add a timestamp to make the filename unique
-                    filename, ext = os.path.splitext(file)
-                    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-                    new_filename = f"{filename}_{timestamp}{ext}"
-                    dest_path = os.path.join(dest_folder, new_filename)
-
-                try:
-                    os.rename(source_path, dest_path)
-                    files_moved[file_ext] += 1
-                except Exception as e:
-                    print(f"Error moving {file}: {e}")
+# Number of bytes read from each end of a file for the partial hash
+PARTIAL_HASH_SIZE = 4096
 
-    return files_moved
+# Cache key for partial hashes, which are only valid for the same sample size
+PARTIAL_HASH_KIND = f"partial-{PARTIAL_HASH_SIZE}"
 
 # Function to get file hash
-def get_file_hash(filepath: str) -> str:
+def get_file_hash(filepath: str, cache: Optional[HashCache] = None) -> str:
     """
     Calculates MD5 hash of a file.
 
     Args:
         filepath: Path to the file
+        cache: Hash cache to look the file up in and store its hash to (optional)
 
     Returns:
         MD5 hash of the file as a hexadecimal string
     """
+    if cache is not None:
+        stats = os.stat(filepath)
+        cached_hash = cache.get(filepath, stats)
+        if cached_hash is not None:
+            return cached_hash
+
     hasher = hashlib.md5()
 
     with open(filepath, 'rb') as f:
@@ -189,33 +131,209 @@ def get_file_hash(filepath: str) -> str:
             if not chunk:
                 break
             hasher.update(chunk)
+
+    if cache is not None:
+        cache.put(filepath, stats, hasher.hexdigest())
+    return hasher.hexdigest()
+
+# Function to get a hash of the first and last bytes of a file
+def get_partial_hash(filepath: str, size: int, chunk_size: int = PARTIAL_HASH_SIZE) -> str:
+    """
+    Calculates MD5 hash of the first and last chunk_size bytes of a file.
+
+    Args:
+        filepath: Path to the file
+        size: Size of the file in bytes
+        chunk_size: Number of bytes to read from each end of the file
+
+    Returns:
+        MD5 hash of the sampled bytes as a hexadecimal string
+    """
+    hasher = hashlib.md5()
+
+    with open(filepath, 'rb') as f:
+        hasher.update(f.read(chunk_size))
+        if size > chunk_size:
+            f.seek(max(chunk_size, size - chunk_size))
+            hasher.update(f.read(chunk_size))
     return hasher.hexdigest()
 
+def _group_by_size(path: str, cancel_event: Optional[threading.Event] = None) -> Tuple[List[str], Dict[str, os.stat_result], Dict[int, List[str]]]:
+    """
+    Walks a directory and groups its files by size.
+
+    Args:
+        path: Path to the directory to walk
+        cancel_event: Event that stops the walk when set (optional)
+
+    Returns:
+        Tuple containing all file paths in walk order, a dictionary mapping
+        each path to its stat result and a dictionary mapping each size to
+        the paths of files with that size
+    """
+    file_paths = []
+    file_stats = {}
+    by_size = {}
+
+    for entry in scan_files(path, cancel_event=cancel_event):
+        filepath = entry.path
+        try:
+            stats = entry.stat()
+        except Exception as e:
+            print(f"Error processing {filepath}: {e}")
+            continue
+        file_paths.append(filepath)
+        file_stats[filepath] = stats
+        by_size.setdefault(stats.st_size, []).append(filepath)
+
+    return file_paths, file_stats, by_size
+
+def _hash_with_cache(items: List, hash_func: Callable[..., str], kind: str,
+                     file_stats: Dict[str, os.stat_result], cache: Optional[HashCache],
+                     workers: Optional[int], use_processes: bool,
+                     cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Hashes files on the worker pool, taking unchanged files from the cache.
+
+    Args:
+        items: File paths, or tuples of hash function arguments starting with the file path
+        hash_func: Function that hashes a file
+        kind: Kind of hash stored in the cache
+        file_stats: Dictionary mapping each path to its stat result
+        cache: Hash cache to use (if None, every file is hashed)
+        workers: Number of hashing workers
+        use_processes: Whether to hash in worker processes instead of threads
+        cancel_event: Event that stops hashing when set (optional)
+
+    Returns:
+        Iterator of tuples containing the file path, its hash (or None) and
+        the exception raised while hashing it (or None)
+    """
+    if cache is None:
+        yield from hash_files(items, hash_func, workers, use_processes, cancel_event=cancel_event)
+        return
+
+    to_hash = []
+    for item in items:
+        filepath = item[0] if isinstance(item, tuple) else item
+        cached_hash = cache.get(filepath, file_stats[filepath], kind)
+        if cached_hash is not None:
+            yield filepath, cached_hash, None
+        else:
+            to_hash.append(item)
+
+    for filepath, file_hash, error in hash_files(to_hash, hash_func, workers, use_processes,
+                                                 cancel_event=cancel_event):
+        if not error:
+            cache.put(filepath, file_stats[filepath], file_hash, kind)
+        yield filepath, file_hash, error
+
 # Function to find duplicate files
-def find_duplicate_files(path: str) -> List[Tuple[str, str]]:
+def find_duplicate_files(path: str, workers: Optional[int] = None, use_processes: bool = False,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         cache: Optional[HashCache] = None,
+                         cancel_event: Optional[threading.Event] = None) -> List[Tuple[str, str]]:
     """
     Finds duplicate files in the given directory.
 
+    Files are compared in stages so that only possible duplicates are read:
+    files with a unique size are skipped, files sharing a size are compared
+    by a hash of their first and last bytes, and only files that still
+    collide get a full content hash. Hashing runs on a pool of workers.
+    When a cache is given, files that are unchanged since they were last
+    hashed are not read at all.
+
     Args:
         path: Path to the directory to search for duplicates
+        workers: Number of hashing workers (if None, chosen from the core count)
+        use_processes: Whether to hash in worker processes instead of threads
+        progress_callback: Function called with the number of files checked and the total to check
+        cache: Hash cache used to skip reading unchanged files (optional); entries
+            for files no longer under path are evicted from it
+        cancel_event: Event that stops the search when set; only the duplicates
+            confirmed by then are returned (optional)
 
     Returns:
         List of tuples containing paths of duplicate files
     """
+    file_paths, file_stats, by_size = _group_by_size(path, cancel_event)
+
+    # Files small enough to be read whole by the partial hash are hashed
+    # in full straight away; larger ones get a partial hash first
+    small_files = []
+    large_files = []
+    for size, same_size in by_size.items():
+        if len(same_size) < 2:
+            continue
+        if size <= PARTIAL_HASH_SIZE * 2:
+            small_files.extend(same_size)
+        else:
+            large_files.extend((filepath, size) for filepath in same_size)
+
+    total = len(small_files) + len(large_files)
+    processed = 0
+
+    def report(count: int) -> None:
+        nonlocal processed
+        processed += count
+        if progress_callback and count:
+            progress_callback(processed, total)
+
+    # Full content hash for every file that may have a duplicate
+    full_hashes = {}
+
+    for filepath, file_hash, error in _hash_with_cache(small_files, get_file_hash, "md5", file_stats, cache,
+                                                         workers, use_processes, cancel_event):
+        if error:
+            print(f"Error processing {filepath}: {error}")
+        else:
+            full_hashes[filepath] = file_hash
+        report(1)
+
+    # Partial hashes are only comparable between files of the same size
+    sizes = dict(large_files)
+    by_partial = {}
+    for filepath, partial, error in _hash_with_cache(large_files, get_partial_hash, PARTIAL_HASH_KIND, file_stats, cache,
+                                                       workers, use_processes, cancel_event):
+        if error:
+            print(f"Error processing {filepath}: {error}")
+            report(1)
+        else:
+            by_partial.setdefault((sizes[filepath], partial), []).append(filepath)
+
+    candidates = []
+    for same_partial in by_partial.values():
+        if len(same_partial) < 2:
+            report(1)
+        else:
+            candidates.extend(same_partial)
+
+    for filepath, file_hash, error in _hash_with_cache(candidates, get_file_hash, "md5", file_stats, cache,
+                                                         workers, use_processes, cancel_event):
+        if error:
+            print(f"Error processing {filepath}: {error}")
+        else:
+            full_hashes[filepath] = file_hash
+        report(1)
+
+    if cache is not None:
+        # A cancelled walk may not have seen every file, so only evict after a full one
+        if cancel_event is None or not cancel_event.is_set():
+            cache.evict_missing(path, file_paths)
+        cache.flush()
+
+    # Pair files in walk order, as a single hashing pass would
     seen_hash = {}
     duplicates = []
 
-    for root, _, files in os.walk(path):
-        for name in files:
-            filepath = os.path.join(root, name)
-            try:
-                file_hash = get_file_hash(filepath)
-
-                if file_hash in seen_hash:
-                    duplicates.append((filepath, seen_hash[file_hash]))
-                else:
-                    seen_hash[file_hash] = filepath
-            except Exception as e:
-                print(f"Error processing {filepath}: {e}")
+    for filepath in file_paths:
+        file_hash = full_hashes.get(filepath)
+        if file_hash is None:
+            continue
+
+        if file_hash in seen_hash:
+            duplicates.append((filepath, seen_hash[file_hash]))
+        else:
+            seen_hash[file_hash] = filepath
 
     return duplicates
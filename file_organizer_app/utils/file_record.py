@@ -0,0 +1,236 @@
+import os
+import sys
+import datetime
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Fields that can be read from a FileRecord like dictionary keys
+RECORD_FIELDS = ("path", "name", "size", "created", "modified", "accessed", "extension")
+
+class FileRecord:
+    """
+    Compact metadata for a single file.
+
+    Timestamps are kept as floats and only turned into datetime objects when
+    the created, modified or accessed properties are read. Records can also
+    be read like the dictionaries returned by earlier versions of
+    get_file_metadata, e.g. record["path"].
+    """
+
+    __slots__ = ("path", "size", "ctime", "mtime", "atime", "extension")
+
+    def __init__(self, path: str, size: int, ctime: float, mtime: float, atime: float,
+                 extension: Optional[str] = None):
+        """
+        Create a file record.
+
+        Args:
+            path: Path to the file
+            size: Size of the file in bytes
+            ctime: Creation (or metadata change) time as a timestamp
+            mtime: Modification time as a timestamp
+            atime: Access time as a timestamp
+            extension: Lower-case file extension (if None, taken from the path)
+        """
+        if extension is None:
+            extension = os.path.splitext(path)[1].lower()
+
+        self.path = path
+        self.size = size
+        self.ctime = ctime
+        self.mtime = mtime
+        self.atime = atime
+        # Extensions repeat across millions of files, so share one string each
+        self.extension = sys.intern(extension)
+
+    @classmethod
+    def from_stats(cls, path: str, stats: os.stat_result) -> "FileRecord":
+        """
+        Create a file record from the result of os.stat.
+
+        Args:
+            path: Path to the file
+            stats: Result of os.stat for the file
+
+        Returns:
+            The file record
+        """
+        return cls(path, stats.st_size, stats.st_ctime, stats.st_mtime, stats.st_atime)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def created(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.ctime)
+
+    @property
+    def modified(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.mtime)
+
+    @property
+    def accessed(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.atime)
+
+    def __getitem__(self, key: str):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, any]:
+        """
+        Convert the record to a metadata dictionary.
+
+        Returns:
+            Dictionary containing the file metadata
+        """
+        return {field: getattr(self, field) for field in RECORD_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.path!r}, size={self.size})"
+
+class FileRecordStore:
+    """
+    Column-oriented store of file metadata.
+
+    Sizes and timestamps are kept in typed arrays and extensions as indexes
+    into a shared table, so a store uses a fraction of the memory of one
+    object per file. Filtering and sorting work on the columns and return
+    row indexes; FileRecord objects are only created for rows that are read.
+    """
+
+    def __init__(self, records: Iterable[FileRecord] = ()):
+        """
+        Create a store, optionally filled with records.
+
+        Args:
+            records: File records to add to the store
+        """
+        self.clear()
+        self.extend(records)
+
+    def clear(self) -> None:
+        """Remove every record from the store."""
+        self.paths = []
+        self.sizes = array("q")
+        self.ctimes = array("d")
+        self.mtimes = array("d")
+        self.atimes = array("d")
+        self.extension_codes = array("I")
+        self.extensions = []
+        self._extension_index = {}
+
+    def _extension_code(self, extension: str) -> int:
+        code = self._extension_index.get(extension)
+        if code is None:
+            code = len(self.extensions)
+            self.extensions.append(sys.intern(extension))
+            self._extension_index[extension] = code
+        return code
+
+    def append(self, record: FileRecord) -> None:
+        """
+        Add a record to the store.
+
+        Args:
+            record: The file record to add
+        """
+        self.paths.append(record.path)
+        self.sizes.append(record.size)
+        self.ctimes.append(record.ctime)
+        self.mtimes.append(record.mtime)
+        self.atimes.append(record.atime)
+        self.extension_codes.append(self._extension_code(record.extension))
+
+    def extend(self, records: Iterable[FileRecord]) -> None:
+        """
+        Add several records to the store.
+
+        Args:
+            records: The file records to add
+        """
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, index: int) -> FileRecord:
+        return FileRecord(self.paths[index], self.sizes[index], self.ctimes[index],
+                          self.mtimes[index], self.atimes[index],
+                          self.extensions[self.extension_codes[index]])
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        for index in range(len(self.paths)):
+            yield self[index]
+
+    def records(self, indexes: Iterable[int]) -> Iterator[FileRecord]:
+        """
+        Read the records at the given row indexes.
+
+        Args:
+            indexes: Row indexes to read
+
+        Returns:
+            Iterator of file records
+        """
+        for index in indexes:
+            yield self[index]
+
+    def filter_extension(self, extension: str) -> List[int]:
+        """
+        Find the rows with a given extension.
+
+        Args:
+            extension: Lower-case file extension, e.g. '.pdf'
+
+        Returns:
+            List of row indexes
+        """
+        code = self._extension_index.get(extension)
+        if code is None:
+            return []
+        return [index for index, value in enumerate(self.extension_codes) if value == code]
+
+    def sort_indexes(self, column: str, indexes: Optional[List[int]] = None,
+                     reverse: bool = False) -> List[int]:
+        """
+        Sort rows by a column.
+
+        Args:
+            column: Column to sort by ('path', 'name', 'size', 'created', 'modified', 'accessed' or 'extension')
+            indexes: Row indexes to sort (if None, sorts every row)
+            reverse: Whether to sort in descending order
+
+        Returns:
+            List of row indexes in sorted order
+        """
+        if indexes is None:
+            indexes = range(len(self.paths))
+
+        keys = {
+            "path": self.paths.__getitem__,
+            "name": lambda index: os.path.basename(self.paths[index]),
+            "size": self.sizes.__getitem__,
+            "created": self.ctimes.__getitem__,
+            "modified": self.mtimes.__getitem__,
+            "accessed": self.atimes.__getitem__,
+            "extension": lambda index: self.extensions[self.extension_codes[index]],
+        }
+        return sorted(indexes, key=keys[column], reverse=reverse)
+
+    def total_size(self, indexes: Optional[Iterable[int]] = None) -> int:
+        """
+        Add up the sizes of rows.
+
+        Args:
+            indexes: Row indexes to add up (if None, adds up every row)
+
+        Returns:
+            Total size in bytes
+        """
+        if indexes is None:
+            return sum(self.sizes)
+        sizes = self.sizes
+        return sum(sizes[index] for index in indexes)
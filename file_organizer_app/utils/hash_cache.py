@@ -0,0 +1,184 @@
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+# Default location of the on-disk hash cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".file_organizer", "hash_cache.db")
+
+# Number of writes buffered before they are committed
+COMMIT_INTERVAL = 500
+
+class HashCache:
+    """
+    On-disk cache of file hashes backed by SQLite.
+
+    Entries are keyed on the device and inode of a file and are only valid
+    while its size and modification time (in nanoseconds) are unchanged, so
+    an unchanged file never has to be read again. The path of each entry is
+    kept so that entries for deleted files can be evicted.
+    """
+
+    def __init__(self, db_path: str = None):
+        """
+        Open (or create) a hash cache.
+
+        Args:
+            db_path: Path of the SQLite database (if None, uses DEFAULT_CACHE_PATH)
+        """
+        self.db_path = db_path if db_path else DEFAULT_CACHE_PATH
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+
+        # Loaded here so the organizer can be imported before a cache is needed
+        import sqlite3
+
+        # Scans run in worker threads, so the connection is shared behind a lock
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " device INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " path TEXT NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " PRIMARY KEY (device, inode, kind))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS hashes_path ON hashes (path)")
+        self._conn.commit()
+
+    def get(self, path: str, stats: os.stat_result, kind: str = "md5") -> Optional[str]:
+        """
+        Looks up the cached hash of a file.
+
+        Args:
+            path: Path to the file
+            stats: Result of os.stat for the file
+            kind: Kind of hash to look up (e.g. 'md5' or 'partial')
+
+        Returns:
+            The cached hash, or None if there is no valid entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, hash, path FROM hashes WHERE device = ? AND inode = ? AND kind = ?",
+                (stats.st_dev, stats.st_ino, kind)
+            ).fetchone()
+
+            if row is None or row[0] != stats.st_size or row[1] != stats.st_mtime_ns:
+                self.misses += 1
+                return None
+
+            # Follow renames so the entry is not evicted under its old path
+            abs_path = os.path.abspath(path)
+            if row[3] != abs_path:
+                self._conn.execute(
+                    "UPDATE hashes SET path = ? WHERE device = ? AND inode = ? AND kind = ?",
+                    (abs_path, stats.st_dev, stats.st_ino, kind)
+                )
+                self._pending_writes += 1
+
+            self.hits += 1
+            return row[2]
+
+    def put(self, path: str, stats: os.stat_result, file_hash: str, kind: str = "md5") -> None:
+        """
+        Stores the hash of a file, replacing any stale entry for it.
+
+        Args:
+            path: Path to the file
+            stats: Result of os.stat for the file, taken before it was hashed
+            file_hash: Hash of the file
+            kind: Kind of hash being stored (e.g. 'md5' or 'partial')
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (device, inode, kind, size, mtime_ns, path, hash)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (stats.st_dev, stats.st_ino, kind, stats.st_size, stats.st_mtime_ns,
+                 os.path.abspath(path), file_hash)
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= COMMIT_INTERVAL:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def evict_missing(self, root: str = None, present_paths: Iterable[str] = None) -> int:
+        """
+        Removes entries for files that no longer exist.
+
+        Args:
+            root: Only consider entries under this directory (if None, considers all entries)
+            present_paths: Paths known to exist under root (if None, each entry's path is checked on disk)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if root is None:
+                rows = self._conn.execute("SELECT DISTINCT path FROM hashes").fetchall()
+            else:
+                # Range query on the path index instead of a LIKE pattern
+                prefix = os.path.join(os.path.abspath(root), "")
+                rows = self._conn.execute(
+                    "SELECT DISTINCT path FROM hashes WHERE path >= ? AND path < ?",
+                    (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+                ).fetchall()
+
+            if present_paths is not None:
+                present = {os.path.abspath(path) for path in present_paths}
+                missing = [(row[0],) for row in rows if row[0] not in present]
+            else:
+                missing = [(row[0],) for row in rows if not os.path.exists(row[0])]
+
+            self._conn.executemany("DELETE FROM hashes WHERE path = ?", missing)
+            self._conn.commit()
+            self._pending_writes = 0
+            return len(missing)
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM hashes")
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Gets the hit and miss counters of the cache.
+
+        Returns:
+            Dictionary containing the hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def flush(self) -> None:
+        """Commits any buffered writes to disk."""
+        with self._lock:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def close(self) -> None:
+        """Commits buffered writes and closes the database."""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
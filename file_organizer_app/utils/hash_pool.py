@@ -0,0 +1,99 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+def default_workers(use_processes: bool = False) -> int:
+    """
+    Returns the default number of hashing workers.
+
+    Threads spend most of their time waiting on reads, so several are run per
+    core to keep the disk queue full. Processes are limited to one per core.
+
+    Args:
+        use_processes: Whether the workers are processes rather than threads
+
+    Returns:
+        Number of workers to use
+    """
+    cpus = os.cpu_count() or 1
+    if use_processes:
+        return cpus
+    return min(32, cpus * 4)
+
+def _run_hash(hash_func: Callable[..., str], args: Tuple) -> Tuple[Optional[str], Optional[Exception]]:
+    """
+    Runs a hash function, capturing any exception it raises.
+
+    Args:
+        hash_func: Function that hashes a file
+        args: Arguments to pass to the hash function
+
+    Returns:
+        Tuple containing the hash (or None) and the exception raised (or None)
+    """
+    try:
+        return hash_func(*args), None
+    except Exception as e:
+        return None, e
+
+def hash_files(items: Iterable[Union[str, Tuple]], hash_func: Callable[..., str],
+               workers: Optional[int] = None, use_processes: bool = False,
+               max_in_flight: Optional[int] = None,
+               cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, Optional[str], Optional[Exception]]]:
+    """
+    Hashes files on a pool of workers and yields the results in input order.
+
+    At most max_in_flight files are queued on the pool at any time, so large
+    inputs are consumed lazily and memory use stays bounded.
+
+    Args:
+        items: File paths, or tuples of hash function arguments starting with the file path
+        hash_func: Function that hashes a file (must be picklable when use_processes is True)
+        workers: Number of workers (if None, chosen from the core count)
+        use_processes: Whether to hash in worker processes instead of threads
+        max_in_flight: Maximum number of queued files (if None, four per worker)
+        cancel_event: Event that stops queueing files when set; files already
+            queued but not started are dropped (optional)
+
+    Returns:
+        Iterator of tuples containing the file path, its hash (or None) and
+        the exception raised while hashing it (or None)
+    """
+    if workers is None:
+        workers = default_workers(use_processes)
+    if max_in_flight is None:
+        max_in_flight = workers * 4
+
+    if use_processes:
+        # multiprocessing is slow to import, so only load it when processes are used
+        from concurrent.futures import ProcessPoolExecutor
+        executor_class = ProcessPoolExecutor
+    else:
+        executor_class = ThreadPoolExecutor
+    pending = deque()
+
+    with executor_class(max_workers=workers) as executor:
+        for item in items:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+            args = item if isinstance(item, tuple) else (item,)
+            pending.append((args[0], executor.submit(_run_hash, hash_func, args)))
+
+            # Deliver the oldest result before queueing more work
+            if len(pending) >= max_in_flight:
+                path, future = pending.popleft()
+                file_hash, error = future.result()
+                yield path, file_hash, error
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                for path, future in pending:
+                    future.cancel()
+                return
+
+            path, future = pending.popleft()
+            file_hash, error = future.result()
+            yield path, file_hash, error
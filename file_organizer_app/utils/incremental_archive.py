@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import shutil
+import tarfile
+import zipfile
+import datetime
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from file_organizer_app.utils.archive_writer import (
+    ARCHIVE_TYPES, COMPRESS_AUTO, ArchiveCancelled, write_archive
+)
+from file_organizer_app.utils.file_organizer import get_file_hash
+from file_organizer_app.utils.hash_pool import hash_files
+from file_organizer_app.utils.scanner import scan_files
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+# Archive modes: a full archive stores every file, an incremental one what
+# changed since the previous archive and a differential one what changed
+# since the last full archive
+FULL = "full"
+INCREMENTAL = "incremental"
+DIFFERENTIAL = "differential"
+
+# Fields of a file in a manifest
+SIZE, MTIME_NS, HASH, ARCHIVE = range(4)
+
+def load_manifest(manifest_path: str) -> Dict:
+    """
+    Loads an archive manifest.
+
+    A manifest describes the whole folder at the time of its archive: every
+    file with its size, modification time, MD5 hash and the name of the
+    archive in the chain that holds its content. It also lists the files
+    stored in its own archive and the files deleted since its base.
+
+    Args:
+        manifest_path: Path to the manifest
+
+    Returns:
+        The manifest as a dictionary
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {manifest_path}")
+    return manifest
+
+def list_manifests(archive_dir: str, folder_path: str) -> List[Tuple[str, Dict]]:
+    """
+    Lists the manifests of a folder's archives, oldest first.
+
+    Args:
+        archive_dir: Directory holding the archives
+        folder_path: Folder the archives were made of
+
+    Returns:
+        List of tuples containing the path of each manifest and its contents
+    """
+    folder_path = os.path.abspath(folder_path)
+    prefix = os.path.basename(folder_path) + "_"
+    manifests = []
+    try:
+        names = os.listdir(archive_dir)
+    except FileNotFoundError:
+        return manifests
+
+    for name in names:
+        if not (name.startswith(prefix) and name.endswith(MANIFEST_SUFFIX)):
+            continue
+        path = os.path.join(archive_dir, name)
+        try:
+            manifest = load_manifest(path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading manifest {path}: {e}")
+            continue
+        if manifest.get("folder") == folder_path:
+            manifests.append((path, manifest))
+
+    manifests.sort(key=lambda item: item[1]["created"])
+    return manifests
+
+def _is_archive_file(name: str, folder_name: str) -> bool:
+    """
+    Checks whether a file name is one of a folder's archives or manifests.
+
+    Args:
+        name: File name
+        folder_name: Name of the archived folder
+
+    Returns:
+        True if the name has the form the archives and manifests of the folder are given
+    """
+    if not name.startswith(folder_name + "_"):
+        return False
+    suffixes = (MANIFEST_SUFFIX, MANIFEST_SUFFIX + ".tmp") + tuple("." + t for t in ARCHIVE_TYPES)
+    return name.endswith(suffixes)
+
+def _write_manifest(manifest_path: str, manifest: Dict) -> None:
+    # Written to a temporary name first so a crash never leaves half a manifest
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, manifest_path)
+
+def create_incremental_archive(folder_path: str, archive_dir: str = None, archive_type: str = 'tar.gz',
+                               mode: str = INCREMENTAL, cancel_event: Optional[threading.Event] = None,
+                               workers: Optional[int] = None,
+                               compression: str = COMPRESS_AUTO) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Archives the files of a folder that changed since an earlier archive.
+
+    The folder is compared with the manifest of the previous archive (or of
+    the last full archive in differential mode). Files whose size and
+    modification time are unchanged are not read at all; the others are
+    hashed, and only files that are new or whose content changed are
+    written to the new archive. A manifest is written next to the archive,
+    so the chain can be restored with restore_archive. If there is no
+    earlier archive, or the mode is FULL, every file is archived.
+
+    Args:
+        folder_path: Path to the folder to archive
+        archive_dir: Directory for the archives and manifests (if None, uses the parent directory of the folder)
+        archive_type: Type of archive ('zip', 'tar', 'tar.gz', 'tar.xz' or 'tar.zst')
+        mode: FULL, INCREMENTAL or DIFFERENTIAL
+        cancel_event: Event that stops archiving when set; the partial archive is removed (optional)
+        workers: Number of compression threads (if None, uses one per CPU)
+        compression: 'auto' to store already compressed files, 'always' or 'store'
+
+    Returns:
+        Tuple containing the path of the new manifest (or None) and error message if any
+    """
+    archive_path = None
+    try:
+        if not os.path.isdir(folder_path):
+            return None, f"Folder not found: {folder_path}"
+        if archive_type not in ARCHIVE_TYPES:
+            return None, f"Unsupported archive type: {archive_type}"
+        if mode not in (FULL, INCREMENTAL, DIFFERENTIAL):
+            return None, f"Unsupported archive mode: {mode}"
+
+        folder_path = os.path.abspath(folder_path)
+        folder_name = os.path.basename(folder_path)
+        archive_dir = archive_dir if archive_dir else os.path.dirname(folder_path)
+        os.makedirs(archive_dir, exist_ok=True)
+
+        # Pick the manifest to compare with
+        base_path, base = None, None
+        if mode != FULL:
+            manifests = list_manifests(archive_dir, folder_path)
+            if mode == DIFFERENTIAL:
+                manifests = [item for item in manifests if item[1]["mode"] == FULL]
+            if manifests:
+                base_path, base = manifests[-1]
+        if base is None:
+            mode = FULL
+        previous = base["files"] if base else {}
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        name = f"{folder_name}_{timestamp}"
+        counter = 1
+        while os.path.exists(os.path.join(archive_dir, name + MANIFEST_SUFFIX)):
+            name = f"{folder_name}_{timestamp}_{counter}"
+            counter += 1
+        archive_name = f"{name}.{archive_type}"
+        archive_path = os.path.join(archive_dir, archive_name)
+        manifest_path = os.path.join(archive_dir, name + MANIFEST_SUFFIX)
+
+        # Find the files whose size or modification time changed
+        files = {}
+        to_hash = []
+        # The archives themselves are left out if they are kept inside the
+        # folder: a subfolder holding them is skipped, and if they are in the
+        # folder itself, they are recognized by their names
+        archive_dir_path = os.path.abspath(archive_dir)
+        archives_in_root = archive_dir_path == folder_path
+        for entry in scan_files(folder_path, skip_dir=lambda path: (os.path.abspath(path) == archive_dir_path
+                                                                    and not archives_in_root),
+                                cancel_event=cancel_event):
+            rel_path = os.path.relpath(entry.path, folder_path).replace(os.sep, "/")
+            if archives_in_root and "/" not in rel_path and _is_archive_file(rel_path, folder_name):
+                continue
+            try:
+                stats = entry.stat()
+            except OSError as e:
+                print(f"Error reading {entry.path}: {e}")
+                continue
+            old = previous.get(rel_path)
+            if old is not None and old[SIZE] == stats.st_size and old[MTIME_NS] == stats.st_mtime_ns:
+                files[rel_path] = list(old)
+            else:
+                files[rel_path] = [stats.st_size, stats.st_mtime_ns, None, archive_name]
+                to_hash.append(entry.path)
+        if cancel_event is not None and cancel_event.is_set():
+            return None, "Archive cancelled"
+
+        # Hash them; a file that was only touched keeps pointing at its old copy
+        stored = []
+        for path, file_hash, error in hash_files(to_hash, get_file_hash, cancel_event=cancel_event):
+            rel_path = os.path.relpath(path, folder_path).replace(os.sep, "/")
+            old = previous.get(rel_path)
+            if error is not None:
+                print(f"Error hashing {path}: {error}")
+                # Keep the last archived copy rather than recording the file as deleted
+                if old is not None:
+                    files[rel_path] = list(old)
+                else:
+                    del files[rel_path]
+                continue
+            record = files[rel_path]
+            record[HASH] = file_hash
+            if old is not None and old[HASH] == file_hash:
+                record[ARCHIVE] = old[ARCHIVE]
+            else:
+                stored.append(rel_path)
+        if cancel_event is not None and cancel_event.is_set():
+            return None, "Archive cancelled"
+
+        if stored or mode == FULL:
+            entries = [(os.path.join(folder_path, *rel_path.split("/")), rel_path) for rel_path in stored]
+            write_archive(entries, archive_path, archive_type, cancel_event, workers, compression)
+        else:
+            # Nothing to store; the manifest still records the deletions and touched files
+            archive_name = None
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "folder": folder_path,
+            "mode": mode,
+            "created": time.time(),
+            "archive": archive_name,
+            "archive_type": archive_type,
+            "base": os.path.basename(base_path) if base_path else None,
+            "stored": sorted(stored),
+            "deleted": sorted(set(previous) - set(files)),
+            "files": files,
+        }
+        _write_manifest(manifest_path, manifest)
+        return manifest_path, None
+
+    except ArchiveCancelled:
+        return None, "Archive cancelled"
+    except Exception as e:
+        if archive_path and os.path.exists(archive_path):
+            os.remove(archive_path)
+        return None, f"Error creating incremental archive: {str(e)}"
+
+def _open_tar(archive_path: str, archive_type: str) -> Tuple[tarfile.TarFile, Optional[BinaryIO]]:
+    """
+    Opens a TAR archive for reading.
+
+    Args:
+        archive_path: Path to the archive
+        archive_type: Type of the archive
+
+    Returns:
+        Tuple containing the open archive and a file to close after it (or None)
+    """
+    if archive_type != 'tar.zst':
+        # Not stream mode: it reads the back-to-back xz streams of parallel archives
+        return tarfile.open(archive_path, "r:*"), None
+
+    raw = open(archive_path, "rb")
+    try:
+        try:
+            import zstandard
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        except ImportError:
+            from compression import zstd
+            reader = zstd.ZstdFile(raw, "r")
+    except ImportError:
+        raw.close()
+        raise OSError("tar.zst archives need the zstandard package or Python 3.14 or newer")
+    return tarfile.open(fileobj=reader, mode="r|"), raw
+
+def _safe_path(dest_dir: str, rel_path: str) -> str:
+    """
+    Joins a path from a manifest to the restore directory.
+
+    Args:
+        dest_dir: Directory being restored into
+        rel_path: Path of a file relative to the archived folder, with / separators
+
+    Returns:
+        The path to restore the file to
+    """
+    parts = rel_path.split("/")
+    if rel_path.startswith("/") or any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Unsafe path in manifest: {rel_path}")
+    return os.path.join(dest_dir, *parts)
+
+def restore_archive(manifest_path: str, dest_dir: str,
+                    cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+    """
+    Restores a folder as it was when an archive was made.
+
+    The manifest records which archive of the chain holds the latest copy
+    of every file, so each archive is read once and only for the files
+    still current at that point; deleted files are not restored.
+
+    Args:
+        manifest_path: Path to the manifest of the archive to restore
+        dest_dir: Directory to restore the folder into
+        cancel_event: Event that stops restoring before the next archive member when set (optional)
+
+    Returns:
+        Tuple containing count of restored files and list of errors
+    """
+    restored = 0
+    errors = []
+    try:
+        manifest = load_manifest(manifest_path)
+    except (OSError, ValueError) as e:
+        return 0, [f"Error reading manifest {manifest_path}: {str(e)}"]
+
+    archive_dir = os.path.dirname(os.path.abspath(manifest_path))
+    by_archive = {}
+    for rel_path, record in manifest["files"].items():
+        by_archive.setdefault(record[ARCHIVE], {})[rel_path] = record
+
+    def restore_member(source: BinaryIO, rel_path: str, record: List) -> None:
+        nonlocal restored
+        target = _safe_path(dest_dir, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as out:
+            shutil.copyfileobj(source, out, 1024 * 1024)
+        os.utime(target, ns=(record[MTIME_NS], record[MTIME_NS]))
+        restored += 1
+
+    for archive_name, wanted in by_archive.items():
+        archive_path = os.path.join(archive_dir, archive_name)
+        archive_type = next((t for t in sorted(ARCHIVE_TYPES, key=len, reverse=True)
+                             if archive_name.endswith("." + t)), None)
+        try:
+            if archive_type == 'zip':
+                with zipfile.ZipFile(archive_path) as zipf:
+                    for rel_path in list(wanted):
+                        if cancel_event is not None and cancel_event.is_set():
+                            return restored, errors
+                        with zipf.open(rel_path) as source:
+                            restore_member(source, rel_path, wanted.pop(rel_path))
+            else:
+                # Read the archive front to back, picking out the wanted members
+                tarf, raw = _open_tar(archive_path, archive_type)
+                try:
+                    for member in tarf:
+                        if cancel_event is not None and cancel_event.is_set():
+                            return restored, errors
+                        if member.isfile() and member.name in wanted:
+                            restore_member(tarf.extractfile(member), member.name, wanted.pop(member.name))
+                finally:
+                    tarf.close()
+                    if raw is not None:
+                        raw.close()
+        except Exception as e:
+            errors.append(f"Error restoring from {archive_path}: {str(e)}")
+        for rel_path in wanted:
+            errors.append(f"Missing from {archive_name}: {rel_path}")
+
+    return restored, errors
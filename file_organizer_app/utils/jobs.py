@@ -0,0 +1,269 @@
+import threading
+import time
+import itertools
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class Job:
+    """
+    A long-running operation submitted to a JobManager.
+
+    The job function receives the job's cancel event and is expected to check
+    it in its loops (the scan, hash, archive and delete functions in utils
+    all accept it as cancel_event) and return early once it is set.
+    """
+
+    def __init__(self, job_id: int, name: str, func: Callable[[threading.Event], Any], key: Optional[str]):
+        """
+        Create a job.
+
+        Args:
+            job_id: Unique number of the job
+            name: Human-readable description of the job
+            func: Function to run, called with the job's cancel event
+            key: Resource the job works on (e.g. a directory); jobs with the same key never run at once
+        """
+        self.job_id = job_id
+        self.name = name
+        self.func = func
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self) -> None:
+        """Ask the job to stop; a queued job will not be started."""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds the job has been running, or ran for, if it has started."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def __repr__(self) -> str:
+        return f"Job({self.job_id}, {self.name!r}, {self.status})"
+
+class JobManager:
+    """
+    Runs jobs on a small pool of daemon worker threads.
+
+    Jobs wait in a queue until a worker is free and no other job with the
+    same key is running, so two clicks on the same directory run one after
+    the other instead of racing. The queue can be paused, and every job can
+    be cancelled through its cancel event.
+    """
+
+    def __init__(self, max_workers: int = 2, on_change: Optional[Callable[[Job], None]] = None):
+        """
+        Create a job manager.
+
+        Args:
+            max_workers: Maximum number of jobs running at once
+            on_change: Function called (from a worker thread) whenever a job changes state
+        """
+        self.max_workers = max_workers
+        self.on_change = on_change
+
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._jobs = []
+        self._running_keys = set()
+        self._workers = []
+        self._idle_workers = 0
+        self._paused = False
+        self._shutdown = False
+        self._ids = itertools.count(1)
+
+    def submit(self, name: str, func: Callable[[threading.Event], Any], key: Optional[str] = None) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            name: Human-readable description of the job
+            func: Function to run, called with the job's cancel event
+            key: Resource the job works on; jobs with the same key are run one at a time
+
+        Returns:
+            The queued job
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("Job manager has been shut down")
+
+            job = Job(next(self._ids), name, func, key)
+            self._jobs.append(job)
+            self._queue.append(job)
+
+            # Start another worker if none is free to take the job
+            if self._idle_workers == 0 and len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._worker, name=f"job-worker-{len(self._workers) + 1}",
+                                          daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+            self._condition.notify_all()
+
+        self._notify(job)
+        return job
+
+    def jobs(self) -> List[Job]:
+        """
+        Get all jobs submitted so far.
+
+        Returns:
+            List of jobs in submission order
+        """
+        with self._condition:
+            return list(self._jobs)
+
+    def active_jobs(self) -> List[Job]:
+        """
+        Get the jobs that are queued or running.
+
+        Returns:
+            List of unfinished jobs in submission order
+        """
+        with self._condition:
+            return [job for job in self._jobs if not job.finished]
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count jobs by state.
+
+        Returns:
+            Dictionary mapping each state to its number of jobs
+        """
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+        with self._condition:
+            for job in self._jobs:
+                counts[job.status] += 1
+        return counts
+
+    def cancel_all(self, key: Optional[str] = None) -> None:
+        """
+        Cancel every unfinished job, or only those working on one key.
+
+        Args:
+            key: Only cancel jobs with this key (if None, cancels all jobs)
+        """
+        for job in self.active_jobs():
+            if key is None or job.key == key:
+                job.cancel()
+
+        # Wake the workers so cancelled queued jobs are discarded
+        with self._condition:
+            self._condition.notify_all()
+
+    def pause(self) -> None:
+        """Stop starting queued jobs; running jobs carry on."""
+        with self._condition:
+            self._paused = True
+
+    def resume(self) -> None:
+        """Start queued jobs again after pause()."""
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def shutdown(self, cancel: bool = True) -> None:
+        """
+        Stop accepting jobs and let the workers exit.
+
+        Args:
+            cancel: Whether to cancel queued and running jobs
+        """
+        if cancel:
+            self.cancel_all()
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+
+    def _next_job(self) -> Optional[Job]:
+        # Called with the condition held; returns None when the worker should exit
+        while True:
+            for job in list(self._queue):
+                if job.cancelled:
+                    self._queue.remove(job)
+                    job.status = CANCELLED
+                    job.finished_at = time.time()
+                    self._condition.release()
+                    try:
+                        self._notify(job)
+                    finally:
+                        self._condition.acquire()
+                    break
+                if self._paused or self._shutdown:
+                    continue
+                if job.key is not None and job.key in self._running_keys:
+                    continue
+                self._queue.remove(job)
+                if job.key is not None:
+                    self._running_keys.add(job.key)
+                return job
+            else:
+                if self._shutdown:
+                    return None
+                self._idle_workers += 1
+                self._condition.wait()
+                self._idle_workers -= 1
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                job = self._next_job()
+                if job is None:
+                    return
+                job.status = RUNNING
+                job.started_at = time.time()
+
+            self._notify(job)
+
+            try:
+                job.result = job.func(job.cancel_event)
+                status = CANCELLED if job.cancelled else DONE
+            except Exception as e:
+                job.error = e
+                status = FAILED
+                print(f"Error in job {job.name}: {e}")
+
+            with self._condition:
+                job.status = status
+                job.finished_at = time.time()
+                if job.key is not None:
+                    self._running_keys.discard(job.key)
+                self._condition.notify_all()
+
+            self._notify(job)
+
+    def _notify(self, job: Job) -> None:
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"Error reporting job {job.name}: {e}")
@@ -0,0 +1,475 @@
+import os
+import json
+import stat
+import time
+import filecmp
+import datetime
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from file_organizer_app.utils.move_planner import (
+    DEFAULT_MOVE_WORKERS, Move, MovePlan, execute_plan, move_file, unique_name
+)
+
+# Default directory for organize journals
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".file_organizer", "journals")
+
+# Journals of finished runs (complete or undone) are removed after this many days
+JOURNAL_RETENTION_DAYS = 30
+
+# Completed moves are fsynced after this many records or seconds, whichever comes first
+FSYNC_INTERVAL_RECORDS = 256
+FSYNC_INTERVAL_SECONDS = 1.0
+
+# Run states
+INCOMPLETE = "incomplete"
+COMPLETE = "complete"
+UNDONE = "undone"
+
+def _is_copy(source: str, dest: str) -> bool:
+    """
+    Checks whether the destination is a finished copy of the source.
+
+    move_file only renames a cross-device copy into place after copying
+    the data and timestamps, so a finished copy has the same size and
+    modification time; the content is compared as well before the source
+    is treated as redundant.
+
+    Args:
+        source: Path the file was moved from
+        dest: Path the file was moved to
+
+    Returns:
+        True if both are symbolic links to the same target, or regular files
+        with the same size, modification time and content
+    """
+    try:
+        source_stats = os.lstat(source)
+        dest_stats = os.lstat(dest)
+        if stat.S_ISLNK(source_stats.st_mode) and stat.S_ISLNK(dest_stats.st_mode):
+            return os.readlink(source) == os.readlink(dest)
+        if not (stat.S_ISREG(source_stats.st_mode) and stat.S_ISREG(dest_stats.st_mode)):
+            return False
+        if (source_stats.st_size, source_stats.st_mtime_ns) != (dest_stats.st_size, dest_stats.st_mtime_ns):
+            return False
+        return filecmp.cmp(source, dest, shallow=False)
+    except OSError:
+        return False
+
+class OrganizeJournal:
+    """
+    Append-only journal of one organize run.
+
+    The whole move plan is written and fsynced before the first file is
+    moved, then every completed move is appended. Completion records are
+    fsynced in batches; moves whose record was lost in a crash are found
+    again when the run is resumed by checking where the file is.
+
+    A journal is a file of JSON lines: a 'run' record with the organized
+    directory and the folders the run creates, one 'plan' record per move,
+    then 'done', 'failed' and 'undone' records referring to moves by index,
+    and 'complete' or 'undo_complete' when the run or its undo finished.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open an existing journal.
+
+        Args:
+            path: Path to the journal file
+        """
+        self.path = path
+        self.dir_path = None
+        self.created_folders = []
+        self.moves = []
+        self.done = set()
+        self.failed = {}
+        self.undone = set()
+        self.state = INCOMPLETE
+
+        self._index = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._torn_at = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        if os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def create(cls, dir_path: str, plan: MovePlan, journal_dir: str = None) -> "OrganizeJournal":
+        """
+        Start a journal for a planned organize run.
+
+        Args:
+            dir_path: Directory being organized
+            plan: The move plan of the run
+            journal_dir: Directory to keep the journal in (if None, uses DEFAULT_JOURNAL_DIR);
+                journals of finished runs older than JOURNAL_RETENTION_DAYS are removed from it
+
+        Returns:
+            The journal, with the plan durably written
+        """
+        journal_dir = journal_dir if journal_dir else DEFAULT_JOURNAL_DIR
+        os.makedirs(journal_dir, exist_ok=True)
+        prune_journals(journal_dir)
+
+        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(journal_dir, f"organize_{timestamp}_{os.getpid()}.jsonl")
+        path = os.path.join(journal_dir, unique_name(os.path.basename(path),
+                                                     lambda name: os.path.exists(os.path.join(journal_dir, name))))
+
+        journal = cls(path)
+        journal.dir_path = os.path.abspath(dir_path)
+        journal.created_folders = sorted(plan.missing_folders)
+        journal.moves = list(plan.moves)
+        journal._index = {move: index for index, move in enumerate(journal.moves)}
+
+        journal._write({"type": "run", "dir": journal.dir_path, "folders": journal.created_folders,
+                        "started": time.time()})
+        for index, move in enumerate(journal.moves):
+            journal._write({"type": "plan", "id": index, "source": move.source, "dest": move.dest,
+                            "folder": move.folder, "key": move.key})
+        journal.flush()
+        return journal
+
+    def _load(self) -> None:
+        good_size = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    # A record cut short by a crash; everything before it is
+                    # intact, and it is cut off before anything is appended
+                    self._torn_at = good_size
+                    break
+                good_size += len(line)
+
+                kind = record["type"]
+                if kind == "run":
+                    self.dir_path = record["dir"]
+                    self.created_folders = record.get("folders", [])
+                elif kind == "plan":
+                    move = Move(record["source"], record["dest"], record["folder"], record.get("key"))
+                    self._index[move] = len(self.moves)
+                    self.moves.append(move)
+                elif kind == "done":
+                    self.done.add(record["id"])
+                    self.failed.pop(record["id"], None)
+                elif kind == "failed":
+                    self.failed[record["id"]] = record.get("error")
+                elif kind == "undone":
+                    self.undone.add(record["id"])
+                elif kind == "complete":
+                    self.state = COMPLETE
+                elif kind == "undo_complete":
+                    self.state = UNDONE
+
+    def _write(self, record: Dict) -> None:
+        # Called with the lock held (or before the journal is shared)
+        if self._file is None:
+            if self._torn_at is not None:
+                os.truncate(self.path, self._torn_at)
+                self._torn_at = None
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+        self._unsynced += 1
+
+    def _maybe_sync(self) -> None:
+        if (self._unsynced >= FSYNC_INTERVAL_RECORDS
+                or time.monotonic() - self._last_sync >= FSYNC_INTERVAL_SECONDS):
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record_done(self, move: Move) -> None:
+        """
+        Record that a move was applied.
+
+        Args:
+            move: The move
+        """
+        with self._lock:
+            index = self._index[move]
+            self.done.add(index)
+            self.failed.pop(index, None)
+            self._write({"type": "done", "id": index})
+            self._maybe_sync()
+
+    def record_failed(self, move: Move, error: str) -> None:
+        """
+        Record that a move could not be applied.
+
+        Args:
+            move: The move
+            error: Error message
+        """
+        with self._lock:
+            index = self._index[move]
+            self.failed[index] = error
+            self._write({"type": "failed", "id": index, "error": error})
+            self._maybe_sync()
+
+    def record_undone(self, move: Move) -> None:
+        """
+        Record that a move was reversed.
+
+        Args:
+            move: The move
+        """
+        with self._lock:
+            index = self._index[move]
+            self.undone.add(index)
+            self._write({"type": "undone", "id": index})
+            self._maybe_sync()
+
+    def mark(self, state: str) -> None:
+        """
+        Record that the run (COMPLETE) or its undo (UNDONE) finished.
+
+        Args:
+            state: The new state of the run
+        """
+        with self._lock:
+            self.state = state
+            self._write({"type": "complete" if state == COMPLETE else "undo_complete", "finished": time.time()})
+            self._sync()
+
+    def flush(self) -> None:
+        """Write buffered records to disk and fsync them."""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        """Flush and close the journal file."""
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def reconcile(self) -> MovePlan:
+        """
+        Work out which moves of an interrupted run still have to be applied.
+
+        Moves without a completion record are checked on disk: a file that
+        is already at its destination is recorded as done, one still at its
+        source is planned again, and one found at both (a cross-device copy
+        interrupted before the source was removed) is finished off only if
+        the destination is an identical copy. Otherwise both files are kept
+        and the move is recorded as failed.
+
+        Returns:
+            MovePlan containing the remaining moves
+        """
+        remaining = MovePlan()
+        remaining.missing_folders = {folder for folder in self.created_folders if not os.path.isdir(folder)}
+
+        for index, move in enumerate(self.moves):
+            if index in self.done:
+                continue
+
+            at_source = os.path.lexists(move.source)
+            at_dest = os.path.lexists(move.dest)
+            if at_dest and not at_source:
+                self.record_done(move)
+            elif at_source and not at_dest:
+                remaining.moves.append(move)
+            elif at_source and at_dest and _is_copy(move.source, move.dest):
+                os.remove(move.source)
+                self.record_done(move)
+            elif at_source:
+                self.record_failed(move, f"Destination already exists: {move.dest}")
+            else:
+                self.record_failed(move, f"File not found: {move.source}")
+
+        self.flush()
+        return remaining
+
+def list_runs(journal_dir: str = None, dir_path: str = None) -> List[Tuple[str, str, str]]:
+    """
+    Lists the organize runs that have a journal.
+
+    Args:
+        journal_dir: Directory the journals are kept in (if None, uses DEFAULT_JOURNAL_DIR)
+        dir_path: Only list runs that organized this directory (optional)
+
+    Returns:
+        List of tuples containing the journal path, the organized directory and
+        the run state, newest first
+    """
+    journal_dir = journal_dir if journal_dir else DEFAULT_JOURNAL_DIR
+    if not os.path.isdir(journal_dir):
+        return []
+
+    wanted = os.path.abspath(dir_path) if dir_path else None
+    runs = []
+    for name in sorted(os.listdir(journal_dir), reverse=True):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(journal_dir, name)
+        try:
+            if wanted is not None:
+                # The run record comes first, so other directories' journals are not read in full
+                with open(path, "r", encoding="utf-8") as f:
+                    if json.loads(f.readline()).get("dir") != wanted:
+                        continue
+            journal = OrganizeJournal(path)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error reading journal {path}: {e}")
+            continue
+        runs.append((path, journal.dir_path, journal.state))
+    return runs
+
+def prune_journals(journal_dir: str = None, retention_days: float = JOURNAL_RETENTION_DAYS) -> int:
+    """
+    Removes the journals of finished runs that were last written long ago.
+
+    Journals of runs that did not finish are always kept, so they can
+    still be resumed or undone.
+
+    Args:
+        journal_dir: Directory the journals are kept in (if None, uses DEFAULT_JOURNAL_DIR)
+        retention_days: Days since a journal was last written before it is removed
+
+    Returns:
+        Number of journals removed
+    """
+    journal_dir = journal_dir if journal_dir else DEFAULT_JOURNAL_DIR
+    if not os.path.isdir(journal_dir):
+        return 0
+
+    cutoff = time.time() - retention_days * 24 * 60 * 60
+    removed = 0
+    for name in os.listdir(journal_dir):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(journal_dir, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            # Only journals past the cutoff are read
+            if OrganizeJournal(path).state == INCOMPLETE:
+                continue
+            os.remove(path)
+            removed += 1
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error pruning journal {path}: {e}")
+    return removed
+
+def run_plan(journal: OrganizeJournal, plan: MovePlan, cancel_event: Optional[threading.Event] = None,
+             progress_callback: Optional[Callable[[int, int], None]] = None,
+             workers: int = DEFAULT_MOVE_WORKERS) -> Tuple[List[Move], List[str]]:
+    """
+    Applies a move plan, recording each move in a journal.
+
+    The run is marked complete only if it was not cancelled.
+
+    Args:
+        journal: Journal of the run
+        plan: The moves to apply
+        cancel_event: Event that stops moving when set (optional)
+        progress_callback: Function called with the number of files processed and the total
+        workers: Number of worker threads
+
+    Returns:
+        Tuple containing the moves that were applied and list of errors
+    """
+    try:
+        done, errors = execute_plan(plan, cancel_event, progress_callback, workers,
+                                    on_moved=journal.record_done, on_failed=journal.record_failed)
+        if cancel_event is None or not cancel_event.is_set():
+            journal.mark(COMPLETE)
+        return done, errors
+    finally:
+        journal.close()
+
+def resume_run(journal_path: str, cancel_event: Optional[threading.Event] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               workers: int = DEFAULT_MOVE_WORKERS) -> Tuple[List[Move], List[str]]:
+    """
+    Finishes an interrupted organize run from its journal, without rescanning.
+
+    Args:
+        journal_path: Path to the journal of the run
+        cancel_event: Event that stops moving when set (optional)
+        progress_callback: Function called with the number of files processed and the total
+        workers: Number of worker threads
+
+    Returns:
+        Tuple containing the moves applied by this call and list of errors
+    """
+    journal = OrganizeJournal(journal_path)
+    if journal.state != INCOMPLETE:
+        journal.close()
+        return [], [f"Run is already {journal.state}: {journal_path}"]
+
+    plan = journal.reconcile()
+    return run_plan(journal, plan, cancel_event, progress_callback, workers)
+
+def undo_run(journal_path: str, cancel_event: Optional[threading.Event] = None,
+             progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[int, List[str]]:
+    """
+    Moves every file of an organize run back to where it came from.
+
+    Moves are reversed newest first. If a file's original name has been
+    taken since, a timestamp is added to it. Folders created by the run are
+    removed if they end up empty. An interrupted run is reconciled with the
+    disk first, so moves that were applied but not yet recorded are undone too.
+
+    Args:
+        journal_path: Path to the journal of the run
+        cancel_event: Event that stops the undo when set; it can be run again later (optional)
+        progress_callback: Function called with the number of files processed and the total
+
+    Returns:
+        Tuple containing count of files moved back and list of errors
+    """
+    journal = OrganizeJournal(journal_path)
+    if journal.state == INCOMPLETE:
+        journal.reconcile()
+    to_undo = [index for index in sorted(journal.done, reverse=True) if index not in journal.undone]
+
+    success_count = 0
+    errors = []
+    try:
+        for processed, index in enumerate(to_undo, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+            move = journal.moves[index]
+            try:
+                source_dir = os.path.dirname(move.source)
+                os.makedirs(source_dir, exist_ok=True)
+                name = unique_name(os.path.basename(move.source),
+                                   lambda name: os.path.lexists(os.path.join(source_dir, name)))
+                move_file(move.dest, os.path.join(source_dir, name))
+                journal.record_undone(move)
+                success_count += 1
+            except OSError as e:
+                errors.append(f"Error moving {move.dest} back: {str(e)}")
+
+            if progress_callback:
+                progress_callback(processed, len(to_undo))
+
+        if (cancel_event is None or not cancel_event.is_set()) and not errors:
+            for folder in journal.created_folders:
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    # Not empty: something else was put in it
+                    pass
+            journal.mark(UNDONE)
+    finally:
+        journal.close()
+
+    return success_count, errors
@@ -0,0 +1,309 @@
+import os
+import time
+import errno
+import shutil
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Number of threads moving files by default
+DEFAULT_MOVE_WORKERS = 4
+
+def unique_name(filename: str, is_taken: Callable[[str], bool], timestamp: Optional[str] = None) -> str:
+    """
+    Picks a name for a file that does not clash with an existing one.
+
+    The file keeps its name if it is free. Otherwise a timestamp is added,
+    as in name_20240101120000.ext, followed by a counter if several files
+    with the same name arrive within the same second.
+
+    Args:
+        filename: Name of the file
+        is_taken: Function that returns True if a name is already used in the destination
+        timestamp: Timestamp to add on a clash (if None, uses the current time)
+
+    Returns:
+        A free file name
+    """
+    if not is_taken(filename):
+        return filename
+
+    if timestamp is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    name, ext = os.path.splitext(filename)
+
+    candidate = f"{name}_{timestamp}{ext}"
+    counter = 1
+    while is_taken(candidate):
+        candidate = f"{name}_{timestamp}_{counter}{ext}"
+        counter += 1
+    return candidate
+
+class Move:
+    """A planned move of one file."""
+
+    __slots__ = ("source", "dest", "folder", "key")
+
+    def __init__(self, source: str, dest: str, folder: str, key: Optional[str] = None):
+        """
+        Create a planned move.
+
+        Args:
+            source: Current path of the file
+            dest: Path the file will be moved to
+            folder: Destination folder
+            key: Label used to tally moves, such as the file extension (optional)
+        """
+        self.source = source
+        self.dest = dest
+        self.folder = folder
+        self.key = key
+
+    def __repr__(self) -> str:
+        return f"Move({self.source!r} -> {self.dest!r})"
+
+class MovePlan:
+    """
+    The full set of moves of an organize run, computed before any file is moved.
+
+    Every destination folder is listed once, and conflicting names are
+    resolved in memory against that listing and the names already given
+    to earlier moves, so no two moves in a plan share a destination.
+    """
+
+    def __init__(self):
+        self.moves = []
+        # Destination folder -> names present or already assigned in it
+        self.taken = {}
+        # Destination folders that do not exist yet
+        self.missing_folders = set()
+        self.timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+        # Throughput of the last execution of the plan
+        self.stats = None
+
+    def _names_in(self, folder: str) -> Set[str]:
+        names = self.taken.get(folder)
+        if names is None:
+            try:
+                names = set(os.listdir(folder))
+            except FileNotFoundError:
+                names = set()
+                self.missing_folders.add(folder)
+            self.taken[folder] = names
+        return names
+
+    def add(self, source: str, folder: str, key: Optional[str] = None) -> Move:
+        """
+        Plan to move a file into a folder, giving it a free name.
+
+        Args:
+            source: Path of the file
+            folder: Destination folder
+            key: Label used to tally moves, such as the file extension (optional)
+
+        Returns:
+            The planned move
+        """
+        names = self._names_in(folder)
+        name = unique_name(os.path.basename(source), names.__contains__, self.timestamp)
+        names.add(name)
+
+        move = Move(source, os.path.join(folder, name), folder, key)
+        self.moves.append(move)
+        return move
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+def plan_moves(files: Iterable[Tuple[str, str]], dir_path: str,
+               keys: Optional[Iterable[str]] = None) -> MovePlan:
+    """
+    Plans the moves of files into folders below a directory.
+
+    Args:
+        files: Tuples containing the path of each file and its folder (relative to dir_path)
+        dir_path: Base directory for organizing
+        keys: Label of each file used to tally moves, in the same order (optional)
+
+    Returns:
+        The move plan
+    """
+    plan = MovePlan()
+    keys = iter(keys) if keys is not None else None
+    for source, folder in files:
+        plan.add(source, os.path.join(dir_path, folder), next(keys) if keys is not None else None)
+    return plan
+
+def move_file(source: str, dest: str) -> int:
+    """
+    Moves a file, copying it when the destination is on another filesystem.
+
+    A rename is used whenever possible. If the destination is on another
+    device, the file is copied to a temporary name next to the destination,
+    flushed to disk, renamed into place and only then removed from the
+    source, so a crash never leaves a truncated file under the final name
+    or loses the only copy.
+
+    Args:
+        source: Current path of the file
+        dest: Path to move the file to
+
+    Returns:
+        Number of bytes copied (0 if the file was renamed)
+    """
+    try:
+        os.rename(source, dest)
+        return 0
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    temp_path = f"{dest}.partial-{os.getpid()}-{threading.get_ident()}"
+    try:
+        if os.path.islink(source):
+            # Recreate the link itself rather than copying its target
+            os.symlink(os.readlink(source), temp_path)
+        else:
+            shutil.copyfile(source, temp_path)
+            shutil.copystat(source, temp_path)
+            with open(temp_path, "rb+") as f:
+                os.fsync(f.fileno())
+        os.rename(temp_path, dest)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    size = os.lstat(dest).st_size
+    os.remove(source)
+    return size
+
+class MoveStats:
+    """Throughput of an executed move plan."""
+
+    def __init__(self):
+        self.files = 0
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """Megabytes per second copied across devices (renames move no data)."""
+        return self.copied_bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        text = f"{self.files} files in {self.seconds:.2f}s ({self.files_per_second:.0f} files/s)"
+        if self.copied_files:
+            text += (f", {self.copied_files} copied across devices "
+                     f"({self.copied_bytes / (1024 * 1024):.1f} MB, {self.mb_per_second:.1f} MB/s)")
+        return text
+
+def execute_plan(plan: MovePlan, cancel_event: Optional[threading.Event] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 workers: int = DEFAULT_MOVE_WORKERS,
+                 on_moved: Optional[Callable[[Move], None]] = None,
+                 on_failed: Optional[Callable[[Move, str], None]] = None) -> Tuple[List[Move], List[str]]:
+    """
+    Applies a move plan.
+
+    Missing destination folders are created once each, then the moves are
+    run on a pool of workers. The moves into one folder are handled by one
+    worker in plan order, while different folders are filled in parallel.
+    Files are renamed where possible and copied when the destination is on
+    another filesystem. Throughput is recorded in plan.stats.
+
+    Args:
+        plan: The move plan
+        cancel_event: Event that stops moving when set; files already moved stay moved (optional)
+        progress_callback: Function called with the number of files processed and the total
+            (from the worker threads)
+        workers: Number of worker threads (1 moves the files in the calling thread)
+        on_moved: Function called with each move after it was applied, e.g. to journal it
+        on_failed: Function called with each move that failed and its error message
+
+    Returns:
+        Tuple containing the moves that were applied and list of errors
+    """
+    errors = []
+    for folder in plan.missing_folders:
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as e:
+            errors.append(f"Error creating folder {folder}: {str(e)}")
+
+    # Destination folder -> its moves in plan order
+    by_folder = {}
+    for move in plan.moves:
+        by_folder.setdefault(move.folder, []).append(move)
+
+    stats = MoveStats()
+    lock = threading.Lock()
+    total = len(plan.moves)
+    processed = 0
+
+    def run_folder(moves: List[Move]) -> List[Move]:
+        nonlocal processed
+        done = []
+        for move in moves:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+            try:
+                copied = move_file(move.source, move.dest)
+                done.append(move)
+                if on_moved:
+                    on_moved(move)
+            except OSError as e:
+                copied = None
+                error = f"Error moving {move.source}: {str(e)}"
+                with lock:
+                    errors.append(error)
+                if on_failed:
+                    on_failed(move, error)
+
+            with lock:
+                processed += 1
+                count = processed
+                if copied:
+                    stats.copied_files += 1
+                    stats.copied_bytes += copied
+
+            if progress_callback:
+                progress_callback(count, total)
+        return done
+
+    start = time.perf_counter()
+    done = []
+    if workers <= 1 or len(by_folder) <= 1:
+        for moves in by_folder.values():
+            done.extend(run_folder(moves))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for folder_done in executor.map(run_folder, by_folder.values()):
+                done.extend(folder_done)
+
+    stats.seconds = time.perf_counter() - start
+    stats.files = len(done)
+    plan.stats = stats
+    return done, errors
+
+def count_moves(moves: Iterable[Move]) -> Dict[str, int]:
+    """
+    Counts moves by their key.
+
+    Args:
+        moves: The moves to count
+
+    Returns:
+        Dictionary with keys as keys and number of moves as values
+    """
+    counts = {}
+    for move in moves:
+        counts[move.key] = counts.get(move.key, 0) + 1
+    return counts
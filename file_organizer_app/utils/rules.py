@@ -0,0 +1,369 @@
+import os
+import re
+import json
+import time
+import fnmatch
+from typing import Callable, Dict, List, Optional
+
+# Default location of the rules config file
+DEFAULT_RULES_PATH = os.path.join(os.path.expanduser("~"), ".file_organizer", "rules.json")
+
+# Built-in routing of file extensions to folders
+DEFAULT_EXTENSION_FOLDERS = {
+    '.pdf': 'pdf_only',
+    '.jpg': 'jpg_only',
+    '.png': 'png_only',
+    '.jpeg': 'jpeg_only',
+    '.docx': 'docx_only',
+    '.pptx': 'pptx_only',
+    '.doc': 'doc_only',
+    '.txt': 'txt_only',
+    '.xlsx': 'xlsx_only',
+    '.zip': 'zip_only',
+    '.mp3': 'mp3_only',
+    '.mp4': 'mp4_only',
+    '.exe': 'exe_only',
+    '.dll': 'dll_only',
+    '.html': 'html_only',
+    '.css': 'css_only',
+    '.js': 'js_only',
+    '.py': 'py_only',
+    '.java': 'java_only',
+    '.c': 'c_only',
+    '.cpp': 'cpp_only',
+    '.h': 'h_only',
+    '.json': 'json_only',
+    '.xml': 'xml_only',
+    '.csv': 'csv_only'
+}
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+class Rule:
+    """
+    A single routing rule: files that match it are moved to its folder.
+
+    A rule matches on a list of extensions, a glob pattern or a regular
+    expression (tested against the file name), optionally combined with
+    size and age conditions. A rule with only conditions matches any file
+    that meets them.
+    """
+
+    __slots__ = ("folder", "extensions", "glob", "regex", "min_size", "max_size",
+                 "min_age_days", "max_age_days")
+
+    def __init__(self, folder: str, extensions: Optional[List[str]] = None, glob: Optional[str] = None,
+                 regex: Optional[str] = None, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 min_age_days: Optional[float] = None, max_age_days: Optional[float] = None):
+        """
+        Create a rule.
+
+        Args:
+            folder: Folder (relative to the organized directory) that matching files are moved to
+            extensions: File extensions to match, e.g. ['.jpg', '.png'] (case-insensitive)
+            glob: Glob pattern the file name must match, e.g. 'invoice_*.pdf' (case-insensitive)
+            regex: Regular expression the whole file name must match
+            min_size: Minimum file size in bytes
+            max_size: Maximum file size in bytes
+            min_age_days: Minimum days since the file was last modified
+            max_age_days: Maximum days since the file was last modified
+        """
+        if not folder:
+            raise ValueError("A rule needs a folder")
+        if glob is not None and regex is not None:
+            raise ValueError(f"Rule for {folder} has both a glob and a regex")
+        if regex is not None:
+            try:
+                re.compile(regex)
+            except re.error as e:
+                raise ValueError(f"Rule for {folder} has an invalid regex {regex!r}: {e}") from e
+
+        self.folder = folder
+        self.extensions = [ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+                           for ext in extensions] if extensions else []
+        self.glob = glob
+        self.regex = regex
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_age_days = min_age_days
+        self.max_age_days = max_age_days
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Rule":
+        """
+        Create a rule from an entry of a rules config file.
+
+        Args:
+            data: Dictionary with a 'folder' key and any of the other rule arguments
+
+        Returns:
+            The rule
+        """
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown rule keys: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @property
+    def pattern(self) -> Optional[str]:
+        """The regular expression equivalent of the rule's glob or regex, if any."""
+        if self.glob is not None:
+            # fnmatch.translate anchors the end; names are matched case-insensitively
+            return "(?i:" + fnmatch.translate(self.glob) + ")"
+        if self.regex is not None:
+            return f"(?:{self.regex})\\Z"
+        return None
+
+    @property
+    def has_conditions(self) -> bool:
+        return (self.min_size is not None or self.max_size is not None
+                or self.min_age_days is not None or self.max_age_days is not None)
+
+    def check_conditions(self, stats: os.stat_result, now: float) -> bool:
+        """
+        Check the size and age conditions of the rule.
+
+        Args:
+            stats: Result of os.stat for the file
+            now: Current time as a timestamp
+
+        Returns:
+            True if the file meets every condition
+        """
+        if self.min_size is not None and stats.st_size < self.min_size:
+            return False
+        if self.max_size is not None and stats.st_size > self.max_size:
+            return False
+        age_days = (now - stats.st_mtime) / SECONDS_PER_DAY
+        if self.min_age_days is not None and age_days < self.min_age_days:
+            return False
+        if self.max_age_days is not None and age_days > self.max_age_days:
+            return False
+        return True
+
+    def to_dict(self) -> Dict:
+        """
+        Convert the rule to an entry of a rules config file.
+
+        Returns:
+            Dictionary containing the rule's non-empty arguments
+        """
+        data = {name: getattr(self, name) for name in self.__slots__}
+        return {key: value for key, value in data.items() if value not in (None, [])}
+
+    def __repr__(self) -> str:
+        return f"Rule({self.to_dict()!r})"
+
+class RulesEngine:
+    """
+    Routes files to folders using a list of rules compiled once.
+
+    Rules are tried in order, but the lookup avoids testing them one by one:
+    extension rules are compiled into a dictionary, glob and regex rules
+    into one combined regular expression, and only rules with nothing but
+    size or age conditions, or with a regex that has groups of its own
+    (their numbers and names would clash in the combined expression), are
+    checked individually. Routing a file by
+    extension therefore costs one dictionary lookup, and a file is only
+    stat-ed if a rule that could match it has conditions.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None, include_defaults: bool = True):
+        """
+        Compile a list of rules.
+
+        Args:
+            rules: Rules to apply, in priority order (optional)
+            include_defaults: Whether the built-in extension folders are added after the given rules
+        """
+        self.rules = list(rules) if rules else []
+        if include_defaults:
+            self.rules.extend(Rule(folder, [ext]) for ext, folder in DEFAULT_EXTENSION_FOLDERS.items())
+
+        # Extension -> rules for it in priority order (with their positions)
+        self._by_extension = {}
+        pattern_rules = []
+        self._condition_rules = []
+        for position, rule in enumerate(self.rules):
+            if rule.extensions:
+                for ext in rule.extensions:
+                    self._by_extension.setdefault(ext, []).append((position, rule))
+            elif rule.pattern is not None:
+                pattern_rules.append((position, rule))
+            else:
+                self._condition_rules.append((position, rule))
+
+        # The extension dictionary answers most lookups without any stat call.
+        # It only holds extensions whose first rule is unconditional and comes
+        # before every pattern and condition rule, which could otherwise win
+        first_other = min([position for position, _ in pattern_rules + self._condition_rules],
+                          default=len(self.rules))
+        self._fast_extensions = {ext: rule.folder for ext, ((position, rule), *_) in self._by_extension.items()
+                                 if not rule.has_conditions and rule.pattern is None and position < first_other}
+
+        self._patterns = {position: re.compile(rule.pattern) for position, rule in enumerate(self.rules)
+                          if rule.pattern is not None}
+        # A backreference or named group means something else once the rule
+        # is one alternative among others, so those rules are matched alone
+        self._separate_rules = [(position, rule) for position, rule in pattern_rules
+                                if self._patterns[position].groups]
+        pattern_rules = [(position, rule) for position, rule in pattern_rules
+                         if not self._patterns[position].groups]
+
+        # Alternatives are tried left to right, so the first matching rule wins
+        self._pattern_rules = pattern_rules
+        if pattern_rules:
+            self._combined = re.compile("|".join(f"(?P<r{index}>{rule.pattern})"
+                                                 for index, (_, rule) in enumerate(pattern_rules)))
+        else:
+            self._combined = None
+
+        self.folders = frozenset(rule.folder for rule in self.rules)
+        # Rule folders as normalized relative paths; a folder can be nested, e.g. 'media/photos'
+        self._folder_paths = frozenset(os.path.normpath(folder) for folder in self.folders)
+        self._folder_prefixes = tuple(folder + os.sep for folder in self._folder_paths)
+
+    @property
+    def extensions(self) -> List[str]:
+        """Extensions routed by an extension rule."""
+        return list(self._by_extension)
+
+    def route(self, file_path: str, stats: Optional[os.stat_result] = None,
+              now: Optional[float] = None) -> Optional[str]:
+        """
+        Find the folder a file should be moved to.
+
+        Args:
+            file_path: Path to the file
+            stats: Result of os.stat for the file, if already known (optional)
+            now: Current time used for age conditions (if None, uses the current time)
+
+        Returns:
+            Folder for the file, or None if no rule matches
+        """
+        name = os.path.basename(file_path)
+        ext = os.path.splitext(name)[-1].lower()
+
+        folder = self._fast_extensions.get(ext)
+        if folder is not None:
+            return folder
+
+        return self._route_slow(file_path, name, ext, stats, now)
+
+    def _route_slow(self, file_path: str, name: str, ext: str, stats: Optional[os.stat_result],
+                    now: Optional[float]) -> Optional[str]:
+        # Collect the candidates in priority order: extension rules, the
+        # first matching pattern rule, the rules matched alone and the
+        # condition-only rules
+        candidates = list(self._by_extension.get(ext, ()))
+        if self._combined is not None:
+            match = self._combined.match(name)
+            if match:
+                # Later pattern rules only matter if this one fails its conditions
+                index = int(match.lastgroup[1:])
+                candidates.extend(self._pattern_rules[index:])
+        candidates.extend(self._separate_rules)
+        candidates.extend(self._condition_rules)
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        for position, rule in candidates:
+            pattern = self._patterns.get(position)
+            if pattern is not None and not pattern.match(name):
+                continue
+            if rule.has_conditions:
+                if stats is None:
+                    try:
+                        stats = os.stat(file_path)
+                    except OSError:
+                        return None
+                if not rule.check_conditions(stats, now if now is not None else time.time()):
+                    continue
+            return rule.folder
+        return None
+
+    def is_organized(self, path: str, base_dir: str) -> bool:
+        """
+        Check whether a directory is (or is inside) one of the rule folders.
+
+        Rule folders are relative to base_dir, so a directory only counts
+        if its path below base_dir starts with a whole rule folder path.
+
+        Args:
+            path: Path to the directory
+            base_dir: Directory being organized
+
+        Returns:
+            True if files in the directory have already been organized
+        """
+        relative = os.path.normpath(os.path.relpath(path, base_dir))
+        return relative in self._folder_paths or relative.startswith(self._folder_prefixes)
+
+    def skip_dir(self, base_dir: str) -> Callable[[str], bool]:
+        """
+        Get a scan_files skip_dir function that skips the rule folders.
+
+        Args:
+            base_dir: Directory being organized
+
+        Returns:
+            Function returning True for directories that were already organized
+        """
+        return lambda path: self.is_organized(path, base_dir)
+
+def load_rules(path: str = None) -> RulesEngine:
+    """
+    Loads a rules engine from a JSON config file.
+
+    The file contains a "rules" list of rule entries, e.g.
+    {"folder": "images", "extensions": [".jpg", ".png"]} or
+    {"folder": "old_files", "min_age_days": 365}, and an optional
+    "include_defaults" flag (true by default) that appends the built-in
+    extension folders after the listed rules.
+
+    Args:
+        path: Path to the config file (if None, uses DEFAULT_RULES_PATH)
+
+    Returns:
+        The compiled rules engine
+    """
+    path = path if path else DEFAULT_RULES_PATH
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    rules = [Rule.from_dict(entry) for entry in config.get("rules", [])]
+    return RulesEngine(rules, include_defaults=config.get("include_defaults", True))
+
+# Engine shared by organize_file and organize_files, compiled on first use
+_default_engine = None
+
+def get_default_engine() -> RulesEngine:
+    """
+    Gets the default rules engine.
+
+    The rules are loaded from DEFAULT_RULES_PATH if that file exists, and
+    otherwise only the built-in extension folders are used. The engine is
+    compiled once and reused.
+
+    Returns:
+        The default rules engine
+    """
+    global _default_engine
+    if _default_engine is None:
+        engine = None
+        if os.path.exists(DEFAULT_RULES_PATH):
+            try:
+                engine = load_rules(DEFAULT_RULES_PATH)
+            except (OSError, ValueError, TypeError, re.error) as e:
+                print(f"Error loading rules from {DEFAULT_RULES_PATH}: {e}")
+        _default_engine = engine if engine else RulesEngine()
+    return _default_engine
+
+def set_default_engine(engine: Optional[RulesEngine]) -> None:
+    """
+    Replaces the default rules engine.
+
+    Args:
+        engine: The new default engine (if None, it is loaded again on next use)
+    """
+    global _default_engine
+    _default_engine = engine
@@ -0,0 +1,52 @@
+import os
+import threading
+from typing import Callable, Iterator, Optional
+
+def scan_files(dir_path: str, skip_dir: Optional[Callable[[str], bool]] = None,
+               cancel_event: Optional[threading.Event] = None) -> Iterator[os.DirEntry]:
+    """
+    Scans a directory tree in a single pass and yields an entry for each file.
+
+    Files are yielded in the same order as os.walk would list them. Each
+    entry caches its stat result, so calling entry.stat() costs at most one
+    system call per file, and entry.is_dir()/entry.name cost none. Symbolic
+    links to directories are skipped: they are neither yielded nor followed.
+
+    Args:
+        dir_path: Path to the directory to scan
+        skip_dir: Function called with each directory path (including dir_path)
+            that returns True if the directory and everything below it should be skipped
+        cancel_event: Event that stops the scan before the next directory when set (optional)
+
+    Returns:
+        Iterator of os.DirEntry objects for the files in the tree
+    """
+    stack = [dir_path]
+
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+
+        current = stack.pop()
+        if skip_dir and skip_dir(current):
+            continue
+
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if not is_dir:
+                        yield entry
+                    elif not entry.is_symlink():
+                        subdirs.append(entry.path)
+        except OSError as e:
+            print(f"Error scanning {current}: {e}")
+            continue
+
+        # Visit subdirectories in listing order, like os.walk
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,551 @@
+import os
+import errno
+import json
+import stat
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from file_organizer_app.utils.bulk_delete import delete_tree
+
+# Trash for files on the same volume as the home directory
+HOME_TRASH_DIR = os.path.join(os.path.expanduser("~"), ".file_organizer", "trash")
+# Trash created at the root of every other volume, one per user, so moving a
+# file into it is always a rename on the same filesystem
+VOLUME_TRASH_NAME = f".file_organizer_trash-{os.getuid() if hasattr(os, 'getuid') else 'user'}"
+# Extra trash directories created on other volumes, one per line
+VOLUMES_FILE = os.path.join(HOME_TRASH_DIR, "volumes")
+
+ITEMS_DIR = "items"
+INFO_DIR = "info"
+INFO_SUFFIX = ".json"
+
+# Days an item can be restored before the collector frees its space
+DEFAULT_RETENTION_DAYS = 30
+# Seconds between collector passes
+DEFAULT_COLLECT_INTERVAL = 15 * 60
+# Files per second the collector deletes, so emptying the trash does not
+# starve the foreground work of the disk or file server
+DEFAULT_DELETE_RATE = 500
+# Seconds before an info file without an item is treated as left over from
+# a crash rather than a move still in progress
+ORPHAN_GRACE_SECONDS = 60
+
+_trash_dirs: Dict[int, str] = {}
+_trash_lock = threading.Lock()
+
+class TrashItem:
+    """A file or folder in the trash."""
+
+    __slots__ = ("trash_dir", "item_id", "original_path", "deleted_at", "is_dir", "size")
+
+    def __init__(self, trash_dir: str, item_id: str, original_path: str, deleted_at: float,
+                 is_dir: bool, size: Optional[int]):
+        """
+        Create a trash item.
+
+        Args:
+            trash_dir: Trash directory holding the item
+            item_id: Name of the item in the trash directory
+            original_path: Path the item was deleted from
+            deleted_at: Time the item was moved to the trash (seconds since the epoch)
+            is_dir: Whether the item is a folder
+            size: Size of the file in bytes (None for folders)
+        """
+        self.trash_dir = trash_dir
+        self.item_id = item_id
+        self.original_path = original_path
+        self.deleted_at = deleted_at
+        self.is_dir = is_dir
+        self.size = size
+
+    @property
+    def path(self) -> str:
+        """Current location of the item's data."""
+        return os.path.join(self.trash_dir, ITEMS_DIR, self.item_id)
+
+    @property
+    def info_path(self) -> str:
+        return os.path.join(self.trash_dir, INFO_DIR, self.item_id + INFO_SUFFIX)
+
+    def __repr__(self) -> str:
+        return f"TrashItem({self.original_path!r})"
+
+def _mount_point(path: str) -> str:
+    """
+    Finds the mount point of the volume a path is on.
+
+    Args:
+        path: Existing path on the volume
+
+    Returns:
+        The top directory of the volume
+    """
+    path = os.path.realpath(path)
+    device = os.lstat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path or os.lstat(parent).st_dev != device:
+            return path
+        path = parent
+
+def _check_private_dir(trash_dir: str) -> None:
+    """
+    Makes sure a trash directory on a shared volume can't be read or changed by other users.
+
+    Args:
+        trash_dir: Path to the trash directory
+
+    Raises:
+        OSError: If it isn't a real directory owned by this user and closed to everyone else
+    """
+    stats = os.lstat(trash_dir)
+    if not stat.S_ISDIR(stats.st_mode):
+        raise OSError(errno.ENOTDIR, "Trash folder is not a folder", trash_dir)
+    if hasattr(os, 'getuid') and stats.st_uid != os.getuid():
+        raise PermissionError(errno.EPERM, "Trash folder belongs to another user", trash_dir)
+    if stats.st_mode & 0o077:
+        raise PermissionError(errno.EPERM, "Trash folder is accessible to other users", trash_dir)
+
+def _make_trash_dir(trash_dir: str, shared: bool = False) -> None:
+    """
+    Creates a trash directory and its items and info folders, readable only by this user.
+
+    Args:
+        trash_dir: Path to the trash directory
+        shared: Whether the trash is at the root of a volume other users can write to,
+            where someone else could have created it first
+
+    Raises:
+        OSError: If the trash directory can't be created, or a shared one fails _check_private_dir
+    """
+    os.makedirs(trash_dir, mode=0o700, exist_ok=True)
+    if shared:
+        _check_private_dir(trash_dir)
+    os.makedirs(os.path.join(trash_dir, ITEMS_DIR), mode=0o700, exist_ok=True)
+    os.makedirs(os.path.join(trash_dir, INFO_DIR), mode=0o700, exist_ok=True)
+
+def trash_dir_for(path: str) -> str:
+    """
+    Gets the trash directory on the same volume as a path, creating it if needed.
+
+    Files on the home volume go to HOME_TRASH_DIR; files on other volumes
+    go to a VOLUME_TRASH_NAME directory at the root of their volume, which
+    is only used if it is a private directory of this user.
+
+    Args:
+        path: Path of the file or folder to be trashed
+
+    Returns:
+        Path to the trash directory
+
+    Raises:
+        OSError: If no usable trash directory can be created on the volume
+    """
+    device = os.stat(os.path.dirname(os.path.abspath(path))).st_dev
+    with _trash_lock:
+        if device in _trash_dirs:
+            return _trash_dirs[device]
+
+        _make_trash_dir(HOME_TRASH_DIR)
+        if os.stat(HOME_TRASH_DIR).st_dev == device:
+            trash_dir = HOME_TRASH_DIR
+        else:
+            trash_dir = os.path.join(_mount_point(os.path.dirname(os.path.abspath(path))), VOLUME_TRASH_NAME)
+            _make_trash_dir(trash_dir, shared=True)
+            if trash_dir not in known_trash_dirs():
+                with open(VOLUMES_FILE, "a", encoding="utf-8") as f:
+                    f.write(trash_dir + "\n")
+
+        _trash_dirs[device] = trash_dir
+        return trash_dir
+
+def known_trash_dirs() -> List[str]:
+    """
+    Lists the trash directories in use.
+
+    Returns:
+        HOME_TRASH_DIR followed by the trash directories of other volumes that
+        are currently mounted and still private to this user
+    """
+    trash_dirs = [HOME_TRASH_DIR]
+    try:
+        with open(VOLUMES_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                trash_dir = line.rstrip("\n")
+                if trash_dir and trash_dir not in trash_dirs and os.path.isdir(trash_dir):
+                    try:
+                        _check_private_dir(trash_dir)
+                    except OSError as e:
+                        print(f"Error using trash folder {trash_dir}: {e}")
+                        continue
+                    trash_dirs.append(trash_dir)
+    except FileNotFoundError:
+        pass
+    return trash_dirs
+
+def trash_paths(paths: Iterable[str],
+                cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+    """
+    Moves files and folders to the trash of their volume.
+
+    Each item is renamed into the trash, which takes the same time for a
+    huge folder as for a single file and frees no space yet; the space is
+    freed later by purge_items, purge_expired or a TrashCollector. An info
+    file next to the item records where it came from so it can be restored.
+
+    Args:
+        paths: Paths of the files and folders to trash
+        cancel_event: Event that stops trashing before the next item when set (optional)
+
+    Returns:
+        Tuple containing count of successfully trashed items and list of errors
+    """
+    success_count = 0
+    errors = []
+
+    for path in paths:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
+        path = os.path.abspath(path)
+        info_path = None
+        try:
+            if not os.path.lexists(path):
+                errors.append(f"File not found: {path}")
+                continue
+
+            trash_dir = trash_dir_for(path)
+            if os.path.commonpath([path, trash_dir]) == path:
+                errors.append(f"Error trashing {path}: it contains the trash folder")
+                continue
+
+            stats = os.lstat(path)
+            is_dir = os.path.isdir(path) and not os.path.islink(path)
+            item_id = f"{time.time_ns()}-{os.urandom(4).hex()}"
+            info = {"path": path, "deleted_at": time.time(), "is_dir": is_dir,
+                    "size": None if is_dir else stats.st_size}
+
+            # Write the info first: an item without info could not be restored
+            info_path = os.path.join(trash_dir, INFO_DIR, item_id + INFO_SUFFIX)
+            with open(info_path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.rename(path, os.path.join(trash_dir, ITEMS_DIR, item_id))
+            success_count += 1
+        except Exception as e:
+            if info_path is not None and os.path.exists(info_path):
+                os.remove(info_path)
+            errors.append(f"Error trashing {path}: {str(e)}")
+
+    return success_count, errors
+
+def list_trash(trash_dirs: Optional[List[str]] = None) -> List[TrashItem]:
+    """
+    Lists the items in the trash.
+
+    Args:
+        trash_dirs: Trash directories to list (if None, uses known_trash_dirs())
+
+    Returns:
+        List of TrashItem objects, most recently deleted first
+    """
+    items = []
+    for trash_dir in trash_dirs if trash_dirs is not None else known_trash_dirs():
+        info_dir = os.path.join(trash_dir, INFO_DIR)
+        try:
+            names = os.listdir(info_dir)
+        except FileNotFoundError:
+            continue
+
+        for name in names:
+            if not name.endswith(INFO_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(info_dir, name), "r", encoding="utf-8") as f:
+                    info = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading trash info {name}: {e}")
+                continue
+            item = TrashItem(trash_dir, name[:-len(INFO_SUFFIX)], info["path"], info["deleted_at"],
+                             info["is_dir"], info.get("size"))
+            if os.path.lexists(item.path):
+                items.append(item)
+
+    items.sort(key=lambda item: item.deleted_at, reverse=True)
+    return items
+
+def restore_items(items: Iterable[TrashItem],
+                  cancel_event: Optional[threading.Event] = None) -> Tuple[int, List[str]]:
+    """
+    Moves items from the trash back to where they were deleted from.
+
+    Items whose original path is taken again are left in the trash and
+    reported as errors. Missing parent folders are recreated.
+
+    Args:
+        items: Items to restore
+        cancel_event: Event that stops restoring before the next item when set (optional)
+
+    Returns:
+        Tuple containing count of successfully restored items and list of errors
+    """
+    success_count = 0
+    errors = []
+
+    for item in items:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+
+        try:
+            if os.path.lexists(item.original_path):
+                errors.append(f"Cannot restore {item.original_path}: a file with that name already exists")
+                continue
+            os.makedirs(os.path.dirname(item.original_path), exist_ok=True)
+            os.rename(item.path, item.original_path)
+            os.remove(item.info_path)
+            success_count += 1
+        except Exception as e:
+            errors.append(f"Error restoring {item.original_path}: {str(e)}")
+
+    return success_count, errors
+
+class _RateLimiter:
+    """Spaces out operations to at most a given number per second."""
+
+    def __init__(self, rate: float, cancel_event: Optional[threading.Event]):
+        self.interval = 1.0 / rate
+        self.cancel_event = cancel_event if cancel_event is not None else threading.Event()
+        self.next_time = time.monotonic()
+
+    def wait(self) -> bool:
+        """
+        Waits for the next operation's turn.
+
+        Returns:
+            False if the cancel event was set while waiting
+        """
+        delay = self.next_time - time.monotonic()
+        if delay > 0 and self.cancel_event.wait(delay):
+            return False
+        # Allow a short burst after an idle period, but no more
+        self.next_time = max(self.next_time, time.monotonic() - 1.0) + self.interval
+        return not self.cancel_event.is_set()
+
+def _remove_limited(path: str, limiter: _RateLimiter) -> Tuple[int, List[str]]:
+    """
+    Deletes a file or folder one file at a time, at the limiter's rate.
+
+    Returns:
+        Tuple containing count of deleted files and list of errors
+    """
+    if os.path.islink(path) or not os.path.isdir(path):
+        if not limiter.wait():
+            return 0, []
+        os.unlink(path)
+        return 1, []
+
+    count = 0
+    errors = []
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files + [d for d in dirs if os.path.islink(os.path.join(root, d))]:
+            if not limiter.wait():
+                return count, errors
+            try:
+                os.unlink(os.path.join(root, name))
+                count += 1
+            except OSError as e:
+                errors.append(f"Error deleting {os.path.join(root, name)}: {str(e)}")
+        for name in dirs:
+            dir_path = os.path.join(root, name)
+            if not os.path.islink(dir_path) and os.path.lexists(dir_path):
+                try:
+                    os.rmdir(dir_path)
+                except OSError as e:
+                    errors.append(f"Error deleting folder {dir_path}: {str(e)}")
+    os.rmdir(path)
+    return count, errors
+
+def _purge_path(path: str, cancel_event: Optional[threading.Event],
+                limiter: Optional[_RateLimiter]) -> List[str]:
+    """Deletes the data of an item whose info is already gone."""
+    if limiter is not None:
+        return _remove_limited(path, limiter)[1]
+    if os.path.isdir(path) and not os.path.islink(path):
+        return delete_tree(path, cancel_event=cancel_event)
+    os.unlink(path)
+    return []
+
+def purge_items(items: Iterable[TrashItem], cancel_event: Optional[threading.Event] = None,
+                files_per_second: Optional[float] = None) -> Tuple[int, List[str]]:
+    """
+    Permanently deletes items from the trash.
+
+    The info file goes first, so an item that is only partly deleted when
+    the purge stops is never offered for restore; its remains are deleted
+    by the next purge_expired.
+
+    Args:
+        items: Items to delete
+        cancel_event: Event that stops deleting when set (optional)
+        files_per_second: Maximum rate to delete files at (if None, deletes as fast as possible
+            on several threads)
+
+    Returns:
+        Tuple containing count of deleted items and list of errors
+    """
+    limiter = _RateLimiter(files_per_second, cancel_event) if files_per_second else None
+    success_count = 0
+    errors = []
+
+    for item in items:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        try:
+            os.remove(item.info_path)
+            item_errors = _purge_path(item.path, cancel_event, limiter)
+            errors.extend(item_errors)
+            if not item_errors and not os.path.lexists(item.path):
+                success_count += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errors.append(f"Error purging {item.original_path}: {str(e)}")
+
+    return success_count, errors
+
+def _orphans(trash_dir: str) -> List[str]:
+    """
+    Finds data and info left without each other by an interrupted trash or purge.
+
+    Returns:
+        Paths of orphaned items and info files
+    """
+    items_dir = os.path.join(trash_dir, ITEMS_DIR)
+    info_dir = os.path.join(trash_dir, INFO_DIR)
+    try:
+        item_ids = set(os.listdir(items_dir))
+        info_ids = {name[:-len(INFO_SUFFIX)] for name in os.listdir(info_dir) if name.endswith(INFO_SUFFIX)}
+    except FileNotFoundError:
+        return []
+
+    orphans = [os.path.join(items_dir, item_id) for item_id in item_ids - info_ids]
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    for item_id in info_ids - item_ids:
+        info_path = os.path.join(info_dir, item_id + INFO_SUFFIX)
+        try:
+            if os.path.getmtime(info_path) < cutoff:
+                orphans.append(info_path)
+        except FileNotFoundError:
+            pass
+    return orphans
+
+def purge_expired(retention_days: float = DEFAULT_RETENTION_DAYS,
+                  cancel_event: Optional[threading.Event] = None,
+                  files_per_second: Optional[float] = None,
+                  trash_dirs: Optional[List[str]] = None) -> Tuple[int, List[str]]:
+    """
+    Permanently deletes items that have been in the trash longer than the retention period.
+
+    Leftovers of interrupted trash and purge operations are deleted too.
+
+    Args:
+        retention_days: Days an item is kept in the trash (0 empties the trash)
+        cancel_event: Event that stops deleting when set (optional)
+        files_per_second: Maximum rate to delete files at (if None, deletes as fast as possible)
+        trash_dirs: Trash directories to purge (if None, uses known_trash_dirs())
+
+    Returns:
+        Tuple containing count of deleted items and list of errors
+    """
+    trash_dirs = trash_dirs if trash_dirs is not None else known_trash_dirs()
+    cutoff = time.time() - retention_days * 24 * 60 * 60
+    expired = [item for item in list_trash(trash_dirs) if item.deleted_at <= cutoff]
+    success_count, errors = purge_items(expired, cancel_event, files_per_second)
+
+    limiter = _RateLimiter(files_per_second, cancel_event) if files_per_second else None
+    for trash_dir in trash_dirs:
+        for orphan in _orphans(trash_dir):
+            if cancel_event is not None and cancel_event.is_set():
+                return success_count, errors
+            try:
+                errors.extend(_purge_path(orphan, cancel_event, limiter))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                errors.append(f"Error purging {orphan}: {str(e)}")
+
+    return success_count, errors
+
+class TrashCollector:
+    """
+    Frees the space of expired trash items in the background.
+
+    Every interval, the collector deletes the items older than the
+    retention period at a limited rate, so a large purge does not compete
+    with the user's work for the disk.
+    """
+
+    def __init__(self, retention_days: float = DEFAULT_RETENTION_DAYS,
+                 interval: float = DEFAULT_COLLECT_INTERVAL,
+                 files_per_second: Optional[float] = DEFAULT_DELETE_RATE):
+        """
+        Create a collector.
+
+        Args:
+            retention_days: Days an item is kept in the trash
+            interval: Seconds between passes
+            files_per_second: Maximum rate to delete files at (if None, deletes as fast as possible)
+        """
+        self.retention_days = retention_days
+        self.interval = interval
+        self.files_per_second = files_per_second
+        self.purged = 0
+        self._thread = None
+        self._cancel_event = None
+
+    def start(self) -> None:
+        """Start collecting in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, args=(self._cancel_event,),
+                                        name="trash-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop a collector started with start().
+
+        Args:
+            timeout: Seconds to wait for the collector thread to exit (if None, waits until it does)
+        """
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self, cancel_event: threading.Event) -> int:
+        """
+        Purge expired items every interval until the cancel event is set.
+
+        Args:
+            cancel_event: Event that stops the collector when set
+
+        Returns:
+            Number of items purged
+        """
+        while not cancel_event.is_set():
+            try:
+                purged, errors = purge_expired(self.retention_days, cancel_event, self.files_per_second)
+                self.purged += purged
+                for error in errors:
+                    print(error)
+            except Exception as e:
+                print(f"Error collecting trash: {e}")
+            cancel_event.wait(self.interval)
+        return self.purged
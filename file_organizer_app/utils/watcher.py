@@ -0,0 +1,314 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import threading
+from typing import Callable, Dict, Optional
+
+from file_organizer_app.utils.file_organizer import organize_file
+from file_organizer_app.utils.rules import RulesEngine, get_default_engine
+from file_organizer_app.utils.scanner import scan_files
+
+# Seconds a file must go without changes before it is organized
+DEFAULT_SETTLE_SECONDS = 1.0
+
+# Seconds between checks of the pending files (and between rescans when polling)
+DEFAULT_POLL_INTERVAL = 0.5
+
+# inotify event bits (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+# Layout of the fixed part of struct inotify_event: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct("iIII")
+
+def _load_inotify():
+    """
+    Loads the inotify functions from the C library.
+
+    Returns:
+        The C library with inotify_init1, inotify_add_watch and inotify_rm_watch,
+        or None if inotify is not available
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        # ctypes.util pulls in subprocess, so it is only loaded when a watcher starts
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class DirectoryWatcher:
+    """
+    Organizes files as they arrive in a directory.
+
+    On Linux the watcher subscribes to inotify events for the directory and
+    its subdirectories, so the work done is proportional to the number of
+    changes rather than the size of the tree. Elsewhere, or if inotify is
+    unavailable, it falls back to rescanning the tree every poll interval.
+
+    A file is only organized once it has gone settle_seconds without events
+    and its size and modification time are unchanged since the previous
+    check, so files that are still being written are left alone.
+    """
+
+    def __init__(self, dir_path: str, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, use_inotify: bool = True,
+                 organize_existing: bool = True,
+                 on_organized: Optional[Callable[[str, str], None]] = None,
+                 engine: Optional[RulesEngine] = None):
+        """
+        Create a watcher.
+
+        Args:
+            dir_path: Path to the directory to watch and organize into
+            settle_seconds: Seconds a file must go without changes before it is organized
+            poll_interval: Seconds between checks of pending files (and between rescans when polling)
+            use_inotify: Whether to use inotify when it is available
+            organize_existing: Whether files already in the directory are organized too
+            on_organized: Function called with the original path and extension of each organized file
+            engine: Rules engine that picks the folders (if None, uses the default engine)
+        """
+        self.dir_path = os.path.abspath(dir_path)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.organize_existing = organize_existing
+        self.on_organized = on_organized
+        self.engine = engine if engine else get_default_engine()
+        # Folders files are organized into are not watched
+        self.is_organized = self.engine.skip_dir(self.dir_path)
+
+        self.libc = _load_inotify() if use_inotify else None
+        self.backend = "inotify" if self.libc else "polling"
+
+        # Path -> [time of the last event, (size, mtime_ns) at the last check or None]
+        self.pending = {}
+        self.counts = {"events": 0, "organized": 0, "skipped": 0}
+
+        self._fd = None
+        self._watches = {}
+        self._snapshot = {}
+        self._thread = None
+        self._cancel_event = None
+
+    def start(self) -> None:
+        """Start watching in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self.run, args=(self._cancel_event,),
+                                        name="directory-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop a watcher started with start().
+
+        Args:
+            timeout: Seconds to wait for the watcher thread to exit (if None, waits until it does)
+        """
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self, cancel_event: threading.Event) -> Dict[str, int]:
+        """
+        Watch the directory until the cancel event is set.
+
+        Args:
+            cancel_event: Event that stops the watcher when set
+
+        Returns:
+            Dictionary containing the number of events seen and files organized and skipped
+        """
+        if self.libc:
+            try:
+                self._open_inotify()
+            except OSError as e:
+                print(f"Error starting inotify, falling back to polling: {e}")
+                self.libc = None
+                self.backend = "polling"
+
+        try:
+            if self.libc is None:
+                # The first rescan records the existing files
+                self._rescan(mark=self.organize_existing)
+            elif self.organize_existing:
+                self._mark_tree(self.dir_path)
+
+            next_rescan = time.monotonic() + self.poll_interval
+            while not cancel_event.is_set():
+                if self.libc:
+                    self._read_events(self.poll_interval)
+                else:
+                    cancel_event.wait(max(0.0, next_rescan - time.monotonic()))
+                    next_rescan = time.monotonic() + self.poll_interval
+                    self._rescan(mark=True)
+
+                self._organize_settled()
+        finally:
+            self._close_inotify()
+
+        return dict(self.counts)
+
+    def _mark(self, path: str) -> None:
+        # Restart the settle period of a file
+        entry = self.pending.get(path)
+        if entry is None:
+            self.pending[path] = [time.monotonic(), None]
+        else:
+            entry[0] = time.monotonic()
+        self.counts["events"] += 1
+
+    def _mark_tree(self, dir_path: str) -> None:
+        # Files that arrived before a directory was watched produce no events
+        for entry in scan_files(dir_path, skip_dir=self.is_organized):
+            self._mark(entry.path)
+
+    def _organize_settled(self) -> None:
+        now = time.monotonic()
+        for path, entry in list(self.pending.items()):
+            if now - entry[0] < self.settle_seconds:
+                continue
+
+            try:
+                stats = os.stat(path)
+            except OSError:
+                # Moved away or deleted before it settled
+                del self.pending[path]
+                continue
+
+            signature = (stats.st_size, stats.st_mtime_ns)
+            if entry[1] != signature:
+                # Still changing (or checked for the first time); wait another period
+                entry[0] = now
+                entry[1] = signature
+                continue
+
+            del self.pending[path]
+            success, ext = organize_file(path, self.dir_path, self.engine)
+            if success:
+                self.counts["organized"] += 1
+                if self.on_organized:
+                    self.on_organized(path, ext)
+            else:
+                self.counts["skipped"] += 1
+
+    def _rescan(self, mark: bool) -> None:
+        # Polling fallback: compare every file with the previous scan
+        snapshot = {}
+        for entry in scan_files(self.dir_path, skip_dir=self.is_organized):
+            try:
+                stats = entry.stat()
+            except OSError:
+                continue
+            signature = (stats.st_size, stats.st_mtime_ns)
+            snapshot[entry.path] = signature
+            if mark and self._snapshot.get(entry.path) != signature:
+                self._mark(entry.path)
+        self._snapshot = snapshot
+
+    def _open_inotify(self) -> None:
+        fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._watch_tree(self.dir_path)
+
+    def _close_inotify(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._watches = {}
+
+    def _add_watch(self, dir_path: str) -> None:
+        wd = self.libc.inotify_add_watch(self._fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            print(f"Error watching {dir_path}: {os.strerror(err)}")
+            return
+        self._watches[wd] = dir_path
+
+    def _watch_tree(self, dir_path: str) -> None:
+        stack = [dir_path]
+        while stack:
+            current = stack.pop()
+            if self.is_organized(current):
+                continue
+            self._add_watch(current)
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError as e:
+                print(f"Error scanning {current}: {e}")
+
+    def _read_events(self, timeout: float) -> None:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so look at everything again
+                self._mark_tree(self.dir_path)
+                continue
+
+            dir_path = self._watches.get(wd)
+            if dir_path is None:
+                continue
+
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if not name:
+                # Events about the watched directory itself
+                continue
+
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.is_organized(path):
+                    self._watch_tree(path)
+                    self._mark_tree(path)
+            else:
+                self._mark(path)
@@ -0,0 +1,90 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils import bulk_delete
+from file_organizer_app.utils.bulk_delete import DeleteStats, delete_tree
+
+def setup_test_environment():
+    """
+    Create a folder tree to delete and, next to it, a folder that must survive.
+
+    Returns:
+        tuple: Paths of the tree to delete and of the folder outside it
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_bulk_delete_"))
+    tree = test_dir / "tree"
+    outside = test_dir / "outside"
+    outside.mkdir()
+    (outside / "keep.txt").write_text("keep me")
+
+    for branch in ("a", "b"):
+        for level in ("one", os.path.join("one", "two")):
+            folder = tree / branch / level
+            folder.mkdir(parents=True, exist_ok=True)
+            for i in range(3):
+                (folder / f"file{i}.txt").write_text(f"{branch} {level} {i}")
+    return tree, outside
+
+def test_delete_tree():
+    """
+    Test that a tree is deleted completely and symlinks in it are not followed.
+    """
+    print("\n=== Testing delete_tree ===")
+    tree, outside = setup_test_environment()
+    try:
+        os.symlink(outside, tree / "a" / "link_to_outside")
+        stats = DeleteStats()
+        errors = delete_tree(str(tree), workers=4, stats=stats)
+        print(f"Deleted {stats.files} files and {stats.directories} folders, errors: {errors}")
+        assert not errors
+        assert not tree.exists()
+        assert stats.directories == 7
+        assert (outside / "keep.txt").read_text() == "keep me"
+    finally:
+        shutil.rmtree(tree.parent)
+
+def test_delete_tree_folder_swapped_for_symlink():
+    """
+    Test that a folder replaced by a symlink after it was listed is not followed.
+    """
+    print("\n=== Testing delete_tree with a folder swapped for a symlink ===")
+    tree, outside = setup_test_environment()
+    victim = str(tree / "b" / "one")
+    original_submit = bulk_delete._TreeRemover._submit
+
+    def swapping_submit(remover, node):
+        # Swap the folder between its parent's listing and its own task
+        if node.path == victim:
+            os.rename(victim, victim + ".moved")
+            os.symlink(outside, victim)
+        original_submit(remover, node)
+
+    bulk_delete._TreeRemover._submit = swapping_submit
+    try:
+        errors = delete_tree(str(tree), workers=4)
+        print(f"Errors: {errors}")
+        assert len(errors) == 1 and victim in errors[0]
+        assert (outside / "keep.txt").read_text() == "keep me"
+        assert os.path.islink(victim)
+        assert not (tree / "a").exists()
+    finally:
+        bulk_delete._TreeRemover._submit = original_submit
+        shutil.rmtree(tree.parent)
+
+def main():
+    """
+    Run all the bulk delete tests in sequence.
+    """
+    test_delete_tree()
+    test_delete_tree_folder_swapped_for_symlink()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.catalog import Catalog
+
+# Access time far enough in the past for every file to count as unused
+OLD_TIME = time.time() - 365 * 24 * 60 * 60
+
+def setup_test_environment():
+    """
+    Create a test directory with two identical files and one different file.
+
+    All files get an access time a year in the past.
+
+    Returns:
+        Path: Path object pointing to the created test directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_catalog_"))
+    (test_dir / "subfolder").mkdir()
+
+    (test_dir / "a.txt").write_text("same content")
+    (test_dir / "subfolder" / "b.txt").write_text("same content")
+    (test_dir / "c.txt").write_text("other content")
+    for file in test_dir.rglob("*.txt"):
+        os.utime(file, (OLD_TIME, OLD_TIME))
+
+    return test_dir
+
+def catalogued_paths(catalog, test_dir):
+    """
+    Get the names of the catalogued files, relative to the test directory.
+    """
+    return sorted(os.path.relpath(path, test_dir) for path in catalog.list_files(str(test_dir)).paths)
+
+def test_refresh_add_delete_edit():
+    """
+    Test that a refresh picks up added, deleted and edited files.
+    """
+    print("\n=== Testing Catalog.refresh ===")
+    test_dir = setup_test_environment()
+    try:
+        with Catalog(":memory:") as catalog:
+            counts = catalog.refresh(str(test_dir))
+            print(f"First refresh: {counts}")
+            assert counts["files_added"] == 3
+            assert catalogued_paths(catalog, test_dir) == ["a.txt", "c.txt", os.path.join("subfolder", "b.txt")]
+
+            # Nothing changed, so no directory is listed again
+            counts = catalog.refresh(str(test_dir))
+            print(f"Unchanged refresh: {counts}")
+            assert counts["dirs_listed"] == 0
+
+            # Adding and deleting files changes the directory, so a normal refresh sees it
+            (test_dir / "subfolder" / "new.txt").write_text("new")
+            os.remove(test_dir / "c.txt")
+            counts = catalog.refresh(str(test_dir))
+            print(f"After add and delete: {counts}")
+            assert counts["files_added"] == 1 and counts["files_removed"] == 1
+            assert catalogued_paths(catalog, test_dir) == [
+                "a.txt", os.path.join("subfolder", "b.txt"), os.path.join("subfolder", "new.txt")]
+
+            # An in-place edit doesn't change the directory; a full refresh finds it
+            (test_dir / "a.txt").write_text("edited in place")
+            counts = catalog.refresh(str(test_dir), full=True)
+            print(f"Full refresh after edit: {counts}")
+            assert counts["files_updated"] == 1
+            sizes = dict(zip(catalogued_paths(catalog, test_dir), catalog.list_files(str(test_dir)).sizes))
+            assert sizes["a.txt"] == len("edited in place")
+
+            # A removed folder is forgotten with everything in it
+            shutil.rmtree(test_dir / "subfolder")
+            counts = catalog.refresh(str(test_dir))
+            print(f"After removing the subfolder: {counts}")
+            assert catalogued_paths(catalog, test_dir) == ["a.txt"]
+    finally:
+        shutil.rmtree(test_dir)
+
+def test_duplicates_after_edit():
+    """
+    Test that a stored hash isn't trusted after the file is edited in place.
+    """
+    print("\n=== Testing Catalog.duplicates after an in-place edit ===")
+    test_dir = setup_test_environment()
+    try:
+        with Catalog(":memory:") as catalog:
+            catalog.refresh(str(test_dir))
+            duplicates = catalog.duplicates(str(test_dir))
+            print(f"Duplicates: {duplicates}")
+            assert len(duplicates) == 1
+
+            # Same size, different content, and no refresh
+            (test_dir / "a.txt").write_text("SAME CONTENT")
+            os.utime(test_dir / "a.txt", ns=(time.time_ns(), time.time_ns() + 1000))
+            duplicates = catalog.duplicates(str(test_dir))
+            print(f"Duplicates after editing a.txt: {duplicates}")
+            assert duplicates == []
+
+            # Files deleted since the refresh aren't reported either
+            (test_dir / "a.txt").write_text("same content")
+            assert len(catalog.duplicates(str(test_dir))) == 1
+            os.remove(test_dir / "a.txt")
+            duplicates = catalog.duplicates(str(test_dir))
+            print(f"Duplicates after deleting a.txt: {duplicates}")
+            assert duplicates == []
+    finally:
+        shutil.rmtree(test_dir)
+
+def test_unused_after_read():
+    """
+    Test that files accessed since the last refresh aren't reported as unused.
+    """
+    print("\n=== Testing Catalog.unused_files after a file is read ===")
+    test_dir = setup_test_environment()
+    try:
+        with Catalog(":memory:") as catalog:
+            catalog.refresh(str(test_dir))
+            unused = [os.path.basename(record.path) for record in catalog.unused_files(str(test_dir), 30)]
+            print(f"Unused: {unused}")
+            assert unused == ["a.txt", "c.txt", "b.txt"]
+
+            # Touching a file doesn't change its directory, so the refresh skips it
+            os.utime(test_dir / "c.txt", None)
+            catalog.refresh(str(test_dir))
+            unused = [os.path.basename(record.path) for record in catalog.unused_files(str(test_dir), 30)]
+            print(f"Unused after reading c.txt: {unused}")
+            assert unused == ["a.txt", "b.txt"]
+    finally:
+        shutil.rmtree(test_dir)
+
+def main():
+    """
+    Run all the catalog tests in sequence.
+    """
+    test_refresh_add_delete_edit()
+    test_duplicates_after_edit()
+    test_unused_after_read()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
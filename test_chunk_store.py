@@ -0,0 +1,146 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils import chunk_store
+from file_organizer_app.utils.chunk_store import ChunkStore, dedup_archive_files, dedup_restore_files
+
+def setup_test_environment():
+    """
+    Create a test directory with a folder to archive and an empty store directory.
+
+    Returns:
+        tuple: Paths of the folder to archive, the store directory and a restore directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_chunk_store_"))
+    source_dir = test_dir / "project"
+    (source_dir / "subfolder").mkdir(parents=True)
+
+    (source_dir / "small.txt").write_text("small file")
+    (source_dir / "subfolder" / "large.bin").write_bytes(os.urandom(256 * 1024))
+    (source_dir / "empty").write_bytes(b"")
+
+    restore_dir = test_dir / "restored"
+    restore_dir.mkdir()
+    return source_dir, test_dir / "store", restore_dir
+
+def archived_files(source_dir):
+    """
+    List the files below a directory.
+    """
+    return sorted(str(path) for path in source_dir.rglob("*") if path.is_file())
+
+def test_archive_and_restore_folder():
+    """
+    Test that a folder restored from the store matches the newest archived versions.
+    """
+    print("\n=== Testing dedup_archive_files and dedup_restore_files ===")
+    source_dir, store_dir, restore_dir = setup_test_environment()
+    try:
+        count, errors = dedup_archive_files(archived_files(source_dir), str(store_dir))
+        print(f"Archived {count} files, errors: {errors}")
+        assert count == 3 and not errors
+
+        # A second version of the large file, changed in one place
+        large = source_dir / "subfolder" / "large.bin"
+        changed = bytearray(large.read_bytes())
+        changed[1000] ^= 0xFF
+        large.write_bytes(bytes(changed))
+        count, errors = dedup_archive_files([str(large)], str(store_dir))
+        assert count == 1 and not errors
+
+        with ChunkStore(str(store_dir)) as store:
+            versions = store.list_files(str(source_dir))
+        print(f"Versions in the store: {len(versions)}")
+        assert len(versions) == 4
+
+        count, errors = dedup_restore_files([str(source_dir)], str(restore_dir), str(store_dir))
+        print(f"Restored {count} files, errors: {errors}")
+        assert count == 3 and not errors
+        for path in archived_files(source_dir):
+            restored = restore_dir / "project" / os.path.relpath(path, source_dir)
+            assert restored.read_bytes() == Path(path).read_bytes(), f"{restored} differs"
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def test_restore_version_without_overwriting():
+    """
+    Test that an older version is restored by id and existing files are kept.
+    """
+    print("\n=== Testing dedup_restore_files with version ids ===")
+    source_dir, store_dir, restore_dir = setup_test_environment()
+    try:
+        small = source_dir / "small.txt"
+        dedup_archive_files([str(small)], str(store_dir))
+        small.write_text("second version")
+        dedup_archive_files([str(small)], str(store_dir))
+
+        with ChunkStore(str(store_dir)) as store:
+            oldest = store.list_files(str(small))[-1][0]
+        count, errors = dedup_restore_files([oldest], str(restore_dir), str(store_dir))
+        print(f"Restored version {oldest}: {count} files, errors: {errors}")
+        assert count == 1 and not errors
+        assert (restore_dir / "small.txt").read_text() == "small file"
+
+        # Restoring again must not overwrite the restored file
+        count, errors = dedup_restore_files([str(small)], str(restore_dir), str(store_dir))
+        print(f"Restoring over it: {count} files, errors: {errors}")
+        assert count == 0 and len(errors) == 1
+        assert (restore_dir / "small.txt").read_text() == "small file"
+
+        count, errors = dedup_restore_files([str(source_dir / "missing.txt")], str(restore_dir), str(store_dir))
+        print(f"Restoring a file that was never archived: {errors}")
+        assert count == 0 and len(errors) == 1
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def test_full_packs_are_synced():
+    """
+    Test that every pack is synced to disk, not only the one written last.
+    """
+    print("\n=== Testing pack rollover syncs the full pack ===")
+    source_dir, store_dir, restore_dir = setup_test_environment()
+    original_pack_size, original_fsync = chunk_store.PACK_SIZE, os.fsync
+    synced = set()
+
+    def recording_fsync(fd):
+        stats = os.fstat(fd)
+        synced.add((stats.st_dev, stats.st_ino))
+        original_fsync(fd)
+
+    chunk_store.PACK_SIZE = 64 * 1024
+    os.fsync = recording_fsync
+    try:
+        count, errors = dedup_archive_files([str(source_dir / "subfolder" / "large.bin")], str(store_dir))
+        assert count == 1 and not errors
+
+        packs = sorted((store_dir / "packs").iterdir())
+        print(f"Packs written: {len(packs)}")
+        assert len(packs) > 1
+        for pack in packs:
+            stats = os.stat(pack)
+            assert (stats.st_dev, stats.st_ino) in synced, f"{pack.name} was never synced"
+
+        count, errors = dedup_restore_files([str(source_dir)], str(restore_dir), str(store_dir))
+        assert count == 1 and not errors
+    finally:
+        chunk_store.PACK_SIZE, os.fsync = original_pack_size, original_fsync
+        shutil.rmtree(source_dir.parent)
+
+def main():
+    """
+    Run all the chunk store tests in sequence.
+    """
+    test_archive_and_restore_folder()
+    test_restore_version_without_overwriting()
+    test_full_packs_are_synced()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.copy_engine import copy_file, copy_tree
+from file_organizer_app.utils.file_operations import archive_folder
+
+def setup_test_environment():
+    """
+    Create a test directory with a folder tree to copy.
+
+    Returns:
+        Path: Path object pointing to the folder to copy
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_copy_engine_"))
+    source_dir = test_dir / "source"
+    (source_dir / "subfolder" / "deeper").mkdir(parents=True)
+
+    (source_dir / "file1.txt").write_text("first file")
+    (source_dir / "subfolder" / "file2.bin").write_bytes(os.urandom(300 * 1024))
+    (source_dir / "subfolder" / "deeper" / "file3.txt").write_text("third file")
+    (source_dir / "empty").write_bytes(b"")
+
+    return source_dir
+
+def tree_contents(folder):
+    """
+    Map the files below a folder, relative to it, to their contents.
+    """
+    return {str(path.relative_to(folder)): path.read_bytes() for path in folder.rglob("*") if path.is_file()}
+
+def test_copy_tree():
+    """
+    Test that a copied tree has the same files, contents and modification times.
+    """
+    print("\n=== Testing copy_tree ===")
+    source_dir = setup_test_environment()
+    try:
+        dest_dir = source_dir.parent / "copy"
+        count, errors = copy_tree(str(source_dir), str(dest_dir), workers=2)
+        print(f"Copied {count} files, errors: {errors}")
+        assert count == 4 and not errors
+        assert tree_contents(dest_dir) == tree_contents(source_dir)
+        assert os.stat(dest_dir / "file1.txt").st_mtime_ns == os.stat(source_dir / "file1.txt").st_mtime_ns
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def test_copy_file_onto_itself():
+    """
+    Test that copying a file onto itself, directly or through a symlink, leaves it intact.
+    """
+    print("\n=== Testing copy_file onto the same file ===")
+    source_dir = setup_test_environment()
+    try:
+        path = source_dir / "file1.txt"
+        link = source_dir / "link.txt"
+        os.symlink(path, link)
+        for dst in (path, link):
+            try:
+                copy_file(str(path), str(dst))
+                assert False, f"Copying onto {dst} should have failed"
+            except shutil.SameFileError as e:
+                print(f"Refused: {e}")
+        assert path.read_text() == "first file"
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def test_archive_folder_into_itself():
+    """
+    Test that a folder archived into one of its own subfolders is copied once.
+    """
+    print("\n=== Testing archive_folder into a subfolder of the source ===")
+    source_dir = setup_test_environment()
+    try:
+        before = tree_contents(source_dir)
+        success, error = archive_folder(str(source_dir), str(source_dir / "archive"))
+        print(f"Success: {success}, error: {error}")
+        assert success, error
+
+        archives = os.listdir(source_dir / "archive")
+        assert len(archives) == 1
+        copied = source_dir / "archive" / archives[0]
+        assert tree_contents(copied) == before
+        assert os.listdir(copied / "archive") == []
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def test_archive_folder_removes_failed_copy():
+    """
+    Test that a copy with errors is removed instead of being left incomplete.
+    """
+    print("\n=== Testing archive_folder with a file that cannot be copied ===")
+    source_dir = setup_test_environment()
+    try:
+        os.symlink(source_dir / "missing.txt", source_dir / "dangling.txt")
+        archive_dir = source_dir.parent / "archives"
+        success, error = archive_folder(str(source_dir), str(archive_dir))
+        print(f"Success: {success}, error: {error}")
+        assert not success and "dangling.txt" in error
+        assert os.listdir(archive_dir) == []
+    finally:
+        shutil.rmtree(source_dir.parent)
+
+def main():
+    """
+    Run all the copy engine tests in sequence.
+    """
+    test_copy_tree()
+    test_copy_file_onto_itself()
+    test_archive_folder_into_itself()
+    test_archive_folder_removes_failed_copy()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
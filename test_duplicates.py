@@ -0,0 +1,113 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.file_organizer import PARTIAL_HASH_SIZE, find_duplicate_files
+from file_organizer_app.utils.hash_cache import HashCache
+
+def setup_test_environment():
+    """
+    Create a test directory with duplicate and near-duplicate files.
+
+    The large files are bigger than the partial hash sample, and one pair
+    only differs in the middle, so every stage of the search is exercised.
+
+    Returns:
+        Path: Path object pointing to the created test directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_duplicates_"))
+    (test_dir / "subfolder").mkdir()
+
+    large = os.urandom(PARTIAL_HASH_SIZE * 4)
+    middle_changed = bytearray(large)
+    middle_changed[len(large) // 2] ^= 0xFF
+
+    (test_dir / "small1.txt").write_text("duplicate")
+    (test_dir / "subfolder" / "small2.txt").write_text("duplicate")
+    (test_dir / "small3.txt").write_text("different")
+    (test_dir / "large1.bin").write_bytes(large)
+    (test_dir / "subfolder" / "large2.bin").write_bytes(large)
+    (test_dir / "subfolder" / "large3.bin").write_bytes(large)
+    (test_dir / "large_middle.bin").write_bytes(bytes(middle_changed))
+    (test_dir / "empty1").write_bytes(b"")
+    (test_dir / "empty2").write_bytes(b"")
+
+    return test_dir
+
+def duplicate_sets(duplicates):
+    """
+    Turn (duplicate, original) pairs into a set of frozensets of file names.
+    """
+    groups = {}
+    for duplicate, original in duplicates:
+        groups.setdefault(original, {os.path.basename(original)}).add(os.path.basename(duplicate))
+    return {frozenset(group) for group in groups.values()}
+
+def test_duplicates_with_and_without_cache():
+    """
+    Test that the hash cache doesn't change which duplicates are found.
+
+    The search runs without a cache, with a new cache, with the filled
+    cache, and with the filled cache after a file was edited in place.
+    """
+    print("\n=== Testing find_duplicate_files with and without the hash cache ===")
+    test_dir = setup_test_environment()
+    try:
+        expected = {frozenset({"small1.txt", "small2.txt"}),
+                    frozenset({"large1.bin", "large2.bin", "large3.bin"}),
+                    frozenset({"empty1", "empty2"})}
+
+        without_cache = duplicate_sets(find_duplicate_files(str(test_dir)))
+        print(f"Without cache: {sorted(map(sorted, without_cache))}")
+        assert without_cache == expected
+
+        with HashCache(":memory:") as cache:
+            cold = duplicate_sets(find_duplicate_files(str(test_dir), cache=cache))
+            warm = duplicate_sets(find_duplicate_files(str(test_dir), cache=cache))
+            print(f"Cold cache: {sorted(map(sorted, cold))}")
+            print(f"Warm cache: {sorted(map(sorted, warm))} ({cache.stats()})")
+            assert cold == expected
+            assert warm == expected
+            assert cache.hits > 0
+
+            # Same size, new content: the cached hashes of large3.bin must not be used
+            (test_dir / "subfolder" / "large3.bin").write_bytes(os.urandom(PARTIAL_HASH_SIZE * 4))
+            os.utime(test_dir / "subfolder" / "large3.bin", ns=(time.time_ns(), time.time_ns() + 1000))
+            edited = duplicate_sets(find_duplicate_files(str(test_dir), cache=cache))
+            print(f"Warm cache after editing large3.bin: {sorted(map(sorted, edited))}")
+            assert edited == duplicate_sets(find_duplicate_files(str(test_dir)))
+            assert frozenset({"large1.bin", "large2.bin"}) in edited
+    finally:
+        shutil.rmtree(test_dir)
+
+def test_duplicates_with_processes():
+    """
+    Test that hashing in processes finds the same duplicates as threads.
+    """
+    print("\n=== Testing find_duplicate_files with worker processes ===")
+    test_dir = setup_test_environment()
+    try:
+        threads = duplicate_sets(find_duplicate_files(str(test_dir)))
+        processes = duplicate_sets(find_duplicate_files(str(test_dir), workers=2, use_processes=True))
+        print(f"Processes: {sorted(map(sorted, processes))}")
+        assert processes == threads
+    finally:
+        shutil.rmtree(test_dir)
+
+def main():
+    """
+    Run all the duplicate search tests in sequence.
+    """
+    test_duplicates_with_and_without_cache()
+    test_duplicates_with_processes()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+# Milliseconds each entry point may spend importing on a cold start
+IMPORT_BUDGET_MS = 200
+# Runs per measurement; the fastest is used, so a busy machine doesn't fail the check
+RUNS = 3
+
+# What is imported when the window opens: the window itself and its first (organize) tab
+WINDOW_IMPORTS = "import file_organizer_app.main, file_organizer_app.gui.organize_tab"
+CLI_IMPORTS = "import file_organizer_app.cli"
+
+# Modules that are only needed by some operations and must not be loaded at startup
+# (lzma and bz2 aren't listed: shutil imports them to check they are available)
+HEAVY_MODULES = ["tarfile", "zipfile", "sqlite3", "multiprocessing",
+                 "concurrent.futures.process", "secrets", "ctypes.util"]
+
+def import_times(code):
+    """
+    Run Python code in a fresh interpreter with -X importtime.
+
+    Args:
+        code: Python code to run
+
+    Returns:
+        dict: Module name -> (cumulative import time in microseconds, nesting depth)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=parent_dir, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            # Names are indented by two spaces per level of nesting
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            times[name.strip()] = (int(cumulative), depth)
+    return times
+
+def startup_ms(code):
+    """
+    Measure how long the package's own imports take, fastest of RUNS runs.
+
+    Args:
+        code: Import statement to measure
+
+    Returns:
+        float: Milliseconds spent in the top-level file_organizer_app imports
+    """
+    best = None
+    for _ in range(RUNS):
+        times = import_times(code)
+        # Nested imports are already counted in the top-level entries
+        total = sum(us for name, (us, depth) in times.items()
+                    if depth == 0 and name.startswith("file_organizer_app"))
+        best = total if best is None else min(best, total)
+    return best / 1000
+
+def loaded_heavy_modules(code):
+    """
+    List the heavy modules an import pulls in.
+
+    Args:
+        code: Import statement to check
+
+    Returns:
+        list: Names from HEAVY_MODULES that were imported
+    """
+    times = import_times(code)
+    return [name for name in HEAVY_MODULES if name in times]
+
+def test_window_startup():
+    """The window and its first tab import within the budget."""
+    ms = startup_ms(WINDOW_IMPORTS)
+    print(f"Window imports: {ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    assert ms < IMPORT_BUDGET_MS
+
+def test_cli_startup():
+    """The command line interface imports within the budget."""
+    ms = startup_ms(CLI_IMPORTS)
+    print(f"CLI imports: {ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    assert ms < IMPORT_BUDGET_MS
+
+def test_no_heavy_modules():
+    """Startup doesn't load the archive, database or process pool modules."""
+    for code in (WINDOW_IMPORTS, CLI_IMPORTS, "import file_organizer_app.utils"):
+        heavy = loaded_heavy_modules(code)
+        print(f"{code}: {', '.join(heavy) or 'no heavy modules'}")
+        assert not heavy
+
+def test_lazy_exports():
+    """Names exported by the utils package still resolve when first used."""
+    import file_organizer_app.utils as utils
+    from file_organizer_app.utils.file_operations import archive_files
+    assert utils.archive_files is archive_files
+    assert "find_unused_files" in dir(utils)
+
+def test_cli_archive_modes():
+    """The CLI's copy of the archive modes matches incremental_archive."""
+    from file_organizer_app import cli
+    from file_organizer_app.utils.incremental_archive import FULL, INCREMENTAL, DIFFERENTIAL
+    assert cli.ARCHIVE_MODES == (FULL, INCREMENTAL, DIFFERENTIAL)
+
+def main():
+    """
+    Run the startup checks and print the measured import times.
+    """
+    print("Testing startup import times...")
+    test_window_startup()
+    test_cli_startup()
+    test_no_heavy_modules()
+    test_lazy_exports()
+    test_cli_archive_modes()
+    print("\nAll startup checks passed.")
+
+if __name__ == "__main__":
+    main()
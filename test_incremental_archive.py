@@ -0,0 +1,157 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.incremental_archive import (
+    DIFFERENTIAL, FULL, INCREMENTAL, create_incremental_archive, load_manifest, restore_archive
+)
+
+def setup_test_environment():
+    """
+    Create a test directory with a folder to archive and a directory for the archives.
+
+    Returns:
+        tuple: Paths of the folder to archive and of the archive directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_incremental_archive_"))
+    folder = test_dir / "project"
+    (folder / "docs").mkdir(parents=True)
+
+    write(folder / "readme.txt", "readme")
+    write(folder / "docs" / "guide.txt", "guide")
+    write(folder / "docs" / "data.bin", os.urandom(100 * 1024))
+    write(folder / "notes.txt", "notes")
+
+    return folder, test_dir / "archives"
+
+def write(path, content):
+    """
+    Write a file and give it a modification time no earlier file has, so every edit is noticed.
+    """
+    if isinstance(content, str):
+        path.write_text(content)
+    else:
+        path.write_bytes(content)
+    write.mtime_ns += 1_000_000_000
+    os.utime(path, ns=(write.mtime_ns, write.mtime_ns))
+
+write.mtime_ns = time.time_ns()
+
+def snapshot(folder):
+    """
+    Map the files below a folder, relative to it, to their contents.
+    """
+    return {path.relative_to(folder).as_posix(): path.read_bytes() for path in folder.rglob("*") if path.is_file()}
+
+def check_restore(manifest_path, expected, restore_dir):
+    """
+    Restore an archive and compare the result with a snapshot of the folder.
+    """
+    count, errors = restore_archive(manifest_path, str(restore_dir))
+    print(f"Restored {count} files from {os.path.basename(manifest_path)}, errors: {errors}")
+    assert not errors
+    assert snapshot(restore_dir) == expected
+
+def run_chain(archive_type):
+    """
+    Archive a folder through a chain of edits and restore every point of it.
+    """
+    folder, archive_dir = setup_test_environment()
+    try:
+        snapshots = []
+
+        def archive(mode):
+            manifest_path, error = create_incremental_archive(str(folder), str(archive_dir), archive_type, mode)
+            assert error is None, error
+            snapshots.append((manifest_path, snapshot(folder)))
+            return load_manifest(manifest_path)
+
+        full = archive(FULL)
+        assert sorted(full["stored"]) == sorted(snapshot(folder))
+
+        # Edit one file, delete another, add a new one
+        write(folder / "readme.txt", "readme, edited")
+        os.remove(folder / "notes.txt")
+        write(folder / "docs" / "new.txt", "new file")
+        first = archive(INCREMENTAL)
+        print(f"Incremental: stored {first['stored']}, deleted {first['deleted']}")
+        assert first["stored"] == ["docs/new.txt", "readme.txt"]
+        assert first["deleted"] == ["notes.txt"]
+
+        # Re-add the deleted file, and touch one without changing it
+        write(folder / "notes.txt", "notes are back")
+        write(folder / "docs" / "guide.txt", "guide")
+        second = archive(INCREMENTAL)
+        print(f"Incremental: stored {second['stored']}, deleted {second['deleted']}")
+        assert second["stored"] == ["notes.txt"]
+        assert second["deleted"] == []
+
+        # A differential archive stores everything changed since the full one
+        os.remove(folder / "docs" / "data.bin")
+        differential = archive(DIFFERENTIAL)
+        print(f"Differential: stored {differential['stored']}, deleted {differential['deleted']}")
+        assert differential["base"] == os.path.basename(snapshots[0][0])
+        assert differential["stored"] == ["docs/new.txt", "notes.txt", "readme.txt"]
+        assert differential["deleted"] == ["docs/data.bin"]
+
+        for index, (manifest_path, expected) in enumerate(snapshots):
+            check_restore(manifest_path, expected, archive_dir.parent / f"restored_{index}")
+    finally:
+        shutil.rmtree(folder.parent)
+
+def test_chain_tar_gz():
+    """
+    Test a full, incremental and differential chain of tar.gz archives.
+    """
+    print("\n=== Testing an archive chain with tar.gz ===")
+    run_chain("tar.gz")
+
+def test_chain_zip():
+    """
+    Test a full, incremental and differential chain of zip archives.
+    """
+    print("\n=== Testing an archive chain with zip ===")
+    run_chain("zip")
+
+def test_archives_kept_in_folder():
+    """
+    Test archiving a folder into itself: the folder is archived, its archives are not.
+    """
+    print("\n=== Testing archives kept in the archived folder ===")
+    folder, _ = setup_test_environment()
+    try:
+        expected = snapshot(folder)
+        manifest_path, error = create_incremental_archive(str(folder), str(folder), "zip", FULL)
+        assert error is None, error
+        manifest = load_manifest(manifest_path)
+        print(f"Files in the manifest: {sorted(manifest['files'])}")
+        assert sorted(manifest["files"]) == sorted(expected)
+
+        # The next run finds nothing new: not its own archive, and nothing deleted
+        manifest_path, error = create_incremental_archive(str(folder), str(folder), "zip", INCREMENTAL)
+        assert error is None, error
+        manifest = load_manifest(manifest_path)
+        print(f"Next run: stored {manifest['stored']}, deleted {manifest['deleted']}")
+        assert manifest["stored"] == [] and manifest["deleted"] == []
+        check_restore(manifest_path, expected, folder.parent / "restored")
+    finally:
+        shutil.rmtree(folder.parent)
+
+def main():
+    """
+    Run all the incremental archive tests in sequence.
+    """
+    test_chain_tar_gz()
+    test_chain_zip()
+    test_archives_kept_in_folder()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
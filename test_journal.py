@@ -0,0 +1,193 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.journal import (
+    COMPLETE, INCOMPLETE, UNDONE, OrganizeJournal, list_runs, prune_journals, resume_run, undo_run
+)
+from file_organizer_app.utils.move_planner import plan_moves
+
+def setup_test_environment():
+    """
+    Create a test directory with files to organize and a journal directory.
+
+    Returns:
+        tuple: Paths of the test directory and of the journal directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_journal_"))
+    journal_dir = test_dir / "journals"
+    work_dir = test_dir / "work"
+    work_dir.mkdir()
+
+    for name in ("a.txt", "b.txt", "c.pdf", "d.pdf"):
+        (work_dir / name).write_text(f"content of {name}")
+
+    return work_dir, journal_dir
+
+def listing(work_dir):
+    """
+    List the files below a directory, relative to it.
+    """
+    return sorted(str(path.relative_to(work_dir)) for path in work_dir.rglob("*") if path.is_file())
+
+def start_run(work_dir, journal_dir):
+    """
+    Plan and journal an organize run of the test directory without applying it.
+
+    Returns:
+        tuple: The journal and the plan
+    """
+    files = [(str(work_dir / name), "txt_only" if name.endswith(".txt") else "pdf_only")
+             for name in ("a.txt", "b.txt", "c.pdf", "d.pdf")]
+    plan = plan_moves(files, str(work_dir))
+    journal = OrganizeJournal.create(str(work_dir), plan, str(journal_dir))
+    for folder in plan.missing_folders:
+        os.makedirs(folder, exist_ok=True)
+    return journal, plan
+
+def test_resume_and_undo():
+    """
+    Test that an interrupted run is resumed from its journal and can then be undone.
+    """
+    print("\n=== Testing resume_run and undo_run ===")
+    work_dir, journal_dir = setup_test_environment()
+    try:
+        before = listing(work_dir)
+        journal, plan = start_run(work_dir, journal_dir)
+
+        # Simulate a crash: one move recorded, one applied without its record
+        first, second = plan.moves[0], plan.moves[1]
+        os.rename(first.source, first.dest)
+        journal.record_done(first)
+        os.rename(second.source, second.dest)
+        journal.close()
+
+        runs = list_runs(str(journal_dir), str(work_dir))
+        print(f"Runs: {[(os.path.basename(path), state) for path, _, state in runs]}")
+        assert [state for _, _, state in runs] == [INCOMPLETE]
+
+        moved, errors = resume_run(journal.path)
+        print(f"Resumed: {len(moved)} moves, errors: {errors}")
+        assert not errors
+        assert len(moved) == 2
+        assert OrganizeJournal(journal.path).state == COMPLETE
+        organized = listing(work_dir)
+        print(f"After resuming: {organized}")
+        assert organized == sorted(os.path.join("pdf_only" if name.endswith(".pdf") else "txt_only", name)
+                                   for name in before)
+
+        count, errors = undo_run(journal.path)
+        print(f"Undone: {count} moves, errors: {errors}")
+        assert count == 4 and not errors
+        assert OrganizeJournal(journal.path).state == UNDONE
+        assert listing(work_dir) == before
+        assert not (work_dir / "txt_only").exists()
+    finally:
+        shutil.rmtree(work_dir.parent)
+
+def test_undo_unrecorded_move():
+    """
+    Test that undoing an interrupted run also moves back files moved without a record.
+    """
+    print("\n=== Testing undo_run with a move applied but not recorded ===")
+    work_dir, journal_dir = setup_test_environment()
+    try:
+        before = listing(work_dir)
+        journal, plan = start_run(work_dir, journal_dir)
+
+        # The record of the second move was lost with the batched fsync
+        first, second = plan.moves[0], plan.moves[1]
+        os.rename(first.source, first.dest)
+        journal.record_done(first)
+        os.rename(second.source, second.dest)
+        journal.close()
+
+        count, errors = undo_run(journal.path)
+        print(f"Undone: {count} moves, errors: {errors}")
+        assert count == 2 and not errors
+        assert OrganizeJournal(journal.path).state == UNDONE
+        assert listing(work_dir) == before
+    finally:
+        shutil.rmtree(work_dir.parent)
+
+def test_reconcile_file_at_both_ends():
+    """
+    Test that a file found at both source and destination is only removed
+    from the source when the destination is an identical copy.
+    """
+    print("\n=== Testing OrganizeJournal.reconcile with files at both ends ===")
+    work_dir, journal_dir = setup_test_environment()
+    try:
+        journal, plan = start_run(work_dir, journal_dir)
+        copied, unrelated = plan.moves[0], plan.moves[1]
+
+        # An interrupted cross-device move: the finished copy is in place
+        shutil.copy2(copied.source, copied.dest)
+
+        # An unrelated file of the same size turned up at the destination
+        original = Path(unrelated.source).read_text()
+        Path(unrelated.dest).write_text("x" * len(original))
+        journal.close()
+
+        journal = OrganizeJournal(journal.path)
+        remaining = journal.reconcile()
+        journal.close()
+        print(f"Remaining moves: {len(remaining.moves)}, failed: {list(journal.failed.values())}")
+
+        assert not os.path.exists(copied.source)
+        assert os.path.exists(copied.dest)
+        assert Path(unrelated.source).read_text() == original
+        assert Path(unrelated.dest).read_text() == "x" * len(original)
+        assert list(journal.failed) == [1]
+        assert len(remaining.moves) == 2
+    finally:
+        shutil.rmtree(work_dir.parent)
+
+def test_prune_journals():
+    """
+    Test that old journals of finished runs are removed and unfinished ones are kept.
+    """
+    print("\n=== Testing prune_journals ===")
+    work_dir, journal_dir = setup_test_environment()
+    try:
+        finished, _ = start_run(work_dir, journal_dir)
+        finished.mark(COMPLETE)
+        finished.close()
+        unfinished, _ = start_run(work_dir, journal_dir)
+        unfinished.close()
+        recent, _ = start_run(work_dir, journal_dir)
+        recent.mark(COMPLETE)
+        recent.close()
+
+        old = time.time() - 60 * 24 * 60 * 60
+        for journal in (finished, unfinished):
+            os.utime(journal.path, (old, old))
+
+        removed = prune_journals(str(journal_dir))
+        print(f"Removed {removed} journals, kept {sorted(os.listdir(journal_dir))}")
+        assert removed == 1
+        assert not os.path.exists(finished.path)
+        assert os.path.exists(unfinished.path)
+        assert os.path.exists(recent.path)
+    finally:
+        shutil.rmtree(work_dir.parent)
+
+def main():
+    """
+    Run all the journal tests in sequence.
+    """
+    test_resume_and_undo()
+    test_undo_unrecorded_move()
+    test_reconcile_file_at_both_ends()
+    test_prune_journals()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
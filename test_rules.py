@@ -0,0 +1,168 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils.file_organizer import organize_files
+from file_organizer_app.utils.rules import Rule, RulesEngine
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+def setup_test_environment():
+    """
+    Create a test directory with a few files of different types and ages.
+
+    Returns:
+        Path: Path object pointing to the created test directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_rules_"))
+    (test_dir / "subfolder").mkdir()
+
+    (test_dir / "photo.jpg").write_bytes(b"jpg")
+    (test_dir / "subfolder" / "holiday.JPG").write_bytes(b"jpg")
+    (test_dir / "invoice_2023.pdf").write_bytes(b"pdf")
+    (test_dir / "notes.txt").write_text("notes")
+    (test_dir / "old.log").write_text("log")
+    old = time.time() - 400 * SECONDS_PER_DAY
+    os.utime(test_dir / "old.log", (old, old))
+    (test_dir / "unknown.xyz").write_text("?")
+
+    return test_dir
+
+def test_routing():
+    """
+    Test that files are routed by extension, glob, regex and conditions, in rule order.
+    """
+    print("\n=== Testing RulesEngine.route ===")
+    engine = RulesEngine([
+        Rule("invoices", glob="invoice_*.pdf"),
+        Rule("media/photos", [".jpg", "PNG"]),
+        Rule("reports", regex=r"report-\d+\.txt"),
+        Rule("archive/old", min_age_days=365),
+    ])
+    now = time.time()
+    old_stats = os.stat_result((0o100644, 0, 0, 1, 0, 0, 10, 0, now - 400 * SECONDS_PER_DAY, 0))
+    new_stats = os.stat_result((0o100644, 0, 0, 1, 0, 0, 10, 0, now, 0))
+
+    cases = [
+        ("invoice_2023.pdf", None, "invoices"),
+        ("INVOICE_2023.PDF", None, "invoices"),
+        ("other.pdf", new_stats, "pdf_only"),
+        ("photo.JPG", None, "media/photos"),
+        ("image.png", None, "media/photos"),
+        ("report-12.txt", None, "reports"),
+        ("report-x.txt", new_stats, "txt_only"),
+        ("old.log", old_stats, "archive/old"),
+        ("new.log", new_stats, None),
+    ]
+    for name, stats, expected in cases:
+        folder = engine.route(os.path.join("some", "dir", name), stats, now)
+        print(f"  {name} -> {folder}")
+        assert folder == expected, f"{name}: expected {expected}, got {folder}"
+
+def test_regex_with_groups():
+    """
+    Test that regex rules with backreferences and named groups keep working
+    alongside other pattern rules, and that invalid regexes are reported.
+    """
+    print("\n=== Testing regex rules with groups ===")
+    engine = RulesEngine([
+        Rule("first", glob="*.first"),
+        Rule("doubled", regex=r"(a)\1\.txt"),
+        Rule("named_b", regex=r"(?P<letter>b)\.txt"),
+        Rule("named_c", regex=r"(?P<letter>c)\.txt"),
+        Rule("twice", regex=r"(?P<word>\w+)-(?P=word)\.log"),
+        Rule("later_glob", glob="aa*"),
+    ])
+    cases = [
+        ("x.first", "first"),
+        ("aa.txt", "doubled"),
+        ("ab.txt", "txt_only"),
+        ("b.txt", "named_b"),
+        ("c.txt", "named_c"),
+        ("run-run.log", "twice"),
+        ("run-walk.log", None),
+        ("aab", "later_glob"),
+    ]
+    for name, expected in cases:
+        folder = engine.route(name, None)
+        print(f"  {name} -> {folder}")
+        assert folder == expected, f"{name}: expected {expected}, got {folder}"
+
+    # Rule order still wins over the split into combined and separate patterns
+    engine = RulesEngine([Rule("glob_first", glob="a*"), Rule("doubled", regex=r"(a)\1\.txt")])
+    assert engine.route("aa.txt", None) == "glob_first"
+
+    try:
+        Rule("broken", regex="(unclosed")
+        assert False, "An invalid regex should be rejected"
+    except ValueError as e:
+        print(f"Rejected: {e}")
+
+def test_is_organized():
+    """
+    Test that only directories at or below a rule folder count as organized.
+    """
+    print("\n=== Testing RulesEngine.is_organized ===")
+    engine = RulesEngine([Rule("media/photos", [".jpg"])])
+    base = "base"
+    cases = [
+        (base, False),
+        (os.path.join(base, "pdf_only"), True),
+        (os.path.join(base, "pdf_only", "deeper"), True),
+        (os.path.join(base, "media", "photos"), True),
+        (os.path.join(base, "media", "photos", "2023"), True),
+        (os.path.join(base, "media"), False),
+        (os.path.join(base, "media", "photos_old"), False),
+        (os.path.join(base, "photos"), False),
+        (os.path.join(base, "projects", "pdf_only"), False),
+    ]
+    for path, expected in cases:
+        result = engine.is_organized(path, base)
+        print(f"  {path}: {result}")
+        assert result == expected, f"{path}: expected {expected}, got {result}"
+
+def test_organize_nested_folders_twice():
+    """
+    Test that organizing again leaves files in nested rule folders where they are.
+    """
+    print("\n=== Testing organize_files with nested rule folders ===")
+    test_dir = setup_test_environment()
+    try:
+        engine = RulesEngine([Rule("media/photos", [".jpg"]), Rule("archive/old", min_age_days=365)])
+        first = organize_files(str(test_dir), engine=engine)
+        print(f"First run: { {ext: count for ext, count in first.items() if count} }")
+
+        before = sorted(str(path.relative_to(test_dir)) for path in test_dir.rglob("*") if path.is_file())
+        print(f"Files after the first run: {before}")
+        assert os.path.join("media", "photos", "photo.jpg") in before
+        assert os.path.join("media", "photos", "holiday.JPG") in before
+        assert os.path.join("archive", "old", "old.log") in before
+        assert os.path.join("unknown.xyz") in before
+
+        second = organize_files(str(test_dir), engine=engine)
+        after = sorted(str(path.relative_to(test_dir)) for path in test_dir.rglob("*") if path.is_file())
+        print(f"Second run moved {sum(second.values())} files")
+        assert sum(second.values()) == 0
+        assert after == before
+    finally:
+        shutil.rmtree(test_dir)
+
+def main():
+    """
+    Run all the rules tests in sequence.
+    """
+    test_routing()
+    test_regex_with_groups()
+    test_is_organized()
+    test_organize_nested_folders_twice()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
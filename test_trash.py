@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory to the path to allow importing from the main package
+parent_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(parent_dir)
+
+from file_organizer_app.utils import trash
+from file_organizer_app.utils.trash import list_trash, purge_expired, purge_items, restore_items, trash_paths
+
+# The real trash locations, put back after each test
+ORIGINAL_TRASH = (trash.HOME_TRASH_DIR, trash.VOLUMES_FILE)
+
+def setup_test_environment():
+    """
+    Create a test directory with files and a folder to trash, and point the
+    home trash at a folder inside it so the real trash is never touched.
+
+    Returns:
+        tuple: Paths of the folder with the files and of the trash directory
+    """
+    test_dir = Path(tempfile.mkdtemp(prefix="test_trash_"))
+    work_dir = test_dir / "work"
+    (work_dir / "folder" / "subfolder").mkdir(parents=True)
+
+    (work_dir / "file.txt").write_text("a file")
+    (work_dir / "other.txt").write_text("another file")
+    (work_dir / "folder" / "inner.txt").write_text("inside the folder")
+    (work_dir / "folder" / "subfolder" / "deep.txt").write_text("deeper")
+
+    trash_dir = test_dir / "trash"
+    trash.HOME_TRASH_DIR = str(trash_dir)
+    trash.VOLUMES_FILE = str(trash_dir / "volumes")
+    trash._trash_dirs.clear()
+    return work_dir, trash_dir
+
+def cleanup_test_environment(work_dir):
+    """
+    Remove the test directory and point the home trash back at the real one.
+    """
+    trash.HOME_TRASH_DIR, trash.VOLUMES_FILE = ORIGINAL_TRASH
+    trash._trash_dirs.clear()
+    shutil.rmtree(work_dir.parent)
+
+def test_trash_and_restore():
+    """
+    Test that trashed files and folders are listed and restored to where they were.
+    """
+    print("\n=== Testing trash_paths and restore_items ===")
+    work_dir, trash_dir = setup_test_environment()
+    try:
+        count, errors = trash_paths([str(work_dir / "file.txt"), str(work_dir / "folder"),
+                                     str(work_dir / "missing.txt")])
+        print(f"Trashed {count} items, errors: {errors}")
+        assert count == 2 and len(errors) == 1
+        assert not (work_dir / "file.txt").exists() and not (work_dir / "folder").exists()
+
+        items = list_trash([str(trash_dir)])
+        print(f"In the trash: {items}")
+        assert sorted(os.path.basename(item.original_path) for item in items) == ["file.txt", "folder"]
+        folder = next(item for item in items if item.is_dir)
+        assert folder.size is None
+
+        # The original path was taken again in the meantime, so the file stays in the trash
+        (work_dir / "file.txt").write_text("a new file")
+        count, errors = restore_items(items)
+        print(f"Restored {count} items, errors: {errors}")
+        assert count == 1 and len(errors) == 1
+        assert (work_dir / "folder" / "subfolder" / "deep.txt").read_text() == "deeper"
+        assert (work_dir / "file.txt").read_text() == "a new file"
+        assert [os.path.basename(item.original_path) for item in list_trash([str(trash_dir)])] == ["file.txt"]
+
+        # Missing parent folders are recreated
+        count, _ = trash_paths([str(work_dir / "folder" / "inner.txt")])
+        shutil.rmtree(work_dir / "folder")
+        count, errors = restore_items(list_trash([str(trash_dir)])[:1])
+        assert count == 1 and not errors
+        assert (work_dir / "folder" / "inner.txt").read_text() == "inside the folder"
+    finally:
+        cleanup_test_environment(work_dir)
+
+def test_purge_items():
+    """
+    Test that purged items are gone for good and can no longer be listed.
+    """
+    print("\n=== Testing purge_items ===")
+    work_dir, trash_dir = setup_test_environment()
+    try:
+        trash_paths([str(work_dir / "file.txt"), str(work_dir / "folder")])
+        items = list_trash([str(trash_dir)])
+
+        count, errors = purge_items(items)
+        print(f"Purged {count} items, errors: {errors}")
+        assert count == 2 and not errors
+        assert list_trash([str(trash_dir)]) == []
+        assert os.listdir(trash_dir / trash.ITEMS_DIR) == []
+        assert os.listdir(trash_dir / trash.INFO_DIR) == []
+    finally:
+        cleanup_test_environment(work_dir)
+
+def test_purge_expired():
+    """
+    Test that only items older than the retention period and orphaned data are purged.
+    """
+    print("\n=== Testing purge_expired ===")
+    work_dir, trash_dir = setup_test_environment()
+    try:
+        trash_paths([str(work_dir / "file.txt"), str(work_dir / "folder"), str(work_dir / "other.txt")])
+
+        # Make the folder look like it was trashed 60 days ago
+        folder = next(item for item in list_trash([str(trash_dir)]) if item.is_dir)
+        with open(folder.info_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        info["deleted_at"] = time.time() - 60 * 24 * 60 * 60
+        with open(folder.info_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+        # Data left without its info by an interrupted purge
+        other = next(item for item in list_trash([str(trash_dir)]) if item.original_path.endswith("other.txt"))
+        os.remove(other.info_path)
+
+        count, errors = purge_expired(30, trash_dirs=[str(trash_dir)])
+        remaining = list_trash([str(trash_dir)])
+        print(f"Purged {count} expired items, errors: {errors}, remaining: {remaining}")
+        assert count == 1 and not errors
+        assert [os.path.basename(item.original_path) for item in remaining] == ["file.txt"]
+        assert sorted(os.listdir(trash_dir / trash.ITEMS_DIR)) == [remaining[0].item_id]
+
+        count, errors = purge_expired(0, trash_dirs=[str(trash_dir)])
+        print(f"Emptied the trash: {count} items, errors: {errors}")
+        assert count == 1 and not errors
+        assert list_trash([str(trash_dir)]) == []
+    finally:
+        cleanup_test_environment(work_dir)
+
+def test_volume_trash_must_be_private():
+    """
+    Test that a volume trash folder made or replaced by someone else is not used.
+    """
+    print("\n=== Testing the checks on trash folders of shared volumes ===")
+    work_dir, trash_dir = setup_test_environment()
+    try:
+        volume = work_dir.parent / "volume"
+        volume.mkdir()
+        volume_trash = volume / trash.VOLUME_TRASH_NAME
+
+        # A folder this user creates is private and gets used
+        trash._make_trash_dir(str(volume_trash), shared=True)
+        assert stat_mode(volume_trash) == 0o700
+        assert (volume_trash / trash.ITEMS_DIR).is_dir()
+
+        # Opened up to other users afterwards
+        os.chmod(volume_trash, 0o777)
+        expect_refused(volume_trash)
+        os.chmod(volume_trash, 0o700)
+
+        # Planted by another user (only possible to set up as root)
+        if hasattr(os, "getuid") and os.getuid() == 0:
+            os.chown(volume_trash, 12345, -1)
+            expect_refused(volume_trash)
+            os.chown(volume_trash, 0, -1)
+
+        # Replaced by a symlink to a folder someone else can read
+        shutil.rmtree(volume_trash)
+        readable = volume / "readable"
+        readable.mkdir(mode=0o700)
+        os.symlink(readable, volume_trash)
+        expect_refused(volume_trash)
+        assert os.listdir(readable) == []
+
+        # A trash folder that is no longer private is left out of the listing
+        trash_dir.mkdir(parents=True, exist_ok=True)
+        (trash_dir / "volumes").write_text(str(volume_trash) + "\n")
+        assert trash.known_trash_dirs() == [str(trash_dir)]
+    finally:
+        cleanup_test_environment(work_dir)
+
+def stat_mode(path):
+    """
+    Get the permission bits of a file or folder.
+    """
+    return os.lstat(path).st_mode & 0o777
+
+def expect_refused(volume_trash):
+    """
+    Check that a volume trash folder is refused.
+    """
+    try:
+        trash._make_trash_dir(str(volume_trash), shared=True)
+        assert False, f"{volume_trash} should have been refused"
+    except OSError as e:
+        print(f"Refused: {e}")
+
+def main():
+    """
+    Run all the trash tests in sequence.
+    """
+    test_trash_and_restore()
+    test_purge_items()
+    test_purge_expired()
+    test_volume_trash_must_be_private()
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()